@@ -1,6 +1,22 @@
 import numpy as np
 import numpy_financial as npf
-import locale
+import argparse
+import bisect
+import copy
+import hashlib
+import itertools
+import json
+import mmap
+import multiprocessing
+import os
+import socket
+import sqlite3
+import struct
+import sys
+import time
+import zlib
+from multiprocessing import shared_memory
+from collections import OrderedDict
 from datetime import datetime, date
 
 import csv  # Import csv for generating CSV files
@@ -10,21 +26,78 @@ try:
 except ImportError:
     tabulate = None  # Fallback if tabulate is not installed
 
+try:
+    import numba  # Optional JIT compiler for the sequential kernels
+except ImportError:
+    numba = None  # Fallback to the NumPy/pure-Python kernels
+
 # -------------------------------
 # Global Constants and Pay Scales
 # -------------------------------
-# Define pay scales with levels, basic pay, and years in each scale
-PAY_SCALES = [
-    {"level": 10, "basic_pay": 56100, "years_in_scale": 4},  # Junior Time Scale
-    {"level": 11, "basic_pay": 67700, "years_in_scale": 5},  # Senior Time Scale
-    {"level": 12, "basic_pay": 78800, "years_in_scale": 4},  # Junior Administrative Grade
-    {"level": 13, "basic_pay": 123100, "years_in_scale": 1}, # Selection Grade
-    {"level": 14, "basic_pay": 144200, "years_in_scale": 4}, # Super Time Scale
-    {"level": 15, "basic_pay": 182200, "years_in_scale": 7}, # Senior Administrative Grade
-    {"level": 16, "basic_pay": 205400, "years_in_scale": 5}, # HAG Scale
-    {"level": 17, "basic_pay": 225000, "years_in_scale": 6}, # Apex Scale
-    {"level": 18, "basic_pay": 250000, "years_in_scale": 2}, # Cabinet Secretary
-]
+# Pay matrices of each service (levels, basic pay, and years in each scale) are read from a data file
+PAY_MATRICES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pay_matrices.json")
+DEFAULT_SERVICE = "IAS"
+
+def load_pay_matrices(path=PAY_MATRICES_FILE):
+    """
+    Load the pay matrices of all services from a JSON data file.
+
+    Args:
+        path (str): Path of the JSON file
+
+    Returns:
+        dict: Service name -> list of pay scales ordered from the entry level
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    pay_matrices = {}
+    for service, definition in data.items():
+        levels = definition["levels"]
+        if not levels or any(scale["years_in_scale"] <= 0 for scale in levels):
+            raise ValueError(f"Invalid pay matrix for service {service}")
+        pay_matrices[service] = [
+            {"level": scale["level"], "basic_pay": scale["basic_pay"], "years_in_scale": scale["years_in_scale"]}
+            for scale in levels
+        ]
+    return pay_matrices
+
+def compile_pay_matrix(pay_scales):
+    """
+    Compile a pay matrix into lookup arrays: the cumulative service months at which
+    each level starts and ends, and the position of each level.
+    """
+    scale_months = np.array([scale["years_in_scale"] * 12 for scale in pay_scales])
+    boundaries = np.cumsum(scale_months)
+    return {
+        "starts": boundaries - scale_months,
+        "boundaries": boundaries,
+        "boundary_list": boundaries.tolist(),
+        "index": {scale["level"]: i for i, scale in enumerate(pay_scales)},
+    }
+
+PAY_MATRICES = load_pay_matrices()
+
+# Pay scales of the selected service; PAY_SCALES is revised in place at every pay commission
+PAY_SCALES = copy.deepcopy(PAY_MATRICES[DEFAULT_SERVICE])
+BASE_PAY_SCALES = copy.deepcopy(PAY_SCALES)
+PAY_SCALE_LOOKUP = compile_pay_matrix(PAY_SCALES)
+
+def service_pay_scales(service):
+    """
+    Base pay scales of a service, without selecting them for the module-level calculations.
+    """
+    if service not in PAY_MATRICES:
+        raise ValueError(f"Unknown service: {service} (available: {', '.join(PAY_MATRICES)})")
+    return PAY_MATRICES[service]
+
+def select_pay_matrix(service):
+    """
+    Select the pay matrix of a service for the following calculations.
+    """
+    global PAY_SCALE_LOOKUP
+    BASE_PAY_SCALES[:] = copy.deepcopy(service_pay_scales(service))
+    PAY_SCALES[:] = copy.deepcopy(BASE_PAY_SCALES)
+    PAY_SCALE_LOOKUP = compile_pay_matrix(PAY_SCALES)
 
 # Define global variables to track salary progression and UPS values
 overall_table = []  # Tracks salary and NPS corpus progression
@@ -46,6 +119,184 @@ DECEMBER = 12
 # Minimum assured payout for UPS
 MIN_UPS_PAYOUT = 10000
 
+# Month of death assumed by the yearly death-age tables (see value_death_months for monthly timing)
+DEATH_MONTH = DECEMBER
+
+# Version tag of the model; bump it whenever a change alters computed results
+MODEL_VERSION = "2026.10-2"
+
+# Default officer profile and assumptions (same defaults as the interactive prompts)
+DEFAULT_PROFILE = {
+    "service": DEFAULT_SERVICE,
+    "birth_year": 1996,
+    "birth_month": 6,
+    "year_of_joining": 2023,
+    "month_of_joining": 12,
+    "seniority_year": 2022,
+    "seniority_month": 1,
+    "normal_retirement_age": 60,
+    "retirement_age": 60,
+    "fitment_factor": None,  # None: calculate using Ackroyd's formula
+    "cost_of_living_adjustment": 0.2,
+    "inflation_rate": 0.05,
+    "equity_return": 0.12,
+    "corporate_bond_return": 0.08,
+    "gsec_return": 0.06,
+    "withdrawal_percentage": 0.0,
+    "annuity_rate": 0.06,
+    "pay_commission_interval": 10,
+    "life_cycle_fund": "LC50",
+    "spouse_age_difference": 10,
+    "joint_life": True,
+    "pension_fund_nav_rate": 0.08,
+}
+
+SEVENTH_PAY_COMMISSION_YEAR = 2016  # 7th Pay Commission year
+UPS_SWITCH_DATE = date(2025, 4, 1)  # Date when the UPS scheme was implemented
+
+# UPS rules that policy analysts may vary (see set_ups_policy and sweep_ups_policies)
+DEFAULT_UPS_POLICY = {
+    "switch_date": UPS_SWITCH_DATE,  # The individual corpus follows NPS until this date
+    "benchmark_contribution_rate": 0.2,  # 10% employee + 10% government
+    "individual_contribution_rate": 0.2,  # Contributions to the individual corpus after the switch
+    "assured_payout_share": 0.5,  # Share of the average salary of the last 12 months
+    "full_pension_service_months": 300,  # Service for the full assured payout (25 years)
+    "minimum_payout": MIN_UPS_PAYOUT,
+    "minimum_payout_service_months": 120,  # Service for the minimum payout (10 years)
+    "family_pension_share": 0.6,
+}
+
+def resolve_policy(policy=None):
+    """
+    Merge a (partial) UPS policy with DEFAULT_UPS_POLICY and normalise its values.
+
+    Args:
+        policy (dict): Policy rules overriding the defaults (switch_date may be an ISO date string)
+
+    Returns:
+        dict: Complete policy
+    """
+    resolved = dict(DEFAULT_UPS_POLICY)
+    resolved.update(policy or {})
+    unknown = set(resolved) - set(DEFAULT_UPS_POLICY)
+    if unknown:
+        raise ValueError(f"Unknown policy keys: {', '.join(sorted(unknown))}")
+    if isinstance(resolved["switch_date"], str):
+        resolved["switch_date"] = date.fromisoformat(resolved["switch_date"])
+    for key, default in DEFAULT_UPS_POLICY.items():
+        if key != "switch_date":
+            resolved[key] = type(default)(resolved[key])
+    return resolved
+
+ups_policy = resolve_policy()  # Active UPS policy
+
+def set_ups_policy(policy=None):
+    """
+    Set the UPS policy used by the calculation functions (None restores DEFAULT_UPS_POLICY).
+
+    Returns:
+        dict: The complete active policy
+    """
+    global ups_policy
+    ups_policy = resolve_policy(policy)
+    return ups_policy
+
+def ups_policy_key(policy=None):
+    """
+    Canonical JSON text of a policy (default: the active policy), for cache keys and metadata.
+    """
+    policy = resolve_policy(ups_policy if policy is None else policy)
+    return json.dumps({**policy, "switch_date": policy["switch_date"].isoformat()}, sort_keys=True, separators=(",", ":"))
+
+# -------------------------------
+# Sequential Kernels and Backends
+# -------------------------------
+# Recurrences that stay sequential after vectorization are written as plain loops.
+# The "numba" backend JIT-compiles them, the "python" backend runs them as they are
+# (the reference implementation), and the "numpy" backend uses closed forms where they exist.
+def _accumulate_corpus_loop(contributions, growth, initial):
+    """
+    corpus = (corpus + contribution) * growth along the months of each path.
+    contributions and growth are (paths x months) arrays, initial has one value per path.
+    """
+    corpus = np.empty(contributions.shape)
+    for path in range(contributions.shape[0]):
+        value = initial[path]
+        for month in range(contributions.shape[1]):
+            value = (value + contributions[path, month]) * growth[path, month]
+            corpus[path, month] = value
+    return corpus
+
+def _pay_commission_loop(basic_pay, years_in_scale, fitment_factor, count):
+    """
+    Basic pay of every level after 0..count pay commissions. Each level's floor depends on
+    the already revised previous level (as in update_pay_scales_for_pay_commission).
+    """
+    table = np.empty((count + 1, len(basic_pay)))
+    table[0] = basic_pay
+    for era in range(1, count + 1):
+        for i in range(len(basic_pay)):
+            previous_level_basic_pay = table[era, i - 1] if i > 0 else table[era - 1, i]
+            table[era, i] = max(
+                table[era - 1, i] * fitment_factor,
+                previous_level_basic_pay * (1.03 ** (years_in_scale[i] + 2))
+            )
+    return table
+
+def _corpus_split_loop(salary, nps_corpus, switch_position, nav_growth, benchmark_rate, individual_rate):
+    """
+    Benchmark and individual corpus (as in calculate_corpus_values): the individual corpus
+    follows the NPS corpus until the switch, then both grow with their contribution rates
+    (20% by default) at the NAV rate.
+    """
+    benchmark_corpus = np.empty(len(salary))
+    individual_corpus = np.empty(len(salary))
+    benchmark = 0.0
+    individual = 0.0
+    for month in range(len(salary)):
+        benchmark = (benchmark + salary[month] * benchmark_rate) * nav_growth
+        if month < switch_position:
+            individual = nps_corpus[month]
+        else:
+            individual = (individual + salary[month] * individual_rate) * nav_growth
+        benchmark_corpus[month] = benchmark
+        individual_corpus[month] = individual
+    return benchmark_corpus, individual_corpus
+
+KERNELS = {
+    "python": {
+        "accumulate_corpus": _accumulate_corpus_loop,
+        "pay_commission": _pay_commission_loop,
+        "corpus_split": _corpus_split_loop,
+    }
+}
+if numba is not None:
+    KERNELS["numba"] = {name: numba.njit(cache=True)(kernel) for name, kernel in KERNELS["python"].items()}
+
+BACKENDS = ("numpy", "python", "numba")
+backend = "numpy"  # Active computation backend; set_backend("numba") opts in to the JIT-compiled kernels
+
+def set_backend(name):
+    """
+    Select the computation backend for the sequential kernels.
+
+    Args:
+        name (str): "numba" (JIT-compiled loops, requires numba), "numpy" (vectorized
+                    closed forms with Python loops as fallback) or "python" (reference loops)
+    """
+    global backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name} (available: {', '.join(BACKENDS)})")
+    if name == "numba" and numba is None:
+        raise ValueError("The numba backend requires the numba package (pip install numba)")
+    backend = name
+
+def get_kernel(name):
+    """
+    Return the loop kernel of the active backend (the plain Python loop for "numpy").
+    """
+    return KERNELS.get(backend, KERNELS["python"])[name]
+
 def calculate_monthly_salary(pay_scale_level, months_at_level, increment_months):
     """
     Calculate the monthly salary for a given pay scale level and months at that level.
@@ -57,9 +308,10 @@ def calculate_monthly_salary(pay_scale_level, months_at_level, increment_months)
     - increment_months: How many times the July increment has been applied
     """
     increment_rate = 0.03  # Fixed 3% annual increment
-    pay_scale = next((scale for scale in PAY_SCALES if scale["level"] == pay_scale_level), None)
-    if not pay_scale:
+    position = PAY_SCALE_LOOKUP["index"].get(pay_scale_level)
+    if position is None:
         raise ValueError(f"Invalid pay scale level: {pay_scale_level}")
+    pay_scale = PAY_SCALES[position]
 
     basic_pay = pay_scale["basic_pay"] * (1 + increment_rate) ** increment_months
     salary = basic_pay + (0.53 * basic_pay)  # Add Dearness Allowance (DA)
@@ -85,18 +337,9 @@ def get_pay_scale_for_service_months(service_months):
     Returns the pay scale and months spent in current scale.
     Pay scale updates apply from January.
     """
-    cumulative_months = 0
-    for i, scale in enumerate(PAY_SCALES):
-        scale_months = scale["years_in_scale"] * 12
-        cumulative_months += scale_months
-        if service_months < cumulative_months:
-            months_in_current_scale = service_months - (cumulative_months - scale_months)
-            return scale, months_in_current_scale
-    
     # If all levels are completed, return the last scale
-    last_scale = PAY_SCALES[-1]
-    last_scale_months = last_scale["years_in_scale"] * 12
-    return last_scale, service_months - (cumulative_months - last_scale_months)
+    position = min(bisect.bisect_right(PAY_SCALE_LOOKUP["boundary_list"], service_months), len(PAY_SCALES) - 1)
+    return PAY_SCALES[position], service_months - int(PAY_SCALE_LOOKUP["starts"][position])
 
 def calculate_fitment_factor(cost_of_living_adjustment=0.2):
     """
@@ -169,82 +412,167 @@ def initialize_nps_corpus(
         overall_table[i]["nps_corpus"] = corpus
     return
 
-def calculate_nps_pension_with_rop(death_year, retirement_date, annuity_rate):
+def build_discount_table(retirement_month, years, inflation_rate):
     """
-    Calculate the NPS pension based on the final corpus and annuity plan with Return of Purchase Price.
+    Build the per-year inflation discount factors used to value pension streams.
+    The retirement year is discounted by the months left after retirement, later years
+    by whole years since retirement (the same convention as the UPS valuation).
+
+    Args:
+        retirement_month (int): Month of retirement (1-12)
+        years (int): Number of years after the retirement year to include
+        inflation_rate (float): Annual inflation rate
+
+    Returns:
+        np.ndarray: Discount factor indexed by years since the retirement year
     """
-    global withdrawal_percentage, overall_table, normal_retirement_age, inflation_rate, pension_fund_nav_rate, retirement_age
-    nps_corpus = 0
-    if not overall_table:
-        # Return default values if overall_table is empty
-        return 0, 0, 0, 0
+    months_since_retirement = np.arange(max(int(years), 0) + 1) * 12
+    months_since_retirement[0] = 12 - retirement_month
+    return (1 + (inflation_rate / 12)) ** -months_since_retirement.astype(float)
 
-    is_vrs = retirement_age < normal_retirement_age
+def value_nps_annuity(retirement_corpus, retirement_year, retirement_month, death_years,
+                      annuity_rate, spouse_age_difference, joint_life=True, withdrawal=None, profile=None):
+    """
+    Value the NPS annuity payout of officers who die after retirement.
+    All array arguments broadcast against each other, so a single call can value
+    every (retirement, death year) combination.
+
+    The officer receives the annuity from retirement until death. With joint_life the
+    same annuity continues to the spouse, and the purchase price is returned to the
+    nominee after the last annuitant dies. Payments are discounted with the same
+    factors used for the UPS pension so both totals are comparable.
+
+    Args:
+        retirement_corpus (float or np.ndarray): NPS corpus at retirement
+        retirement_year (int or np.ndarray): Year of retirement
+        retirement_month (int): Month of retirement (1-12)
+        death_years (np.ndarray): Years of death (not before the retirement year)
+        annuity_rate (float): Annual annuity rate for the RoP plan
+        spouse_age_difference (int): Years spouse is expected to live after employee
+        joint_life (bool): Whether the annuity continues to the spouse
+        withdrawal (float or np.ndarray): Lump sum withdrawal share of the corpus
+                                          (default: the profile's withdrawal_percentage)
+        profile (dict): Complete profile supplying the inflation_rate and withdrawal_percentage
+                        (default: the module-level assumptions, see current_assumptions)
+
+    Returns:
+        tuple of np.ndarray: (monthly_pension, lump_sum, inflation_adjusted_value, nominal_value)
+    """
+    profile = profile or current_assumptions()
+    inflation_rate = profile["inflation_rate"]
+    if withdrawal is None:
+        withdrawal = profile["withdrawal_percentage"]
+    retirement_corpus = np.asarray(retirement_corpus, dtype=float)
+    annuity_corpus = retirement_corpus * (1 - withdrawal)
+    monthly_pension = annuity_corpus * annuity_rate / 12
+    annual_pension = monthly_pension * 12
+    lump_sum = retirement_corpus * withdrawal
+
+    # Year on which the spouse's annuity (and so the RoP refund) ends
+    spouse_end_year = retirement_year + spouse_age_difference
+    survives = joint_life & (death_years < spouse_end_year)
+    spouse_years = np.where(survives, spouse_end_year - death_years, 0)
+    years_paid = np.clip(death_years - retirement_year, 0, None)
+    final_offset = np.clip(np.where(survives, spouse_end_year, death_years) - retirement_year, 0, None)
+
+    discount = build_discount_table(retirement_month, np.max(final_offset, initial=0), inflation_rate)
+    cumulative_discount = np.cumsum(discount)
+
+    # Officer's annuity from the retirement year to the death year
+    officer_value = annual_pension * cumulative_discount[years_paid]
+    officer_nominal = annual_pension * (years_paid + 1)
+
+    # Spouse continuation, discounted from the officer's death like the UPS family pension
+    yearly_factor = (1 + (inflation_rate / 12)) ** -12.0
+    spouse_factor = np.cumsum(yearly_factor ** np.arange(np.max(spouse_years, initial=0) + 1))
+    spouse_value = np.where(survives, annual_pension * spouse_factor[spouse_years], 0)
+    spouse_nominal = np.where(survives, annual_pension * (spouse_years + 1), 0)
+
+    # Return of purchase price to the nominee after the last annuitant dies
+    rop_value = annuity_corpus * discount[final_offset]
+
+    inflation_adjusted_value = lump_sum + officer_value + spouse_value + rop_value
+    nominal_value = lump_sum + officer_nominal + spouse_nominal + annuity_corpus
+    shape = np.broadcast(inflation_adjusted_value, nominal_value).shape
+    return (
+        np.broadcast_to(monthly_pension, shape),
+        np.broadcast_to(lump_sum, shape),
+        inflation_adjusted_value,
+        nominal_value,
+    )
+
+def value_nps_annuity_streams(death_years, retirement_date, annuity_rate, spouse_age_difference, joint_life=True):
+    """
+    Value the NPS payout (Return of Purchase Price plan) for every death year at once.
+    Deaths before retirement pay the accumulated corpus to the nominee; later deaths
+    are valued with value_nps_annuity.
+
+    Args:
+        death_years (array-like): Years of death to value
+        retirement_date (date or int): Date of retirement
+        annuity_rate (float): Annual annuity rate for the RoP plan
+        spouse_age_difference (int): Years spouse is expected to live after employee
+        joint_life (bool): Whether the annuity continues to the spouse
+
+    Returns:
+        tuple of np.ndarray: (monthly_pension, lump_sum, inflation_adjusted_value, nominal_value)
+    """
+    global overall_table
+
+    death_month = DEATH_MONTH
+    death_years = np.asarray(death_years, dtype=int)
+    zeros = np.zeros(len(death_years))
+    if not overall_table:
+        return zeros, zeros.copy(), zeros.copy(), zeros.copy()
 
     if isinstance(retirement_date, int):
-        retirement_year = retirement_date
-        retirement_month = 1
-        retirement_date = date(retirement_year, retirement_month, 1)
-    else:
-        retirement_year = retirement_date.year
-        retirement_month = retirement_date.month
+        retirement_date = date(retirement_date, 1, 1)
 
-    is_pre_retirement = death_year < retirement_date.year or (death_year == retirement_date.year and death_month < retirement_date.month)
+    # Corpus lookup by month index (year * 12 + month - 1) of every ledger entry
+    month_index = np.array([e["year"] * 12 + e["month"] - 1 for e in overall_table])
+    corpus = np.array([e["nps_corpus"] for e in overall_table], dtype=float)
 
-    if is_pre_retirement:
-        # For pre-retirement, use the last entry in overall_table
-        pre_death_entries = [e for e in overall_table if 
-            (e["year"] < death_year) or 
-            (e["year"] == death_year and e["month"] <= death_month)]
-        if not pre_death_entries:
-            return 0, 0, 0, 0  # Handle edge case where no entries exist
-        nps_corpus = pre_death_entries[-1]["nps_corpus"]
-        annuity_corpus = 0
-        lump_sum = nps_corpus
-        nominal_nps_corpus = nps_corpus
-        return 0, lump_sum, nps_corpus, nominal_nps_corpus
-    elif is_vrs:
-        # For VRS, use the last entry in overall_table
-        vrs_entries = [e for e in overall_table if 
-            (e["year"] < retirement_date.year) or 
-            (e["year"] == retirement_date.year and e["month"] <= retirement_date.month)]
-        if not vrs_entries:
-            return 0, 0, 0, 0  # Handle edge case where no entries exist
-        nps_corpus = vrs_entries[-1]["nps_corpus"]
-        annuity_corpus = nps_corpus * (1 - withdrawal_percentage)
-        annual_pension = annuity_corpus * annuity_rate
-        monthly_pension = annual_pension / 12
-        lump_sum = nps_corpus * withdrawal_percentage
-        nominal_nps_corpus = lump_sum + annuity_corpus
-        return monthly_pension, lump_sum, nps_corpus, nominal_nps_corpus
-    else:
-        # For post-retirement, use the last entry in overall_table
-        post_retirement_entries = [e for e in overall_table if 
-            (e["year"] < retirement_date.year) or 
-            (e["year"] == retirement_date.year and e["month"] <= retirement_date.month)]
-        if not post_retirement_entries:
-            return 0, 0, 0, 0  # Handle edge case where no entries exist
-        nps_corpus = post_retirement_entries[-1]["nps_corpus"]
-        annuity_corpus = nps_corpus * (1 - withdrawal_percentage)
-        annual_pension = annuity_corpus * annuity_rate
-        monthly_pension = annual_pension / 12
-        lump_sum = nps_corpus * withdrawal_percentage
-        nominal_nps_corpus = lump_sum + annuity_corpus
-        return monthly_pension, lump_sum, nps_corpus, nominal_nps_corpus
+    is_pre_retirement = (death_years < retirement_date.year) | (
+        (death_years == retirement_date.year) & (death_month < retirement_date.month))
+
+    # Pre-retirement death: the corpus accumulated until death is paid to the nominee
+    death_positions = np.searchsorted(month_index, death_years * 12 + death_month - 1, side="right") - 1
+    corpus_at_death = np.where(death_positions >= 0, corpus[np.maximum(death_positions, 0)], 0)
+
+    retirement_position = np.searchsorted(
+        month_index, retirement_date.year * 12 + retirement_date.month - 1, side="right") - 1
+    retirement_corpus = corpus[retirement_position] if retirement_position >= 0 else 0
+
+    monthly_pension, lump_sum, inflation_adjusted_value, nominal_value = value_nps_annuity(
+        retirement_corpus,
+        retirement_date.year,
+        retirement_date.month,
+        death_years,
+        annuity_rate,
+        spouse_age_difference,
+        joint_life
+    )
+    return (
+        np.where(is_pre_retirement, 0, monthly_pension),
+        np.where(is_pre_retirement, corpus_at_death, lump_sum),
+        np.where(is_pre_retirement, corpus_at_death, inflation_adjusted_value),
+        np.where(is_pre_retirement, corpus_at_death, nominal_value),
+    )
 # ------------------------------------------------------------------------------------------------------------------------------
 
-def initialize_ups_values(retirement_date, switch_date=date(2025, 4, 1)):
+def initialize_ups_values(retirement_date, switch_date=None, corpus_values=None):
     """
     Calculate UPS values for the retiree with optimized approach.
     
     Args:
         retirement_date (date): The date of retirement
-        switch_date (date): The date when the UPS scheme was implemented
+        switch_date (date): The date when the UPS scheme was implemented (default: the policy's)
+        corpus_values (tuple): Precomputed (benchmark_corpus, individual_corpus), if available
         
     Returns:
         dict: UPS values and parameters dictionary
     """
-    global overall_table, pension_fund_nav_rate, withdrawal_percentage, MIN_UPS_PAYOUT, fitment_factor
+    global overall_table, pension_fund_nav_rate, withdrawal_percentage, ups_policy, fitment_factor
     global pay_commission_interval, inflation_rate, retirement_age
     
     # Find the last 12 months' salary before retirement
@@ -265,17 +593,19 @@ def initialize_ups_values(retirement_date, switch_date=date(2025, 4, 1)):
     service_months = (retirement_date.year - first_date.year) * 12 + retirement_date.month - first_date.month
     
     # Check if service is at least 10 years (120 months)
-    has_minimum_service = service_months >= 120
+    has_minimum_service = service_months >= ups_policy["minimum_payout_service_months"]
     
     # Initialize corpus values
-    benchmark_corpus, individual_corpus = calculate_corpus_values(switch_date)
+    if corpus_values is None:
+        corpus_values = calculate_corpus_values(switch_date or ups_policy["switch_date"])
+    benchmark_corpus, individual_corpus = corpus_values
     
     # Calculate initial pension parameters
-    pension_percentage = min(service_months / 300, 1)  # Cap at 25 years (300 months)
+    pension_percentage = min(service_months / ups_policy["full_pension_service_months"], 1)  # Cap at 25 years (300 months)
     corpus_ratio = min(individual_corpus / benchmark_corpus if benchmark_corpus > 0 else 0, 1)
     
     # Calculate initial assured payout (before lumpsum withdrawal adjustment)
-    assured_payout = (avg_last_12_months_salary / 2) * corpus_ratio * pension_percentage
+    assured_payout = avg_last_12_months_salary * ups_policy["assured_payout_share"] * corpus_ratio * pension_percentage
     
     # Calculate lumpsum withdrawal and adjusted pension
     lumpsum_withdrawal, excess_corpus, adjusted_pension = calculate_lumpsum_and_pension(
@@ -316,7 +646,7 @@ def calculate_corpus_values(switch_date):
     Returns:
         tuple: (benchmark_corpus, individual_corpus)
     """
-    global overall_table, pension_fund_nav_rate
+    global overall_table, pension_fund_nav_rate, ups_policy
     
     benchmark_corpus = 0
     individual_corpus = 0
@@ -325,7 +655,7 @@ def calculate_corpus_values(switch_date):
     for entry in overall_table:
         entry_date = date(entry["year"], entry["month"], 1)
         if entry_date <= switch_date:
-            monthly_contribution = entry["monthly_salary"] * 0.2  # 10% employee + 10% government
+            monthly_contribution = entry["monthly_salary"] * ups_policy["benchmark_contribution_rate"]
             benchmark_corpus += monthly_contribution
             benchmark_corpus *= (1 + pension_fund_nav_rate / 12)  # Grow at NAV rate
             individual_corpus = entry["nps_corpus"]  # Set individual corpus to NPS corpus value
@@ -333,9 +663,8 @@ def calculate_corpus_values(switch_date):
             entry["individual_corpus"] = individual_corpus
         else:
             # After switch date, grow both corpus values
-            monthly_contribution = entry["monthly_salary"] * 0.2
-            individual_corpus += monthly_contribution
-            benchmark_corpus += monthly_contribution
+            individual_corpus += entry["monthly_salary"] * ups_policy["individual_contribution_rate"]
+            benchmark_corpus += entry["monthly_salary"] * ups_policy["benchmark_contribution_rate"]
             
             individual_corpus *= (1 + pension_fund_nav_rate / 12)
             benchmark_corpus *= (1 + pension_fund_nav_rate / 12)
@@ -359,10 +688,10 @@ def calculate_lumpsum_and_pension(withdrawal_percentage, benchmark_corpus, indiv
     Returns:
         tuple: (lumpsum_withdrawal, excess_corpus, adjusted_pension)
     """
-    global MIN_UPS_PAYOUT
+    global ups_policy
     
     # Cap withdrawal percentage at 60%
-    actual_withdrawal_percentage = min(withdrawal_percentage, 0.6)
+    actual_withdrawal_percentage = np.minimum(withdrawal_percentage, 0.6)
     
     # Calculate excess amount in individual corpus
     excess_corpus = max(0, individual_corpus - benchmark_corpus)
@@ -375,12 +704,12 @@ def calculate_lumpsum_and_pension(withdrawal_percentage, benchmark_corpus, indiv
     adjusted_pension = assured_payout * (1 - actual_withdrawal_percentage)
     
     # Apply minimum pension if eligible
-    if has_minimum_service and adjusted_pension < MIN_UPS_PAYOUT:
-        adjusted_pension = MIN_UPS_PAYOUT
+    if has_minimum_service and adjusted_pension < ups_policy["minimum_payout"]:
+        adjusted_pension = ups_policy["minimum_payout"]
     
     return lumpsum_withdrawal, excess_corpus, adjusted_pension
 
-def calculate_ups_corpus_and_pension(death_year, retirement_date, spouse_age_difference):
+def calculate_ups_corpus_and_pension(death_year, retirement_date, spouse_age_difference, ups_values=None):
     """
     Master function to calculate UPS corpus and pension based on the scenario.
     
@@ -388,6 +717,7 @@ def calculate_ups_corpus_and_pension(death_year, retirement_date, spouse_age_dif
         death_year (int): Year of death
         retirement_date (date or int): Date of retirement
         spouse_age_difference (int): Years spouse is expected to live after employee
+        ups_values (dict): Pre-calculated UPS values, if available
         
     Returns:
         tuple: (inflation_adjusted_corpus, nominal_corpus, monthly_pension, lump_sum)
@@ -407,12 +737,13 @@ def calculate_ups_corpus_and_pension(death_year, retirement_date, spouse_age_dif
             return 0, 0, 0, 0
     
     # Initialize UPS values
-    ups_values = initialize_ups_values(retirement_date, switch_date=date(2025, 4, 1))
+    if ups_values is None:
+        ups_values = initialize_ups_values(retirement_date)
     if not ups_values:
         return 0, 0, 0, 0
     
     # Determine scenario: pre-retirement death, VRS, or post-retirement death
-    death_month = 12  # Assume death in December for simplicity
+    death_month = DEATH_MONTH
     is_pre_retirement = death_year < retirement_date.year or (death_year == retirement_date.year and death_month < retirement_date.month)
     
     if is_pre_retirement:
@@ -437,9 +768,9 @@ def calculate_pre_retirement_benefits(death_year, retirement_date, spouse_age_di
     Returns:
         tuple: (inflation_adjusted_corpus, nominal_corpus, monthly_pension, lump_sum)
     """
-    global overall_table, inflation_rate, MIN_UPS_PAYOUT
+    global overall_table, inflation_rate, ups_policy
     
-    death_month = 12  # Assume death in December
+    death_month = DEATH_MONTH
     
     # Calculate average salary for last 12 months before death
     pre_death_entries = [e for e in overall_table if 
@@ -458,7 +789,7 @@ def calculate_pre_retirement_benefits(death_year, retirement_date, spouse_age_di
     service_months = (death_year - first_date.year) * 12 + death_month - first_date.month
     
     # Calculate potential pension if retired on death date
-    pension_percentage = min(service_months / 300, 1)
+    pension_percentage = min(service_months / ups_policy["full_pension_service_months"], 1)
     
     # Get corpus values at death date
     death_entry = next((e for e in overall_table if 
@@ -470,13 +801,15 @@ def calculate_pre_retirement_benefits(death_year, retirement_date, spouse_age_di
     
     corpus_ratio = min(individual_corpus / benchmark_corpus if benchmark_corpus > 0 else 0, 1)
     
-    # Calculate potential pension and family pension (60%)
-    potential_pension = (avg_last_12_months_salary / 2) * corpus_ratio * pension_percentage
-    family_pension_monthly = potential_pension * 0.6
+    # Calculate potential pension and family pension (60% by default)
+    potential_pension = avg_last_12_months_salary * ups_policy["assured_payout_share"] * corpus_ratio * pension_percentage
+    family_pension_share = ups_policy["family_pension_share"]
+    family_pension_monthly = potential_pension * family_pension_share
     
     # Apply minimum pension if eligible (10+ years service)
-    if service_months >= 120 and family_pension_monthly < (MIN_UPS_PAYOUT * 0.6):
-        family_pension_monthly = MIN_UPS_PAYOUT * 0.6
+    minimum_family_pension = ups_policy["minimum_payout"] * family_pension_share
+    if service_months >= ups_policy["minimum_payout_service_months"] and family_pension_monthly < minimum_family_pension:
+        family_pension_monthly = minimum_family_pension
     
     # Calculate present value for spouse's pension
     corpus, nominal_corpus = calculate_spouse_pension_value(
@@ -621,7 +954,7 @@ def calculate_vrs_benefits(death_year, retirement_date, spouse_age_difference, u
         present_value = annual_pension / ((1 + (inflation_rate / 12)) ** months_since_retirement)
         corpus += present_value
     
-    # Add spouse's family pension (60%) for years after employee's death
+    # Add spouse's family pension (60% by default) for years after employee's death
     if death_year < retirement_date.year + spouse_age_difference:
         # Calculate pension at death
         pension_at_death = calculate_pension_for_year(
@@ -632,7 +965,7 @@ def calculate_vrs_benefits(death_year, retirement_date, spouse_age_difference, u
             fitment_factor
         )
         
-        family_pension = pension_at_death * 0.6
+        family_pension = pension_at_death * ups_policy["family_pension_share"]
         
         # Calculate remaining spouse years
         remaining_spouse_years = retirement_date.year + spouse_age_difference - death_year
@@ -703,7 +1036,7 @@ def calculate_post_retirement_benefits(death_year, retirement_date, spouse_age_d
         present_value = annual_pension / ((1 + (inflation_rate / 12)) ** months_since_retirement)
         corpus += present_value
     
-    # Add spouse's family pension (60%) for years after employee's death
+    # Add spouse's family pension (60% by default) for years after employee's death
     if death_year < retirement_date.year + spouse_age_difference:
         # Calculate pension at death
         pension_at_death = calculate_pension_for_year(
@@ -714,7 +1047,7 @@ def calculate_post_retirement_benefits(death_year, retirement_date, spouse_age_d
             fitment_factor
         )
         
-        family_pension = pension_at_death * 0.6
+        family_pension = pension_at_death * ups_policy["family_pension_share"]
         
         # Calculate remaining spouse years
         remaining_spouse_years = retirement_date.year + spouse_age_difference - death_year
@@ -740,21 +1073,469 @@ def calculate_post_retirement_benefits(death_year, retirement_date, spouse_age_d
         fitment_factor
     )
     
-    return corpus, nominal_corpus, monthly_pension, lump_sum# ----------------------------------------------------------------------------------------------------------------------------------------
+    return corpus, nominal_corpus, monthly_pension, lump_sum
+
+def pension_multiplier_table(years, pay_commission_interval, fitment_factor):
+    """
+    Tabulate calculate_pension_for_year as a multiple of the initial pension.
+
+    Args:
+        years (int): Number of years after the pension base year to include
+        pay_commission_interval (int): Years between pay commissions
+        fitment_factor (float): Increase factor during pay commission
+
+    Returns:
+        np.ndarray: Pension multiplier indexed by years since the pension base year
+    """
+    multipliers = np.empty(max(int(years), 0) + 1)
+    pension = 1.0
+    dr_year = 0
+    dr_rate = 0.02  # 2% DR per year
+    for year_offset in range(len(multipliers)):
+        # Apply pay commission fitment factor
+        if year_offset > 0 and year_offset % pay_commission_interval == 0:
+            pension *= fitment_factor
+            dr_year = 0  # Reset DR counter after pay commission
+        # Apply Dearness Relief (DR)
+        if dr_year > 0:
+            pension *= (1 + dr_rate)
+        dr_year += 1
+        multipliers[year_offset] = pension
+    return multipliers
+
+def value_ups_pension(initial_pension, lump_sum, retirement_year, retirement_month, pension_base_year,
+                      death_years, spouse_age_difference, policy=None, profile=None):
+    """
+    Value the UPS pension of officers who die after retirement (the vectorized form of
+    calculate_post_retirement_benefits and calculate_vrs_benefits).
+    All array arguments broadcast against each other, so a single call can value
+    every (retirement, death year) combination.
+
+    Args:
+        initial_pension (float or np.ndarray): Adjusted monthly pension at the base year
+        lump_sum (float or np.ndarray): Lump sum paid at retirement
+        retirement_year (int or np.ndarray): Year of retirement
+        retirement_month (int): Month of retirement (1-12)
+        pension_base_year (int or np.ndarray): Year the pension starts (normal retirement year for VRS)
+        death_years (np.ndarray): Years of death (not before the retirement year)
+        spouse_age_difference (int): Years spouse is expected to live after employee
+        policy (dict): UPS policy (default: the active policy); its values may be arrays that broadcast
+        profile (dict): Complete profile supplying the inflation_rate, pay_commission_interval and
+                        fitment_factor (default: the module-level assumptions, see current_assumptions)
+
+    Returns:
+        tuple of np.ndarray: (inflation_adjusted_corpus, nominal_corpus, monthly_pension, lump_sum)
+    """
+    policy = policy or ups_policy
+    profile = profile or current_assumptions()
+    inflation_rate = profile["inflation_rate"]
+
+    initial_pension = np.asarray(initial_pension, dtype=float)
+    years_since_base = death_years - pension_base_year
+    pension_lag = pension_base_year - retirement_year
+    spouse_end_year = retirement_year + spouse_age_difference
+    survives = death_years < spouse_end_year
+    spouse_years = np.where(survives, spouse_end_year - death_years, 0)
+
+    horizon = max(np.max(years_since_base, initial=0), np.max(spouse_years, initial=0))
+    multipliers = pension_multiplier_table(horizon, profile["pay_commission_interval"], profile["fitment_factor"])
+    yearly_factor = (1 + (inflation_rate / 12)) ** -12.0
+    first_year_factor = (1 + (inflation_rate / 12)) ** -(12 - retirement_month)
+
+    # Officer's pension from the base year to the death year, discounted from retirement
+    paid_offset = np.clip(years_since_base, 0, None)
+    discounted_multipliers = np.cumsum(multipliers * yearly_factor ** np.arange(len(multipliers)))
+    officer_value = 12 * initial_pension * (
+        yearly_factor ** pension_lag * discounted_multipliers[paid_offset]
+        + np.where(pension_lag == 0, (first_year_factor - 1) * multipliers[0], 0)
+    )
+    officer_nominal = 12 * initial_pension * np.cumsum(multipliers)[paid_offset]
+    has_pension = years_since_base >= 0
+    officer_value = np.where(has_pension, officer_value, 0)
+    officer_nominal = np.where(has_pension, officer_nominal, 0)
+
+    # Spouse's family pension (60% by default) with yearly DR, discounted from the officer's death
+    monthly_pension = initial_pension * multipliers[paid_offset]
+    family_pension = monthly_pension * policy["family_pension_share"]
+    spouse_offsets = np.arange(np.max(spouse_years, initial=0) + 1)
+    spouse_value = np.where(survives, 12 * family_pension * np.cumsum((1.02 * yearly_factor) ** spouse_offsets)[spouse_years], 0)
+    spouse_nominal = np.where(survives, 12 * family_pension * np.cumsum(1.02 ** spouse_offsets)[spouse_years], 0)
+
+    corpus = officer_value + spouse_value + lump_sum
+    nominal_corpus = officer_nominal + spouse_nominal + lump_sum
+    shape = np.broadcast(corpus, nominal_corpus).shape
+    return corpus, nominal_corpus, np.broadcast_to(monthly_pension, shape), np.broadcast_to(lump_sum, shape)
+
+def value_pre_retirement_deaths(columns, death_years, spouse_age_difference, inflation_rate, policy=None):
+    """
+    Value the UPS benefits of deaths in service for many death years at once
+    (the vectorized form of calculate_pre_retirement_benefits).
+
+    Args:
+        columns (dict): Ledger columns including "benchmark_corpus" and "individual_corpus"
+                        (the corpus columns may have leading axes, e.g. one row per policy)
+        death_years (np.ndarray): Years of death (death assumed in DEATH_MONTH)
+        spouse_age_difference (int): Years spouse is expected to live after employee
+        inflation_rate (float): Annual inflation rate
+        policy (dict): UPS policy (default: the active policy); its values may be arrays that broadcast
+
+    Returns:
+        tuple of np.ndarray: (inflation_adjusted_corpus, nominal_corpus, monthly_pension, lump_sum)
+    """
+    policy = policy or ups_policy
+    death_years = np.asarray(death_years, dtype=int)
+    death_month = DEATH_MONTH
+    salary = columns["monthly_salary"]
+    month_index = columns["year"] * 12 + columns["month"] - 1
+    death_index = death_years * 12 + death_month - 1
+
+    # Rolling mean of the (up to) 12 salaries before and including the death month
+    entries = np.searchsorted(month_index, death_index, side="right")
+    cumulative_salary = np.concatenate(([0.0], np.cumsum(salary)))
+    window_start = np.maximum(entries - 12, 0)
+    has_entries = entries > 0
+    avg_last_12_months_salary = np.where(
+        has_entries, (cumulative_salary[entries] - cumulative_salary[window_start]) / np.maximum(entries - window_start, 1), 0)
+
+    first_year, first_month = int(columns["year"][0]), int(columns["month"][0])
+    service_months = (death_years - first_year) * 12 + death_month - first_month
+    pension_percentage = np.minimum(service_months / policy["full_pension_service_months"], 1)
+
+    # Corpus values at the death month (or the first month after it)
+    death_position = np.searchsorted(month_index, death_index, side="left")
+    in_ledger = death_position < len(salary)
+    position = np.minimum(death_position, len(salary) - 1)
+    benchmark_corpus = np.where(in_ledger, columns["benchmark_corpus"][..., position], 0)
+    individual_corpus = np.where(in_ledger, columns["individual_corpus"][..., position], 0)
+    corpus_ratio = np.minimum(np.divide(individual_corpus, benchmark_corpus,
+                                        out=np.zeros(benchmark_corpus.shape), where=benchmark_corpus > 0), 1)
+
+    # Potential pension and family pension (60% by default), with the minimum for 10+ years of service
+    potential_pension = avg_last_12_months_salary * policy["assured_payout_share"] * corpus_ratio * pension_percentage
+    family_pension_monthly = potential_pension * policy["family_pension_share"]
+    minimum_family_pension = policy["minimum_payout"] * policy["family_pension_share"]
+    family_pension_monthly = np.where(
+        (service_months >= policy["minimum_payout_service_months"]) & (family_pension_monthly < minimum_family_pension),
+        minimum_family_pension, family_pension_monthly)
+
+    # Spouse's pension for spouse_age_difference years after the death, with 2% DR (calculate_spouse_pension_value)
+    spouse_years = np.arange(max(spouse_age_difference + 1, 0))
+    present_value_factor = 12 * np.sum(1.02 ** spouse_years * (1 + (inflation_rate / 12)) ** -(12.0 * spouse_years))
+    nominal_factor = 12 * np.sum(1.02 ** spouse_years)
+
+    # Death gratuity and excess corpus (for 5+ years of service)
+    excess_corpus = np.maximum(0, individual_corpus - benchmark_corpus)
+    lump_sum = np.where(service_months >= 60, gratuity_amount(avg_last_12_months_salary, service_months) + excess_corpus, 0)
+
+    corpus = family_pension_monthly * present_value_factor + lump_sum
+    nominal_corpus = family_pension_monthly * nominal_factor + lump_sum
+    results = (corpus, nominal_corpus, family_pension_monthly, lump_sum)
+    return tuple(np.where(has_entries, values, 0) for values in results)
+
+def gratuity_amount(avg_last_12_months_salary, service_months):
+    """
+    Retirement or death gratuity (for 5+ years of service).
+    """
+    return np.where(service_months >= 60, (1/10) * avg_last_12_months_salary * (service_months / 6), 0)
+
+def ups_payout_at_retirement(avg_last_12_months_salary, benchmark_corpus, individual_corpus,
+                             service_months, withdrawal_percentage, policy=None):
+    """
+    UPS pension and lump sum at retirement (the vectorized form of calculate_lumpsum_and_pension
+    plus gratuity). All array arguments broadcast against each other.
+
+    Args:
+        avg_last_12_months_salary (np.ndarray): Average salary of the last 12 months of service
+        benchmark_corpus (np.ndarray): Benchmark corpus at retirement
+        individual_corpus (np.ndarray): Individual corpus at retirement
+        service_months (np.ndarray): Months of service at retirement
+        withdrawal_percentage (float or np.ndarray): Lump sum withdrawal percentage (capped at 60%)
+        policy (dict): UPS policy (default: the active policy); its values may be arrays that broadcast
+
+    Returns:
+        tuple of np.ndarray: (adjusted monthly pension, lump sum)
+    """
+    policy = policy or ups_policy
+    corpus_ratio = np.minimum(np.divide(individual_corpus, benchmark_corpus,
+                                        out=np.zeros(np.broadcast(individual_corpus, benchmark_corpus).shape),
+                                        where=benchmark_corpus > 0), 1)
+    assured_payout = (avg_last_12_months_salary * policy["assured_payout_share"] * corpus_ratio
+                      * np.minimum(service_months / policy["full_pension_service_months"], 1))
+    actual_withdrawal_percentage = np.minimum(withdrawal_percentage, 0.6)
+    excess_corpus = np.maximum(0, individual_corpus - benchmark_corpus)
+    lumpsum_withdrawal = np.minimum(benchmark_corpus, individual_corpus) * actual_withdrawal_percentage
+    adjusted_pension = assured_payout * (1 - actual_withdrawal_percentage)
+    adjusted_pension = np.where(
+        (service_months >= policy["minimum_payout_service_months"]) & (adjusted_pension < policy["minimum_payout"]),
+        policy["minimum_payout"], adjusted_pension)
+    gratuity = gratuity_amount(avg_last_12_months_salary, service_months)
+    return adjusted_pension, gratuity + excess_corpus + lumpsum_withdrawal
+# ----------------------------------------------------------------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------------------------------------------------------
+def build_pay_scale_schedule(start_date, retirement_date, fitment_factor, pay_commission_years, pay_scales=None):
+    """
+    Calculate the revised pay scales of every pay commission between joining and retirement.
+
+    Args:
+        start_date (date): Date of joining the service
+        retirement_date (date): Date of retirement
+        fitment_factor (float): Increase factor during pay commission
+        pay_commission_years (list): Years in which a pay commission applies from April
+        pay_scales (list): Base pay scales (default: the selected BASE_PAY_SCALES)
+
+    Returns:
+        dict: Pay commission year -> pay scales in force from April of that year
+    """
+    pay_scales = BASE_PAY_SCALES if pay_scales is None else pay_scales
+    years = [year for year in sorted(pay_commission_years) if start_date <= date(year, APRIL, 1) <= retirement_date]
+    basic_pay_table = get_kernel("pay_commission")(
+        np.array([scale["basic_pay"] for scale in pay_scales], dtype=float),
+        np.array([scale["years_in_scale"] for scale in pay_scales], dtype=float),
+        float(fitment_factor),
+        len(years)
+    )
+    schedule = {}
+    for era, year in enumerate(years, start=1):
+        schedule[year] = [dict(scale, basic_pay=float(basic_pay)) for scale, basic_pay in zip(pay_scales, basic_pay_table[era])]
+    return schedule
+
+def generate_salary_ledgers(officers, pay_scale_schedule, pay_scales=None):
+    """
+    Generate the monthly salary ledgers of a batch of officers in one shot.
+
+    Every officer-month is computed at once: the pay level comes from a binary search
+    of the seniority months in the compiled pay matrix, the pay scales in force from the
+    number of pay commissions since joining, and the July increments from month arithmetic.
+
+    Args:
+        officers (list): (joining_date, seniority_start_date, retirement_date) of each officer
+        pay_scale_schedule (dict): Schedule from build_pay_scale_schedule covering every officer's service
+        pay_scales (list): Base pay scales the schedule was built from (default: the selected BASE_PAY_SCALES)
+
+    Returns:
+        list: Ledger columns (see LEDGER_FIELDS) of each officer, as views into shared arrays
+    """
+    if pay_scales is None:
+        pay_scales, lookup = BASE_PAY_SCALES, PAY_SCALE_LOOKUP
+    else:
+        lookup = compile_pay_matrix(pay_scales)
+
+    def month_index(d):
+        return d.year * 12 + d.month - 1
+
+    joining_index = np.array([month_index(joining_date) for joining_date, _, _ in officers], dtype=int)
+    seniority_index = np.array([month_index(seniority_date) for _, seniority_date, _ in officers], dtype=int)
+    retirement_index = np.array([month_index(retirement_date) for _, _, retirement_date in officers], dtype=int)
+    lengths = np.maximum(retirement_index - joining_index + 1, 0)  # Include the retirement month
+    owner = np.repeat(np.arange(len(officers)), lengths)
+    ends = np.cumsum(lengths)
+    months = joining_index[owner] + np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - lengths, lengths)
+
+    # Pay scale level and months in the scale from the seniority-based service months
+    seniority_months = months - seniority_index[owner]
+    position = np.minimum(np.searchsorted(lookup["boundaries"], seniority_months, side="right"), len(pay_scales) - 1)
+    months_in_scale = seniority_months - lookup["starts"][position]
+
+    # July increments and pay commissions (from April) since joining
+    increments = (months - JULY + 1) // 12 - (joining_index[owner] - JULY) // 12
+    pay_commission_years = sorted(pay_scale_schedule)
+    pay_commission_index = np.array([year * 12 + APRIL - 1 for year in pay_commission_years], dtype=int)
+    era = (np.searchsorted(pay_commission_index, months, side="right")
+           - np.searchsorted(pay_commission_index, joining_index[owner], side="left"))
+    era_basic_pay = np.array([[scale["basic_pay"] for scale in pay_scales]] + [
+        [scale["basic_pay"] for scale in pay_scale_schedule[year]] for year in pay_commission_years
+    ], dtype=float)
+
+    increment_rate = 0.03  # Fixed 3% annual increment
+    basic_pay = era_basic_pay[era, position] * (1 + increment_rate) ** increments
+    columns = {
+        "year": months // 12,
+        "month": months % 12 + 1,
+        "monthly_salary": basic_pay + (0.53 * basic_pay),  # Add Dearness Allowance (DA)
+        "basic_pay": basic_pay,
+        "pay_level": np.array([scale["level"] for scale in pay_scales])[position],
+        "months_in_scale": months_in_scale,
+        "increments": increments,
+    }
+    return [{field: values[end - length:end] for field, values in columns.items()}
+            for end, length in zip(ends.tolist(), lengths.tolist())]
+
+def generate_salary_progression(year_of_joining, month_of_joining, seniority_year, seniority_month,
+                                retirement_date, fitment_factor, pay_commission_years, pay_scale_schedule=None):
+    """
+    Generate the monthly salary progression from joining until retirement.
+    Fills overall_table month by month and leaves PAY_SCALES at the scales in force at retirement.
+
+    Args:
+        year_of_joining (int): Year of joining the service
+        month_of_joining (int): Month of joining (1-12)
+        seniority_year (int): Seniority year used for pay scale determination
+        seniority_month (int): Seniority month (1-12)
+        retirement_date (date): Date of retirement (included in the progression)
+        fitment_factor (float): Increase factor during pay commission
+        pay_commission_years (list): Years in which a pay commission applies from April
+        pay_scale_schedule (dict): Precomputed schedule from build_pay_scale_schedule, if available
+
+    Returns:
+        list: The generated overall_table
+    """
+    global overall_table
+    joining_date = date(year_of_joining, month_of_joining, 1)
+    if pay_scale_schedule is None:
+        pay_scale_schedule = build_pay_scale_schedule(joining_date, retirement_date, fitment_factor, pay_commission_years)
+
+    columns = generate_salary_ledgers(
+        [(joining_date, date(seniority_year, seniority_month, 1), retirement_date)], pay_scale_schedule)[0]
+    overall_table = ledger_table(columns)
+    for entry in overall_table:
+        entry["nps_corpus"] = 0  # Initialize, will be updated by calculate_nps_corpus
+        entry["individual_corpus"] = 0  # Initialize, will be updated by calculate_nps_corpus
+        entry["benchmark_corpus"] = 0  # Initialize, will be updated by calculate_nps_corpus
+
+    PAY_SCALES[:] = copy.deepcopy(pay_scale_schedule[max(pay_scale_schedule)] if pay_scale_schedule else BASE_PAY_SCALES)
+    return overall_table
+
+# Fields of the salary ledger generated by generate_salary_progression
+LEDGER_FIELDS = ("year", "month", "monthly_salary", "basic_pay", "pay_level", "months_in_scale", "increments")
+
+def ledger_columns(table, fields):
+    """
+    Convert a salary/corpus ledger (such as overall_table) into a dict of NumPy columns.
+    """
+    return {field: np.array([entry[field] for entry in table]) for field in fields}
+
+def ledger_table(columns):
+    """
+    Convert ledger columns back into a list of entries (the layout of overall_table).
+    """
+    fields = list(columns)
+    return [dict(zip(fields, values)) for values in zip(*(columns[field].tolist() for field in fields))]
+
+def accumulate_corpus(contributions, growth, initial=0.0):
+    """
+    Vectorized form of the corpus recurrence corpus = (corpus + contribution) * growth.
+    The last axis is months; leading axes (e.g. simulated paths) are independent.
+
+    Args:
+        contributions (np.ndarray): Contribution of each month
+        growth (np.ndarray or float): Growth factor (1 + monthly return) of each month
+        initial (float or np.ndarray): Corpus before the first month (one value per path)
+
+    Returns:
+        np.ndarray: Corpus at the end of each month
+    """
+    contributions = np.asarray(contributions, dtype=float)
+    growth = np.broadcast_to(np.asarray(growth, dtype=float), contributions.shape)
+    if backend != "numpy":
+        paths = contributions.reshape(-1, contributions.shape[-1] if contributions.ndim else 1)
+        initial = np.broadcast_to(np.asarray(initial, dtype=float), contributions.shape[:-1]).reshape(-1)
+        corpus = get_kernel("accumulate_corpus")(
+            np.ascontiguousarray(paths), np.ascontiguousarray(growth.reshape(paths.shape)), np.ascontiguousarray(initial))
+        return corpus.reshape(contributions.shape)
+    cumulative_growth = np.cumprod(growth, axis=-1)
+    initial = np.asarray(initial, dtype=float)[..., None] if np.ndim(initial) else initial
+    return cumulative_growth * (initial + np.cumsum(contributions * growth / cumulative_growth, axis=-1))
+
+def life_cycle_allocation(months, life_cycle_fund):
+    """
+    Equity allocation of a life cycle fund in each month of service
+    (the vectorized form of the allocation in initialize_nps_corpus).
+
+    Args:
+        months (int): Number of months of service
+        life_cycle_fund (str): "LC75", "LC50" or "LC25"
+
+    Returns:
+        np.ndarray: Equity allocation by months since joining
+    """
+    age = np.arange(months) / 12
+    start, slope, floor = {
+        "LC75": (0.75, 0.03, 0.15),
+        "LC25": (0.25, 0.01, 0.05),
+    }.get(life_cycle_fund, (0.50, 0.02, 0.10))
+    return np.where(age <= 35, start, np.maximum(start - slope * (age - 35), floor))
+
+def nps_monthly_growth(months, profile):
+    """
+    Monthly NPS growth factor (1 + weighted monthly return) by months since joining,
+    from the life cycle fund allocation and the assumed scheme E/C/G returns.
+    """
+    equity_allocation = life_cycle_allocation(months, profile["life_cycle_fund"])
+    remaining_allocation = 1.0 - equity_allocation
+    weighted_monthly_return = (
+        equity_allocation * (profile["equity_return"] / 12) +
+        remaining_allocation * 0.6 * (profile["corporate_bond_return"] / 12) +
+        remaining_allocation * 0.4 * (profile["gsec_return"] / 12)
+    )
+    return 1 + weighted_monthly_return
+
+def accumulate_ledger_corpora(columns, profile, policy=None, start=0):
+    """
+    Add the NPS, benchmark and individual corpus columns to ledger columns
+    (the vectorized form of initialize_nps_corpus and calculate_corpus_values).
+
+    Args:
+        columns (dict): Ledger columns starting at the officer's joining month
+        profile (dict): Complete profile (see resolve_profile)
+        policy (dict): Complete UPS policy (default: the active policy)
+        start (int): First month to recompute. The corpora of the earlier months are kept
+                     from the corpus columns already in `columns` (see CareerLedger)
+
+    Returns:
+        dict: The ledger columns plus "nps_corpus", "benchmark_corpus" and "individual_corpus"
+    """
+    policy = policy or ups_policy
+    switch_date = policy["switch_date"]
+    salary = columns["monthly_salary"][start:]
+    years = columns["year"][start:]
+    initial = {name: columns[name][start - 1] if start else 0.0
+               for name in ("nps_corpus", "benchmark_corpus", "individual_corpus")}
+
+    # NPS corpus with the life cycle fund allocation by months since joining
+    govt_rate = np.where(years >= 2019, 0.14, 0.12)
+    nps_corpus = accumulate_corpus(salary * (0.1 + govt_rate),
+                                   nps_monthly_growth(len(columns["monthly_salary"]), profile)[start:],
+                                   initial["nps_corpus"])
+
+    # Benchmark corpus grows at the NAV rate; the individual corpus follows NPS until the switch
+    nav_growth = 1 + profile["pension_fund_nav_rate"] / 12
+    benchmark_corpus = accumulate_corpus(salary * policy["benchmark_contribution_rate"], nav_growth,
+                                         initial["benchmark_corpus"])
+    switch_position = np.searchsorted(years * 12 + columns["month"][start:] - 1,
+                                      switch_date.year * 12 + switch_date.month - 1, side="right")
+    if backend == "numpy" or start:
+        individual_corpus = nps_corpus.copy()
+        initial_individual = nps_corpus[switch_position - 1] if switch_position > 0 else initial["individual_corpus"]
+        individual_corpus[switch_position:] = accumulate_corpus(
+            salary[switch_position:] * policy["individual_contribution_rate"], nav_growth, initial_individual)
+    else:
+        benchmark_corpus, individual_corpus = get_kernel("corpus_split")(
+            np.ascontiguousarray(salary, dtype=float), nps_corpus, int(switch_position), nav_growth,
+            float(policy["benchmark_contribution_rate"]), float(policy["individual_contribution_rate"]))
+    corpora = {"nps_corpus": nps_corpus, "benchmark_corpus": benchmark_corpus, "individual_corpus": individual_corpus}
+    if start:
+        corpora = {name: np.concatenate((columns[name][:start], values)) for name, values in corpora.items()}
+    return {**columns, **corpora}
+
 def generate_mortality_comparison_table(
     retirement_age,
     fitment_factor,
     pay_commission_interval,
     annuity_rate,
-    spouse_age_difference
+    spouse_age_difference,
+    joint_life=True,
+    corpus_values=None
 ):
     """
     Generate a comparison table for different death ages.
     Handles pre-retirement deaths, lumpsum withdrawal, and VRS scenarios.
     Spousal pension is now included in the corpus calculation.
+    NPS values include the annuity received, the optional joint-life continuation
+    and the return of purchase price, valued for all death ages in one pass.
+    UPS values at retirement are calculated once (or taken from corpus_values), and
+    deaths in service are valued for all death years at once.
     """
-    global birth_year, birth_month, overall_table
+    global birth_year, birth_month, overall_table, inflation_rate
 
     retirement_year = birth_year + retirement_age
     retirement_date = date(retirement_year, birth_month, 1)
@@ -767,19 +1548,41 @@ def generate_mortality_comparison_table(
     death_year_start = join_date.year + 10
     death_year_end = birth_year + 100
 
-    for death_year in range(death_year_start, death_year_end, 1):
-        # Calculate NPS values (they will be adjusted based on death age)
-        monthly_pension_nps, lump_sum_nps, nps_corpus, nominal_nps_corpus = calculate_nps_pension_with_rop( 
-            death_year,
-            retirement_date, 
-            annuity_rate
-        )
+    death_years = np.arange(death_year_start, death_year_end)
+    
+    # Value the NPS annuity stream for all death years at once
+    nps_values = value_nps_annuity_streams(
+        death_years,
+        retirement_date,
+        annuity_rate,
+        spouse_age_difference,
+        joint_life
+    )
+
+    # UPS values at retirement do not depend on the death year
+    ups_values = initialize_ups_values(retirement_date, corpus_values=corpus_values)
+
+    # Deaths in service (death assumed in DEATH_MONTH), valued for all death years at once
+    in_service_years = death_years[death_years < retirement_year]
+    columns = ledger_columns(overall_table, ("year", "month", "monthly_salary"))
+    columns["benchmark_corpus"] = np.array([entry.get("benchmark_corpus", 0) for entry in overall_table], dtype=float)
+    columns["individual_corpus"] = np.array(
+        [entry.get("individual_corpus", entry.get("nps_corpus", 0)) for entry in overall_table], dtype=float)
+    in_service_values = value_pre_retirement_deaths(columns, in_service_years, spouse_age_difference, inflation_rate)
+
+    for i, death_year in enumerate(death_years.tolist()):
+        monthly_pension_nps, lump_sum_nps, nps_corpus, nominal_nps_corpus = (float(values[i]) for values in nps_values)
         # Calculate UPS corpus and pension for this death year (including spousal pension)
-        ups_corpus, nominal_ups_corpus, monthly_pension_ups, lump_sum_ups = calculate_ups_corpus_and_pension(
-            death_year,
-            retirement_date,
-            spouse_age_difference
-        )
+        if i < len(in_service_years):
+            ups_corpus, nominal_ups_corpus, monthly_pension_ups, lump_sum_ups = (
+                float(values[i]) for values in in_service_values)
+        else:
+            ups_corpus, nominal_ups_corpus, monthly_pension_ups, lump_sum_ups = calculate_ups_corpus_and_pension(
+                death_year,
+                retirement_date,
+                spouse_age_difference,
+                ups_values
+            )
         death_age = round(death_year - birth_year + (birth_month - 1) / 12)  # Round off death age
         table_data.append([
             death_age,
@@ -794,88 +1597,3505 @@ def generate_mortality_comparison_table(
         ])
     return table_data
 
-def generate_csv_file(headers, table_data, output_file):
+def generate_retirement_death_grid(profile=None, retirement_ages=None):
+    """
+    Compare UPS and NPS for every (retirement age, death age) combination in one pass.
+
+    The salary ledger, NPS corpus and UPS corpora are generated once up to
+    superannuation; every earlier retirement (VRS) is a prefix of that ledger
+    (see value_ledger_grid).
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        retirement_ages (iterable): Retirement ages to compare (default: 50 to the superannuation age)
+
+    Returns:
+        dict: See value_ledger_grid
+    """
+    profile = resolve_profile(profile)
+    superannuation_age = profile["normal_retirement_age"]
+    if retirement_ages is None:
+        retirement_ages = range(50, superannuation_age + 1)
+
+    # Ledger, NPS corpus and UPS corpora up to superannuation, generated once
+    pipeline = ComparisonPipeline({**profile, "retirement_age": superannuation_age})
+    ledger, _ = pipeline.run(until="ups_corpus")
+    columns = ledger_columns(ledger, LEDGER_FIELDS + ("nps_corpus", "benchmark_corpus", "individual_corpus"))
+    return value_ledger_grid(columns, profile, retirement_ages)
+
+def value_ledger_grid(columns, profile, retirement_ages):
+    """
+    Value UPS and NPS for every (retirement age, death age) combination of one ledger.
+
+    The ledger must run at least until the latest retirement; every earlier retirement
+    is a prefix of it, so the values at retirement are plain lookups and all
+    post-retirement deaths are valued in one broadcast over the grid. Deaths before
+    retirement do not depend on the retirement age and are valued once per death year.
+
+    Args:
+        columns (dict): Ledger columns (see ledger_columns) including "nps_corpus",
+                        "benchmark_corpus" and "individual_corpus"
+        profile (dict): Complete profile (see resolve_profile)
+        retirement_ages (iterable): Retirement ages to compare
+
+    Returns:
+        dict: "retirement_ages", "death_years" and "death_ages" axes plus (retirement age x death age) matrices
+              "ups_value", "nps_value", "ups_nominal", "nps_nominal", "ups_monthly_pension",
+              "nps_monthly_pension", "ups_lump_sum" and "nps_lump_sum", and per retirement age the
+              "ups_initial_pension" (at the pension base year) and "nps_initial_pension"
+    """
+    superannuation_age = profile["normal_retirement_age"]
+    retirement_ages = np.asarray(list(retirement_ages), dtype=int)
+    if retirement_ages.max(initial=0) > superannuation_age:
+        raise ValueError(f"Retirement ages cannot exceed the superannuation age of {superannuation_age}")
+
+    salary = columns["monthly_salary"]
+    benchmark = columns["benchmark_corpus"]
+    individual = columns["individual_corpus"]
+    nps_corpus = columns["nps_corpus"]
+
+    birth_year_, birth_month_ = profile["birth_year"], profile["birth_month"]
+    first_date = date(int(columns["year"][0]), int(columns["month"][0]), 1)
+    retirement_years = birth_year_ + retirement_ages
+    service_months = (retirement_years - first_date.year) * 12 + birth_month_ - first_date.month
+    if service_months.min(initial=0) < 0 or service_months.max(initial=0) >= len(salary):
+        raise ValueError("Retirement ages must fall within the ledger")
+
+    # UPS values at each retirement (the prefix of the ledger ending at retirement)
+    cumulative_salary = np.concatenate(([0.0], np.cumsum(salary)))
+    window_start = np.maximum(service_months + 1 - 12, 0)
+    avg_last_12_months_salary = (cumulative_salary[service_months + 1] - cumulative_salary[window_start]) / (
+        service_months + 1 - window_start)
+    adjusted_pension, ups_lump_sum = ups_payout_at_retirement(
+        avg_last_12_months_salary, benchmark[service_months], individual[service_months],
+        service_months, profile["withdrawal_percentage"])
+
+    death_years = np.arange(first_date.year + 10, birth_year_ + 100)
+    grid_shape = (len(retirement_ages), len(death_years))
+    retirement_column = retirement_years[:, None]
+    row = death_years[None, :]
+
+    # Post-retirement deaths for the whole grid
+    ups_value, ups_nominal, ups_monthly_pension, ups_lump = value_ups_pension(
+        adjusted_pension[:, None],
+        ups_lump_sum[:, None],
+        retirement_column,
+        birth_month_,
+        birth_year_ + superannuation_age,
+        row,
+        profile["spouse_age_difference"],
+        profile=profile
+    )
+    nps_monthly_pension, nps_lump, nps_value, nps_nominal = value_nps_annuity(
+        nps_corpus[service_months][:, None],
+        retirement_column,
+        birth_month_,
+        row,
+        profile["annuity_rate"],
+        profile["spouse_age_difference"],
+        profile["joint_life"],
+        profile=profile
+    )
+    results = {
+        "ups_value": ups_value, "nps_value": nps_value,
+        "ups_nominal": ups_nominal, "nps_nominal": nps_nominal,
+        "ups_monthly_pension": ups_monthly_pension, "nps_monthly_pension": nps_monthly_pension,
+        "ups_lump_sum": ups_lump, "nps_lump_sum": nps_lump,
+    }
+    results = {name: np.array(np.broadcast_to(values, grid_shape)) for name, values in results.items()}
+
+    # Deaths before retirement, valued once per death year
+    is_pre_retirement = row < retirement_column
+    pre_retirement_columns = np.nonzero(death_years < retirement_years.max(initial=0))[0]
+    if len(pre_retirement_columns):
+        pre_retirement_years = death_years[pre_retirement_columns]
+        month_index = columns["year"] * 12 + columns["month"] - 1
+        death_positions = np.searchsorted(month_index, pre_retirement_years * 12 + DEATH_MONTH - 1, side="right") - 1
+        nps_at_death = np.where(death_positions >= 0, nps_corpus[np.maximum(death_positions, 0)], 0)
+        ups_value, ups_nominal, ups_monthly_pension, ups_lump = value_pre_retirement_deaths(
+            columns, pre_retirement_years, profile["spouse_age_difference"], profile["inflation_rate"])
+        pre_retirement_values = {
+            "ups_value": ups_value, "ups_nominal": ups_nominal,
+            "ups_monthly_pension": ups_monthly_pension, "ups_lump_sum": ups_lump,
+            "nps_value": nps_at_death, "nps_nominal": nps_at_death,
+            "nps_monthly_pension": np.zeros(len(pre_retirement_columns)), "nps_lump_sum": nps_at_death,
+        }
+        mask = is_pre_retirement[:, pre_retirement_columns]
+        for name, values in pre_retirement_values.items():
+            grid = results[name]
+            grid[:, pre_retirement_columns] = np.where(mask, values[None, :], grid[:, pre_retirement_columns])
+
+    results["retirement_ages"] = retirement_ages
+    results["death_years"] = death_years
+    results["ups_initial_pension"] = adjusted_pension
+    results["nps_initial_pension"] = nps_corpus[service_months] * (1 - profile["withdrawal_percentage"]) * profile["annuity_rate"] / 12
+    results["death_ages"] = np.round(death_years - birth_year_ + (birth_month_ - 1) / 12).astype(int)
+    return results
+
+# Grid fields of the mortality table columns after the death age (see MORTALITY_TABLE_HEADERS)
+MORTALITY_TABLE_FIELDS = ("ups_monthly_pension", "nps_monthly_pension", "ups_lump_sum", "nps_lump_sum",
+                          "ups_value", "nps_value", "ups_nominal", "nps_nominal")
+
+def grid_to_mortality_table(grid, retirement_index=0):
+    """
+    Convert one retirement age of a value_ledger_grid result into mortality table rows
+    (the layout of generate_mortality_comparison_table).
+    """
+    values = np.column_stack([grid[field][retirement_index] for field in MORTALITY_TABLE_FIELDS])
+    return [[int(death_age)] + row for death_age, row in zip(grid["death_ages"], values.tolist())]
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Month-resolution death timing
+# ------------------------------------------------------------------------------------------------------------------------------
+def value_death_months(columns, profile, death_months=None, policy=None):
+    """
+    Value UPS and NPS for a death in every month (the month-resolution form of value_ledger_grid
+    for the profile's retirement age).
+
+    Pensions, family pensions and annuities are paid monthly, starting the month after retirement
+    (or death), and discounted monthly at the inflation rate. Deaths after retirement are
+    discounted from retirement and deaths in service from the death, as in the yearly tables.
+    Every stream is a difference of cumulative sums over the payment months, so all death months
+    are valued in one pass.
+
+    Args:
+        columns (dict): Ledger columns from joining to retirement, including the corpus columns
+        profile (dict): Complete profile (see resolve_profile)
+        death_months (array-like): Month indices (year * 12 + month - 1) of death (default: every month
+                                   from January ten years after joining until the age of 100)
+        policy (dict): Complete UPS policy (default: the active policy)
+
+    Returns:
+        dict: "death_months" and "death_ages" (years, with months as fractions) axes plus one array
+              per MORTALITY_TABLE_FIELDS entry
+    """
+    policy = policy or ups_policy
+    salary = columns["monthly_salary"]
+    first_month = int(columns["year"][0]) * 12 + int(columns["month"][0]) - 1
+    birth_index = profile["birth_year"] * 12 + profile["birth_month"] - 1
+    retirement = birth_index + 12 * profile["retirement_age"]
+    pension_base = birth_index + 12 * profile["normal_retirement_age"]
+    if not 0 <= retirement - first_month < len(salary):
+        raise ValueError("The ledger must run until the retirement month")
+    if death_months is None:
+        death_months = np.arange((int(columns["year"][0]) + 10) * 12, (profile["birth_year"] + 100) * 12)
+    death_months = np.asarray(death_months, dtype=int)
+    spouse_months = 12 * profile["spouse_age_difference"]
+
+    # Payment months from joining to the last month any stream can be paid
+    months = np.arange(first_month, max(death_months.max(initial=retirement), retirement) + max(spouse_months, 0) + 1)
+    years = months // 12
+    retirement_discount = (1 + profile["inflation_rate"] / 12) ** -(months - retirement).astype(float)
+    multipliers = pension_multiplier_table(years[-1] - pension_base // 12, profile["pay_commission_interval"],
+                                           profile["fitment_factor"])[np.maximum(years - pension_base // 12, 0)]
+    dearness_relief = 1.02 ** (years - years[0])  # Yearly DR of the family pension, as a ratio between months
+
+    def position(month):
+        return np.clip(month - first_month, 0, len(months) - 1)
+
+    def window_sum(cumulative, start, end):
+        # Sum of a stream over the months start+1..end (zero where end <= start)
+        return np.where(end > start, cumulative[position(end)] - cumulative[position(start)], 0)
+
+    # UPS and NPS payouts at retirement
+    r = retirement - first_month
+    avg_last_12_months_salary = salary[max(r - 11, 0):r + 1].mean()
+    initial_pension, ups_lump_sum = ups_payout_at_retirement(
+        avg_last_12_months_salary, columns["benchmark_corpus"][r], columns["individual_corpus"][r], r,
+        profile["withdrawal_percentage"], policy)
+    nps_corpus = columns["nps_corpus"][r]
+    annuity_corpus = nps_corpus * (1 - profile["withdrawal_percentage"])
+    annuity = annuity_corpus * profile["annuity_rate"] / 12
+
+    # Cumulative streams over the payment months
+    pension_paid = months > max(retirement, pension_base)  # The pension starts after retirement (VRS: after superannuation)
+    officer_value = np.cumsum(np.where(pension_paid, multipliers * retirement_discount, 0))
+    officer_nominal = np.cumsum(np.where(pension_paid, multipliers, 0))
+    family_value = np.cumsum(dearness_relief * retirement_discount)
+    family_nominal = np.cumsum(dearness_relief)
+    annuity_value = np.cumsum(retirement_discount)
+
+    # Deaths after retirement: officer's pension until death, then the family pension or joint annuity
+    d = position(death_months)
+    spouse_end = retirement + spouse_months
+    pension_at_death = initial_pension * multipliers[d]
+    family_pension = pension_at_death * policy["family_pension_share"] / dearness_relief[d]
+    ups_value = (initial_pension * officer_value[d] + family_pension * window_sum(family_value, death_months, spouse_end)
+                 + ups_lump_sum)
+    ups_nominal = (initial_pension * officer_nominal[d] + family_pension * window_sum(family_nominal, death_months, spouse_end)
+                   + ups_lump_sum)
+    spouse_annuity_end = np.where(profile["joint_life"], spouse_end, death_months)
+    final_month = np.maximum(death_months, spouse_annuity_end)
+    nps_value = (nps_corpus - annuity_corpus + annuity * window_sum(annuity_value, retirement, final_month)
+                 + annuity_corpus * retirement_discount[position(final_month)])
+    nps_nominal = nps_corpus + annuity * np.maximum(final_month - retirement, 0)
+
+    # Deaths in service: family pension from the month after death and death gratuity
+    entries = np.clip(death_months - first_month + 1, 0, len(salary))
+    cumulative_salary = np.concatenate(([0.0], np.cumsum(salary)))
+    window_start = np.maximum(entries - 12, 0)
+    avg_salary_at_death = (cumulative_salary[entries] - cumulative_salary[window_start]) / np.maximum(entries - window_start, 1)
+    service_months = death_months - first_month
+    at_death = np.maximum(entries - 1, 0)
+    benchmark_corpus = columns["benchmark_corpus"][at_death]
+    individual_corpus = columns["individual_corpus"][at_death]
+    corpus_ratio = np.minimum(np.divide(individual_corpus, benchmark_corpus,
+                                        out=np.zeros(len(death_months)), where=benchmark_corpus > 0), 1)
+    in_service_pension = (avg_salary_at_death * policy["assured_payout_share"] * corpus_ratio
+                          * np.minimum(service_months / policy["full_pension_service_months"], 1) * policy["family_pension_share"])
+    minimum_family_pension = policy["minimum_payout"] * policy["family_pension_share"]
+    in_service_pension = np.where(
+        (service_months >= policy["minimum_payout_service_months"]) & (in_service_pension < minimum_family_pension),
+        minimum_family_pension, in_service_pension)
+    in_service_lump_sum = np.where(
+        service_months >= 60,
+        gratuity_amount(avg_salary_at_death, service_months) + np.maximum(0, individual_corpus - benchmark_corpus), 0)
+    spouse_stream = in_service_pension / dearness_relief[d]
+    in_service_value = (spouse_stream / retirement_discount[d] * window_sum(family_value, death_months, death_months + spouse_months)
+                        + in_service_lump_sum)
+    in_service_nominal = spouse_stream * window_sum(family_nominal, death_months, death_months + spouse_months) + in_service_lump_sum
+    nps_at_death = columns["nps_corpus"][at_death]
+
+    in_service = death_months < retirement
+    has_entries = entries > 0
+    zeros = np.zeros(len(death_months))
+    results = {
+        "ups_monthly_pension": np.where(in_service, in_service_pension, pension_at_death),
+        "nps_monthly_pension": np.where(in_service, 0, annuity + zeros),
+        "ups_lump_sum": np.where(in_service, in_service_lump_sum, ups_lump_sum),
+        "nps_lump_sum": np.where(in_service, nps_at_death, nps_corpus - annuity_corpus),
+        "ups_value": np.where(in_service, in_service_value, ups_value),
+        "nps_value": np.where(in_service, nps_at_death, nps_value),
+        "ups_nominal": np.where(in_service, in_service_nominal, ups_nominal),
+        "nps_nominal": np.where(in_service, nps_at_death, nps_nominal),
+    }
+    results = {name: np.where(has_entries, values, 0) for name, values in results.items()}
+    results["death_months"] = death_months
+    results["death_ages"] = (death_months - birth_index) / 12
+    return results
+
+def generate_monthly_mortality_table(profile=None):
+    """
+    Mortality comparison table with a row for every month of death (about 12x the rows of
+    generate_mortality_comparison_table), valued in one pass by value_death_months.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+
+    Returns:
+        list: Rows in the layout of MORTALITY_TABLE_HEADERS; the death age is in years with
+              the months as fractions (rounded to two decimals)
+    """
+    return run_cohort([profile or {}], monthly=True)[0]
+
+def death_months_to_mortality_table(values):
+    """
+    Convert a value_death_months result into mortality table rows.
+    """
+    return np.column_stack([np.round(values["death_ages"], 2)] + [values[field] for field in MORTALITY_TABLE_FIELDS]).tolist()
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Income tax
+# ------------------------------------------------------------------------------------------------------------------------------
+# Year-indexed slab tables of each tax regime are read from a data file. A financial year uses the
+# latest table that starts on or before it; years after the last table index its limits (see tax_parameters).
+TAX_TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tax_slabs.json")
+INCOME_KINDS = ("salary", "pension", "family_pension", "annuity")
+
+def load_tax_tables(path=TAX_TABLES_FILE):
+    """
+    Load the income tax tables of all regimes from a JSON data file.
+    Slab and surcharge lists are padded to a common width so that the parameters
+    of many financial years can be gathered in one indexing step.
+
+    Args:
+        path (str): Path of the JSON file
+
+    Returns:
+        dict: Regime name -> dict of arrays with one row per tabulated financial year
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    def padded(pairs, width):
+        # Marginal rate increments; padding brackets start at infinity and add nothing
+        limits = [float(limit) for limit, _ in pairs] + [np.inf] * (width - len(pairs))
+        rates = [float(rate) for _, rate in pairs]
+        increments = np.diff(rates, prepend=0.0).tolist() + [0.0] * (width - len(pairs))
+        return limits, increments
+
+    tax_tables = {}
+    for regime, definition in data.items():
+        years = sorted(definition["years"], key=lambda year: year["financial_year"])
+        if not years or any(not year["slabs"] or year["slabs"][0][0] != 0 for year in years):
+            raise ValueError(f"Invalid tax table for regime {regime}")
+        slab_width = max(len(year["slabs"]) for year in years)
+        surcharge_width = max(max(len(year.get("surcharge", [])) for year in years), 1)
+        slabs = [padded(year["slabs"], slab_width) for year in years]
+        surcharges = [padded(year.get("surcharge", []), surcharge_width) for year in years]
+        tax_tables[regime] = {
+            "financial_years": np.array([year["financial_year"] for year in years]),
+            "slab_limits": np.array([limits for limits, _ in slabs]),
+            "slab_rates": np.array([rates for _, rates in slabs]),
+            "surcharge_limits": np.array([limits for limits, _ in surcharges]),
+            "surcharge_rates": np.array([rates for _, rates in surcharges]),
+            "standard_deduction": np.array([year["standard_deduction"] for year in years], dtype=float),
+            "family_pension_share": np.array([year["family_pension_deduction"]["share"] for year in years]),
+            "family_pension_cap": np.array([year["family_pension_deduction"]["cap"] for year in years], dtype=float),
+            "rebate_limit": np.array([year["rebate"]["income_limit"] for year in years], dtype=float),
+            "rebate_max": np.array([year["rebate"]["max_rebate"] for year in years], dtype=float),
+            "cess": np.array([year["cess"] for year in years]),
+            "deduction_80c": np.array([year["deductions"]["80C"] for year in years], dtype=float),
+            "deduction_80ccd_1b": np.array([year["deductions"]["80CCD(1B)"] for year in years], dtype=float),
+            "employer_contribution_share": np.array([year["deductions"]["80CCD(2)_share"] for year in years]),
+        }
+    return tax_tables
+
+TAX_TABLES = load_tax_tables()
+
+# Amounts that are scaled by the indexation of years after the last table
+INDEXED_TAX_FIELDS = ("slab_limits", "surcharge_limits", "standard_deduction", "family_pension_cap",
+                      "rebate_limit", "rebate_max", "deduction_80c", "deduction_80ccd_1b")
+
+def tax_parameters(tax_table, financial_years, indexation=0.0):
+    """
+    Gather the tax parameters of every financial year in an array at once.
+
+    Years before the first table use the first table. Years after the last table use
+    the last table with its amounts grown by (1 + indexation) per year, so that the
+    slabs keep pace with nominal incomes (0 freezes them).
+
+    Args:
+        tax_table (dict): One regime of load_tax_tables
+        financial_years (np.ndarray): Financial years (the calendar year in which each starts)
+        indexation (float): Yearly growth of the amounts after the last table
+
+    Returns:
+        dict: Parameter name -> array shaped like financial_years (with a trailing bracket axis for limits and rates)
+    """
+    financial_years = np.asarray(financial_years)
+    tabulated = tax_table["financial_years"]
+    rows = np.clip(np.searchsorted(tabulated, financial_years, side="right") - 1, 0, len(tabulated) - 1)
+    growth = (1 + indexation) ** np.maximum(financial_years - tabulated[-1], 0)
+    parameters = {}
+    for name, values in tax_table.items():
+        if name == "financial_years":
+            continue
+        values = values[rows]
+        if name in INDEXED_TAX_FIELDS:
+            values = values * (growth[..., None] if values.ndim > growth.ndim else growth)
+        parameters[name] = values
+    return parameters
+
+def income_tax(taxable_income, parameters):
+    """
+    Income tax on taxable incomes: slab tax, the Section 87A rebate, surcharge and cess.
+    Marginal relief on the rebate and surcharge thresholds is not modelled.
+
+    Args:
+        taxable_income (np.ndarray): Taxable income of each financial year
+        parameters (dict): Tax parameters of the same years (see tax_parameters)
+
+    Returns:
+        np.ndarray: Tax payable
+    """
+    taxable_income = np.maximum(np.asarray(taxable_income, dtype=float), 0)[..., None]
+    slab_tax = np.sum(parameters["slab_rates"] * np.maximum(taxable_income - parameters["slab_limits"], 0), axis=-1)
+    taxable_income = taxable_income[..., 0]
+    slab_tax = np.where(taxable_income <= parameters["rebate_limit"],
+                        np.maximum(slab_tax - parameters["rebate_max"], 0), slab_tax)
+    surcharge_rate = np.sum(parameters["surcharge_rates"] * (taxable_income[..., None] > parameters["surcharge_limits"]), axis=-1)
+    return slab_tax * (1 + surcharge_rate) * (1 + parameters["cess"])
+
+def tax_on_income(income, kind, financial_years, tax_table, indexation=0.0):
+    """
+    Tax on a stream of incomes of one kind, each being the recipient's only income of its year.
+
+    "salary" and "pension" (the UPS pension is salary from a former employer) get the
+    standard deduction, "family_pension" the family pension deduction, and "annuity"
+    (the NPS annuity) none.
+
+    Args:
+        income (np.ndarray): Yearly income
+        kind (str): One of INCOME_KINDS
+        financial_years (np.ndarray): Financial year of each income (broadcasts against income)
+        tax_table (dict): One regime of load_tax_tables
+        indexation (float): Yearly growth of the tax amounts after the last table
+
+    Returns:
+        np.ndarray: Tax payable on each income
+    """
+    if kind not in INCOME_KINDS:
+        raise ValueError(f"Unknown income kind '{kind}'; expected one of {', '.join(INCOME_KINDS)}")
+    income = np.asarray(income, dtype=float)
+    financial_years = np.broadcast_to(financial_years, income.shape)
+    parameters = tax_parameters(tax_table, financial_years, indexation)
+    if kind in ("salary", "pension"):
+        deduction = parameters["standard_deduction"]
+    elif kind == "family_pension":
+        deduction = np.minimum(income * parameters["family_pension_share"], parameters["family_pension_cap"])
+    else:
+        deduction = 0.0
+    return income_tax(income - deduction, parameters)
+
+def ledger_income_tax(columns, scheme="NPS", regime="new", tax_tables=None, indexation=0.0, switch_date=None):
+    """
+    Income tax on the salary of a ledger by financial year, with the Section 80CCD
+    deductions on the pension contributions.
+
+    The government contribution (14% to NPS, 12% before 2019; 10% to the UPS individual
+    corpus after the switch) is taxable salary and deductible under 80CCD(2) up to the
+    regime's share of salary. The employee's 10% is deductible under 80CCD(1), within
+    the 80C limit, plus 80CCD(1B) (old regime only).
+
+    Args:
+        columns (dict): Ledger columns (see ledger_columns)
+        scheme (str): "NPS" or "UPS"
+        regime (str): Tax regime of tax_tables
+        tax_tables (dict): Tax tables (default: TAX_TABLES)
+        indexation (float): Yearly growth of the tax amounts after the last table
+        switch_date (date): The date when the UPS scheme was implemented (default: the policy's)
+
+    Returns:
+        dict: Per financial year "financial_years", "gross_income", "deductions", "taxable_income",
+              "income_tax" and "tax_saving_80ccd" (the tax saved by the 80CCD deductions)
+    """
+    if scheme not in ("NPS", "UPS"):
+        raise ValueError(f"Unknown scheme '{scheme}'; expected 'UPS' or 'NPS'")
+    tax_table = (tax_tables or TAX_TABLES)[regime]
+    years, months = columns["year"], columns["month"]
+    salary = columns["monthly_salary"]
+    employer_rate = np.where(years >= 2019, 0.14, 0.12)
+    if scheme == "UPS":
+        switch_date = switch_date or ups_policy["switch_date"]
+        after_switch = years * 12 + months >= switch_date.year * 12 + switch_date.month
+        employer_rate = np.where(after_switch, 0.10, employer_rate)
+
+    # Yearly totals by financial year (April to March)
+    financial_year = years - (months < APRIL)
+    first_year = int(financial_year[0])
+    position = financial_year - first_year
+    yearly_salary = np.bincount(position, weights=salary)
+    yearly_employer = np.bincount(position, weights=salary * employer_rate)
+    financial_years = np.arange(first_year, first_year + len(yearly_salary))
+
+    parameters = tax_parameters(tax_table, financial_years, indexation)
+    gross_income = yearly_salary + yearly_employer
+    employer_deduction = np.minimum(yearly_employer, yearly_salary * parameters["employer_contribution_share"])
+    employee_deduction = np.minimum(yearly_salary * 0.1, parameters["deduction_80c"] + parameters["deduction_80ccd_1b"])
+    deductions = parameters["standard_deduction"] + employer_deduction + employee_deduction
+    taxable_income = np.maximum(gross_income - deductions, 0)
+    tax = income_tax(taxable_income, parameters)
+    tax_without_80ccd = income_tax(np.maximum(gross_income - parameters["standard_deduction"], 0), parameters)
+    return {
+        "financial_years": financial_years,
+        "gross_income": gross_income,
+        "deductions": deductions,
+        "taxable_income": taxable_income,
+        "income_tax": tax,
+        "tax_saving_80ccd": tax_without_80ccd - tax,
+    }
+
+def value_post_tax_grid(grid, profile, regime="new", tax_tables=None, indexation=None, policy=None):
+    """
+    Post-tax version of a value_ledger_grid result.
+
+    The UPS pension, family pension and NPS annuity (officer and spouse) are taxed year
+    by year at the slabs of each payment year, as each recipient's only income. For every
+    cell the tax stream is discounted like the benefit itself and subtracted from the
+    totals; the monthly pension columns are net of the tax of their year. Lump sums
+    are tax-exempt: the UPS lump sum and gratuity, the NPS withdrawal (up to 60%), the
+    RoP refund to the nominee and the NPS corpus paid on death in service.
+
+    Args:
+        grid (dict): Result of value_ledger_grid
+        profile (dict): Complete profile the grid was valued with
+        regime (str): Tax regime of tax_tables
+        tax_tables (dict): Tax tables (default: TAX_TABLES)
+        indexation (float): Yearly growth of the tax amounts after the last table
+                            (default: the profile's inflation rate)
+        policy (dict): UPS policy the grid was valued with (default: the active policy);
+                       its values may be arrays that broadcast
+
+    Returns:
+        dict: The grid with post-tax value, pension and lump sum matrices, plus the present
+              value of the taxes as "ups_tax" and "nps_tax"
+    """
+    policy = policy or ups_policy
+    tax_table = (tax_tables or TAX_TABLES)[regime]
+    if indexation is None:
+        indexation = profile["inflation_rate"]
+    inflation = profile["inflation_rate"]
+    spouse_age_difference = profile["spouse_age_difference"]
+    birth_year_ = profile["birth_year"]
+    pension_base_year = birth_year_ + profile["normal_retirement_age"]
+    retirement_years = birth_year_ + np.asarray(grid["retirement_ages"])
+    death_years = np.asarray(grid["death_years"])
+    retirement_column = retirement_years[:, None]
+    row = death_years[None, :]
+    is_post_retirement = row >= retirement_column
+    yearly_factor = (1 + (inflation / 12)) ** -12.0
+    first_year_factor = (1 + (inflation / 12)) ** -(12 - profile["birth_month"])
+
+    # Officer's pension and annuity: one stream per retirement age, cut off at each death year
+    offsets = np.arange(max(int(death_years.max() - retirement_years.min()), 0) + 1)
+    stream_years = retirement_column + offsets
+    discount = np.where(offsets == 0, first_year_factor, yearly_factor ** offsets)
+    years_since_base = stream_years - pension_base_year
+    multipliers = pension_multiplier_table(max(int(years_since_base.max()), 0), profile["pay_commission_interval"],
+                                           profile["fitment_factor"])
+    ups_income = np.where(years_since_base >= 0, 12 * grid["ups_initial_pension"][:, None]
+                          * multipliers[np.clip(years_since_base, 0, None)], 0)
+    nps_income = np.broadcast_to(12 * grid["nps_initial_pension"][:, None], stream_years.shape)
+    years_paid = np.clip(row - retirement_column, 0, len(offsets) - 1)
+
+    def officer_tax(income, kind):
+        tax = tax_on_income(income, kind, stream_years, tax_table, indexation)
+        value = np.take_along_axis(np.cumsum(tax * discount, axis=1), years_paid, axis=1)
+        nominal = np.take_along_axis(np.cumsum(tax, axis=1), years_paid, axis=1)
+        return np.where(is_post_retirement, value, 0), np.where(is_post_retirement, nominal, 0)
+
+    # Spouse's family pension (UPS, with 2% DR) and continued annuity (NPS), discounted from the officer's death
+    spouse_end_year = retirement_column + spouse_age_difference
+    survives = row < spouse_end_year
+    ups_spouse_years = np.where(is_post_retirement, np.where(survives, spouse_end_year - row, -1), spouse_age_difference)
+    nps_spouse_years = np.where(is_post_retirement & survives & profile["joint_life"], spouse_end_year - row, -1)
+    spouse_offsets = np.arange(max(int(ups_spouse_years.max()), int(nps_spouse_years.max()), 0) + 1)
+    spouse_years = row[..., None] + spouse_offsets
+    family_pension = grid["ups_monthly_pension"] * np.where(is_post_retirement, policy["family_pension_share"], 1)
+
+    def spouse_tax(income, kind, years_paid):
+        tax = np.where(spouse_offsets <= years_paid[..., None],
+                       tax_on_income(income, kind, spouse_years, tax_table, indexation), 0)
+        return np.sum(tax * yearly_factor ** spouse_offsets, axis=-1), np.sum(tax, axis=-1)
+
+    ups_officer_tax, ups_officer_nominal = officer_tax(ups_income, "pension")
+    nps_officer_tax, nps_officer_nominal = officer_tax(nps_income, "annuity")
+    ups_spouse_tax, ups_spouse_nominal = spouse_tax(
+        12 * family_pension[..., None] * 1.02 ** spouse_offsets, "family_pension", ups_spouse_years)
+    nps_spouse_tax, nps_spouse_nominal = spouse_tax(
+        np.broadcast_to(12 * grid["nps_monthly_pension"][..., None], spouse_years.shape), "annuity", nps_spouse_years)
+
+    # Monthly pensions net of the tax of the death year (the family pension for deaths in service)
+    ups_pension_tax = np.where(
+        is_post_retirement,
+        tax_on_income(12 * grid["ups_monthly_pension"], "pension", row, tax_table, indexation),
+        tax_on_income(12 * grid["ups_monthly_pension"], "family_pension", row, tax_table, indexation))
+    nps_pension_tax = tax_on_income(12 * grid["nps_monthly_pension"], "annuity", row, tax_table, indexation)
+
+    results = dict(grid)
+    results["ups_tax"] = ups_officer_tax + ups_spouse_tax
+    results["nps_tax"] = nps_officer_tax + nps_spouse_tax
+    results["ups_value"] = grid["ups_value"] - results["ups_tax"]
+    results["nps_value"] = grid["nps_value"] - results["nps_tax"]
+    results["ups_nominal"] = grid["ups_nominal"] - ups_officer_nominal - ups_spouse_nominal
+    results["nps_nominal"] = grid["nps_nominal"] - nps_officer_nominal - nps_spouse_nominal
+    results["ups_monthly_pension"] = grid["ups_monthly_pension"] - ups_pension_tax / 12
+    results["nps_monthly_pension"] = grid["nps_monthly_pension"] - nps_pension_tax / 12
+    return results
+
+def generate_post_tax_mortality_table(profile=None, regime="new", tax_tables=None, indexation=None):
+    """
+    Post-tax version of the mortality comparison table (see value_post_tax_grid).
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        regime (str): Tax regime of tax_tables
+        tax_tables (dict): Tax tables (default: TAX_TABLES)
+        indexation (float): Yearly growth of the tax amounts after the last table
+                            (default: the profile's inflation rate)
+
+    Returns:
+        list: Rows in the layout of MORTALITY_TABLE_HEADERS, with post-tax values
+    """
+    profile = resolve_profile(profile)
+    _, trajectories = plan_cohort([profile])
+    trajectory, start_date, _ = trajectories[0]
+    columns = officer_ledger_columns(trajectory, start_date, profile)
+    grid = value_ledger_grid(columns, profile, [profile["retirement_age"]])
+    return grid_to_mortality_table(value_post_tax_grid(grid, profile, regime, tax_tables, indexation))
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Cohort runs
+# ------------------------------------------------------------------------------------------------------------------------------
+def trajectory_key(profile):
+    """
+    Key of the salary trajectory an officer shares with the rest of a seniority batch.
+
+    Salaries depend on the seniority date, the pay commission assumptions, and the
+    July increments and pay commissions seen since joining. Officers whose joining
+    dates fall before the same first increment and the same first pay commission
+    therefore draw identical salaries once both have joined.
+
+    Args:
+        profile (dict): Complete profile (see resolve_profile)
+
+    Returns:
+        tuple: Hashable trajectory key
+    """
+    joining_date = date(profile["year_of_joining"], profile["month_of_joining"], 1)
+    first_increment_year = joining_date.year if joining_date.month <= JULY else joining_date.year + 1
+    first_pay_commission_year = next(
+        year for year in range(SEVENTH_PAY_COMMISSION_YEAR, 2200, profile["pay_commission_interval"])
+        if date(year, APRIL, 1) >= joining_date
+    )
+    return (
+        profile["service"],
+        profile["seniority_year"],
+        profile["seniority_month"],
+        profile["fitment_factor"],
+        profile["pay_commission_interval"],
+        first_increment_year,
+        first_pay_commission_year,
+    )
+
+def generate_salary_trajectory(profiles):
+    """
+    Generate one salary trajectory covering every officer of a trajectory group.
+    It runs from the earliest joining date to the latest retirement date.
+
+    Args:
+        profiles (list): Complete profiles sharing the same trajectory_key
+
+    Returns:
+        tuple: (ledger columns, date of the first month)
+    """
+    first = profiles[0]
+    pay_scales = service_pay_scales(first["service"])
+    start_date = min(date(p["year_of_joining"], p["month_of_joining"], 1) for p in profiles)
+    end_date = max(date(p["birth_year"] + p["retirement_age"], p["birth_month"], 1) for p in profiles)
+    pay_scale_schedule = build_pay_scale_schedule(
+        start_date,
+        end_date,
+        first["fitment_factor"],
+        range(SEVENTH_PAY_COMMISSION_YEAR, 2100, first["pay_commission_interval"]),
+        pay_scales
+    )
+    seniority_date = date(first["seniority_year"], first["seniority_month"], 1)
+    return generate_salary_ledgers([(start_date, seniority_date, end_date)], pay_scale_schedule, pay_scales)[0], start_date
+
+def plan_cohort(profiles):
+    """
+    Resolve a cohort and generate the salary trajectory of each seniority batch.
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+
+    Returns:
+        tuple: (resolved profiles, list of (trajectory columns, first month date, officer indices))
+    """
+    resolved = [resolve_profile(profile) for profile in profiles]
+    groups = {}
+    for index, profile in enumerate(resolved):
+        groups.setdefault(trajectory_key(profile), []).append(index)
+    trajectories = []
+    for indices in groups.values():
+        trajectory, start_date = generate_salary_trajectory([resolved[i] for i in indices])
+        trajectories.append((trajectory, start_date, indices))
+    return resolved, trajectories
+
+def officer_ledger_columns(trajectory, start_date, profile, policy=None):
+    """
+    Slice one officer's ledger (joining to retirement) out of their batch's salary trajectory
+    without copying, and add the officer's corpora.
+
+    Args:
+        trajectory (dict): Trajectory columns from generate_salary_trajectory
+        start_date (date): Date of the first month of the trajectory
+        profile (dict): Complete profile (see resolve_profile)
+        policy (dict): Complete UPS policy (default: the active policy)
+
+    Returns:
+        dict: Ledger columns with corpora (see accumulate_ledger_corpora)
+    """
+    offset = (profile["year_of_joining"] - start_date.year) * 12 + profile["month_of_joining"] - start_date.month
+    service_months = ((profile["birth_year"] + profile["retirement_age"] - profile["year_of_joining"]) * 12
+                      + profile["birth_month"] - profile["month_of_joining"])
+    columns = {field: values[offset:offset + service_months + 1] for field, values in trajectory.items()}
+    return accumulate_ledger_corpora(columns, profile, policy)
+
+def value_cohort_officer(trajectory, start_date, profile, monthly=False):
+    """
+    Value one officer on a zero-copy slice of their batch's salary trajectory.
+
+    Args:
+        trajectory (dict): Trajectory columns from generate_salary_trajectory
+        start_date (date): Date of the first month of the trajectory
+        profile (dict): Complete profile (see resolve_profile)
+        monthly (bool): Value a death in every month instead of every year (see value_death_months)
+
+    Returns:
+        list: Mortality comparison table of the officer
+    """
+    columns = officer_ledger_columns(trajectory, start_date, profile)
+    if monthly:
+        return death_months_to_mortality_table(value_death_months(columns, profile))
+    grid = value_ledger_grid(columns, profile, [profile["retirement_age"]])
+    return grid_to_mortality_table(grid)
+
+def run_cohort(profiles, monthly=False):
+    """
+    Run the comparison for a cohort of officers, sharing salary trajectories.
+
+    Officers are grouped by trajectory_key; each group's salary ledger is generated
+    once and every officer receives a zero-copy slice (NumPy view) of it, from their
+    joining month to their retirement month. Corpora and valuation then run on the
+    slices.
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+        monthly (bool): Value a death in every month instead of every year (see value_death_months)
+
+    Returns:
+        list: Mortality comparison table of each officer, in input order
+    """
+    resolved, trajectories = plan_cohort(profiles)
+    results = [None] * len(resolved)
+    for trajectory, start_date, indices in trajectories:
+        for i in indices:
+            results[i] = value_cohort_officer(trajectory, start_date, resolved[i], monthly)
+    return results
+
+def verify_backends(profiles=None, rtol=1e-9):
+    """
+    Check that every available backend reproduces the "python" reference kernels.
+
+    Args:
+        profiles (list): Officer profiles to run as a cohort (default: DEFAULT_PROFILE only)
+        rtol (float): Relative tolerance of the comparison
+
+    Returns:
+        dict: Largest relative difference from the reference for each backend
+    """
+    global backend
+    profiles = profiles or [{}]
+    active_backend = backend
+    try:
+        set_backend("python")
+        reference = [np.array(table_data, dtype=float) for table_data in run_cohort(profiles)]
+        differences = {}
+        for name in BACKENDS:
+            if name == "python" or name == "numba" and numba is None:
+                continue
+            set_backend(name)
+            differences[name] = max(
+                float(np.max(np.abs(np.array(table_data, dtype=float) - expected) / np.maximum(np.abs(expected), 1.0)))
+                for table_data, expected in zip(run_cohort(profiles), reference)
+            )
+            if differences[name] > rtol:
+                raise AssertionError(f"{name} backend differs from the reference by {differences[name]:.3g}")
+    finally:
+        backend = active_backend
+    return differences
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Event-driven careers
+# ------------------------------------------------------------------------------------------------------------------------------
+# Career events that deviate from the fixed years_in_scale ladder. An event is a dict with its "type",
+# the "year" and "month" it starts in, and the fields listed for its type
+CAREER_EVENT_FIELDS = {
+    "promotion_delay": ("months",),  # The seniority clock stops, so this and every later promotion come later
+    "extraordinary_leave": ("months",),  # No pay; the seniority clock stops and July increments are missed
+    "deputation": ("months", "level"),  # Pay at least at the level of the deputation post
+    "pay_commission": (),  # Moves the nearest scheduled pay commission here; later ones follow at the interval
+}
+
+def normalize_career_events(events):
+    """
+    Validate career events and convert them into sorted, hashable keys.
+
+    Args:
+        events (iterable): Career events (see CAREER_EVENT_FIELDS)
+
+    Returns:
+        tuple: (month index, event type, field values) of each event, in date order
+    """
+    keys = []
+    for event in events:
+        event_type = event.get("type")
+        if event_type not in CAREER_EVENT_FIELDS:
+            raise ValueError(f"Unknown career event type: {event_type} (available: {', '.join(CAREER_EVENT_FIELDS)})")
+        fields = CAREER_EVENT_FIELDS[event_type]
+        expected = {"type", "year", "month", *fields}
+        if set(event) != expected:
+            raise ValueError(f"A {event_type} event needs exactly the fields {', '.join(sorted(expected))}")
+        if not 1 <= int(event["month"]) <= 12:
+            raise ValueError(f"Invalid month in career event: {event['month']}")
+        if "months" in fields and int(event["months"]) <= 0:
+            raise ValueError(f"The duration of a {event_type} event must be positive")
+        keys.append((int(event["year"]) * 12 + int(event["month"]) - 1, event_type, tuple(int(event[field]) for field in fields)))
+    return tuple(sorted(keys))
+
+def pay_commission_months(profile, events):
+    """
+    Month indices of the pay commissions: every pay_commission_interval years (from April) after the
+    7th Pay Commission, with the cycle moved by each pay_commission event.
+
+    Args:
+        profile (dict): Complete profile (see resolve_profile)
+        events (tuple): Normalized career events (see normalize_career_events)
+
+    Returns:
+        np.ndarray: Sorted month indices
+    """
+    interval = profile["pay_commission_interval"] * 12
+    last = 2100 * 12
+    months = list(range(SEVENTH_PAY_COMMISSION_YEAR * 12 + APRIL - 1, last, interval))
+    for start, event_type, _ in events:
+        if event_type == "pay_commission":
+            nearest = min(months, key=lambda month: (abs(month - start), month))
+            months = [month for month in months if month < nearest] + list(range(start, last, interval))
+    return np.array(months, dtype=int)
+
+def career_ledger_columns(profile, events, first=0):
+    """
+    Generate the salary ledger of a career with events (the event-driven form of generate_salary_ledgers).
+
+    Every month is computed directly from the events before it, so the ledger can start at any
+    month after joining without generating the months before it. The pay scales are the service's
+    base matrix; the global PAY_SCALES are left untouched.
+
+    Args:
+        profile (dict): Complete profile (see resolve_profile)
+        events (tuple): Normalized career events (see normalize_career_events)
+        first (int): First month to generate, counted from the joining month
+
+    Returns:
+        dict: Ledger columns (see LEDGER_FIELDS) from the given month to the retirement month
+    """
+    def julys_until(month):
+        return (month - JULY + 1) // 12  # July increments up to a month index, plus a constant
+
+    pay_scales = service_pay_scales(profile["service"])
+    lookup = compile_pay_matrix(pay_scales)
+    joining = profile["year_of_joining"] * 12 + profile["month_of_joining"] - 1
+    seniority = profile["seniority_year"] * 12 + profile["seniority_month"] - 1
+    retirement = (profile["birth_year"] + profile["retirement_age"]) * 12 + profile["birth_month"] - 1
+    months = np.arange(joining + first, retirement + 1)
+
+    # Months the seniority clock stood still, missed increments, leave without pay and deputations
+    stopped_months = np.zeros(len(months), dtype=int)
+    missed_increments = np.zeros(len(months), dtype=int)
+    on_leave = np.zeros(len(months), dtype=bool)
+    deputation_position = np.full(len(months), -1)
+    deputation_start = np.zeros(len(months), dtype=int)  # Month the deputation level was reached
+    for start, event_type, fields in events:
+        if event_type in ("promotion_delay", "extraordinary_leave"):
+            stopped_months += np.clip(months - start, 0, fields[0])
+        if event_type == "extraordinary_leave":
+            end = start + fields[0]
+            on_leave |= (months >= start) & (months < end)
+            missed_increments += np.where(months >= start, julys_until(np.minimum(months, end - 1)) - julys_until(start - 1), 0)
+        elif event_type == "deputation":
+            position = lookup["index"].get(fields[1])
+            if position is None:
+                raise ValueError(f"Invalid pay scale level for deputation: {fields[1]}")
+            active = (months >= start) & (months < start + fields[0])
+            higher = active & (position > deputation_position)
+            deputation_start = np.where(higher, start, deputation_start)
+            deputation_position = np.where(higher, position, deputation_position)
+
+    # Pay scale level and months in the scale from the seniority-based service months.
+    # While a deputation post's level is above the officer's own, the pay level is the
+    # deputation level and months_in_scale counts the months since it was reached.
+    seniority_months = months - seniority - stopped_months
+    position = np.minimum(np.searchsorted(lookup["boundaries"], seniority_months, side="right"), len(pay_scales) - 1)
+    on_deputation_level = deputation_position > position
+    months_in_scale = np.where(on_deputation_level, months - deputation_start,
+                               seniority_months - lookup["starts"][position])
+    position = np.where(on_deputation_level, deputation_position, position)
+
+    # July increments and pay commissions since joining
+    increments = julys_until(months) - (joining - JULY) // 12 - missed_increments
+    commissions = pay_commission_months(profile, events)
+    commissions = commissions[(commissions >= joining) & (commissions <= retirement)]
+    era = np.searchsorted(commissions, months, side="right")
+    era_basic_pay = get_kernel("pay_commission")(
+        np.array([scale["basic_pay"] for scale in pay_scales], dtype=float),
+        np.array([scale["years_in_scale"] for scale in pay_scales], dtype=float),
+        float(profile["fitment_factor"]),
+        len(commissions)
+    )
+
+    increment_rate = 0.03  # Fixed 3% annual increment
+    basic_pay = np.where(on_leave, 0.0, era_basic_pay[era, position] * (1 + increment_rate) ** increments)
+    return {
+        "year": months // 12,
+        "month": months % 12 + 1,
+        "monthly_salary": basic_pay + (0.53 * basic_pay),  # Add Dearness Allowance (DA)
+        "basic_pay": basic_pay,
+        "pay_level": np.array([scale["level"] for scale in pay_scales])[position],
+        "months_in_scale": months_in_scale,
+        "increments": increments,
+    }
+
+def first_career_change(profile, old_events, new_events):
+    """
+    First month (counted from joining) whose pay can differ between two sets of career events.
+
+    Args:
+        profile (dict): Complete profile (see resolve_profile)
+        old_events (tuple): Normalized career events before the change
+        new_events (tuple): Normalized career events after the change
+
+    Returns:
+        int: Month after joining, or None when the change affects no month
+    """
+    changed = set(old_events) ^ set(new_events)
+    starts = [start for start, event_type, _ in changed if event_type != "pay_commission"]
+    if any(event_type == "pay_commission" for _, event_type, _ in changed):
+        moved_commissions = set(pay_commission_months(profile, old_events).tolist()) ^ set(
+            pay_commission_months(profile, new_events).tolist())
+        starts += [min(moved_commissions)] if moved_commissions else []
+    if not starts:
+        return None
+    return max(min(starts) - (profile["year_of_joining"] * 12 + profile["month_of_joining"] - 1), 0)
+
+class CareerLedger:
+    """
+    Salary ledger and corpora of one career driven by dated events, recomputed from the first
+    changed month onward when the events change.
+
+    A month's pay depends only on the events before it, and the corpus recurrences only on the
+    corpora of the month before, so an edit late in the career reuses the cached prefix:
+
+        career = CareerLedger({"birth_year": 1990})
+        career.add_event({"type": "promotion_delay", "year": 2040, "month": 1, "months": 12})
+        career.recomputed_from  # first recomputed month, counted from joining
+        table = career.mortality_table()
+    """
+
+    def __init__(self, profile=None, events=()):
+        """
+        Args:
+            profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+            events (iterable): Career events (see CAREER_EVENT_FIELDS)
+        """
+        self.profile = resolve_profile(profile)
+        self.events = list(events)
+        self._event_keys = normalize_career_events(self.events)
+        self._policy_key = ups_policy_key()
+        self.columns = accumulate_ledger_corpora(career_ledger_columns(self.profile, self._event_keys), self.profile)
+        self.recomputed_from = 0  # First month recomputed by the last update, counted from joining
+
+    def update(self, events):
+        """
+        Replace the career events and recompute the ledger and corpora from the first changed month.
+
+        Args:
+            events (iterable): Career events (see CAREER_EVENT_FIELDS)
+
+        Returns:
+            dict: Ledger columns with corpora (see accumulate_ledger_corpora)
+        """
+        events = list(events)
+        event_keys = normalize_career_events(events)
+        start = first_career_change(self.profile, self._event_keys, event_keys)
+        if self._policy_key != ups_policy_key():
+            start = 0  # The corpora were accumulated under another UPS policy
+            self._policy_key = ups_policy_key()
+        self.events, self._event_keys = events, event_keys
+        length = len(self.columns["year"])
+        self.recomputed_from = length if start is None else min(start, length)
+        if self.recomputed_from < length:
+            suffix = career_ledger_columns(self.profile, event_keys, first=self.recomputed_from)
+            columns = {field: np.concatenate((values[:self.recomputed_from], suffix[field])) if field in suffix else values
+                       for field, values in self.columns.items()}
+            self.columns = accumulate_ledger_corpora(columns, self.profile, start=self.recomputed_from)
+        return self.columns
+
+    def add_event(self, event):
+        """
+        Add one career event (see update).
+        """
+        return self.update(self.events + [event])
+
+    def mortality_table(self):
+        """
+        Mortality comparison table of the career (see generate_mortality_comparison_table).
+        """
+        grid = value_ledger_grid(self.columns, self.profile, [self.profile["retirement_age"]])
+        return grid_to_mortality_table(grid)
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Multi-process cohort runs with shared read-only tables
+# ------------------------------------------------------------------------------------------------------------------------------
+class SharedTables:
+    """
+    Read-only NumPy arrays packed into one shared memory block.
+
+    The creating process writes the arrays once; workers attach by name and get
+    zero-copy, read-only views, so per-worker startup cost and resident memory do not
+    grow with the number of workers. Pickling a SharedTables (e.g. as a Pool
+    initializer argument) only sends the block name and the manifest.
+    """
+    ALIGNMENT = 64  # Byte alignment of each array in the block
+
+    def __init__(self, shm, manifest, owner=False):
+        self._shm = shm
+        self.manifest = manifest
+        self.owner = owner
+
+    @classmethod
+    def create(cls, arrays):
+        """
+        Copy named arrays into a new shared memory block.
+
+        Args:
+            arrays (dict): Name -> np.ndarray (numeric dtypes only)
+
+        Returns:
+            SharedTables: Tables owning the block (call unlink() when done)
+        """
+        manifest = {}
+        size = 0
+        for name, values in arrays.items():
+            values = np.asarray(values)
+            manifest[name] = (values.dtype.str, values.shape, size)
+            size += -(-values.nbytes // cls.ALIGNMENT) * cls.ALIGNMENT
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        tables = cls(shm, manifest, owner=True)
+        for name, values in arrays.items():
+            dtype, shape, offset = manifest[name]
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = values
+        return tables
+
+    @classmethod
+    def attach(cls, name, manifest):
+        """
+        Attach to a block created by another process.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13; pool workers share the creator's resource tracker
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, manifest)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __getitem__(self, name):
+        dtype, shape, offset = self.manifest[name]
+        values = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+        values.flags.writeable = False
+        return values
+
+    def __contains__(self, name):
+        return name in self.manifest
+
+    def __reduce__(self):
+        return SharedTables.attach, (self.name, self.manifest)
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+_worker_tables = None  # SharedTables attached by each cohort worker process
+
+def _attach_worker_tables(tables, policy=None):
+    global _worker_tables
+    _worker_tables = tables
+    set_ups_policy(policy)
+
+def _value_shared_officer(task):
+    """
+    Pool task: value one officer on the shared trajectory of their batch.
+    """
+    index, group, start_date, profile, monthly = task
+    trajectory = {field: _worker_tables[f"{group}/{field}"] for field in LEDGER_FIELDS}
+    return index, value_cohort_officer(trajectory, start_date, profile, monthly)
+
+def run_cohort_parallel(profiles, processes=None, chunksize=16, monthly=False):
+    """
+    Run a cohort over worker processes that share the salary trajectories.
+
+    The trajectories of every seniority batch are generated once in this process and
+    placed in shared memory; workers attach to them zero-copy and only compute the
+    officer-specific corpora and valuation.
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+        processes (int): Number of worker processes (default: os.cpu_count())
+        chunksize (int): Officers sent to a worker at a time
+        monthly (bool): Value a death in every month instead of every year (see value_death_months)
+
+    Returns:
+        list: Mortality comparison table of each officer, in input order
+    """
+    resolved, trajectories = plan_cohort(profiles)
+    arrays = {}
+    tasks = []
+    for group, (trajectory, start_date, indices) in enumerate(trajectories):
+        for field in LEDGER_FIELDS:
+            arrays[f"{group}/{field}"] = trajectory[field]
+        tasks.extend((i, group, start_date, resolved[i], monthly) for i in indices)
+
+    results = [None] * len(resolved)
+    with SharedTables.create(arrays) as tables:
+        with multiprocessing.Pool(processes, initializer=_attach_worker_tables, initargs=(tables, ups_policy)) as pool:
+            for index, table_data in pool.imap_unordered(_value_shared_officer, tasks, chunksize):
+                results[index] = table_data
+    return results
+
+MORTALITY_TABLE_HEADERS = [
+    "Death Age",
+    "UPS Monthly Pension",
+    "NPS Monthly Pension",
+    "UPS Lump Sum",
+    "NPS Lump Sum",
+    "UPS Total Corpus (Inflation-Adjusted)",
+    "NPS Total Value (Inflation-Adjusted)",
+    "UPS Total Corpus (Nominal)",
+    "NPS Total Value (Nominal)"
+]
+
+def _format_inr_value(value, decimals, symbol):
+    """
+    Format one amount that does not fit the batch path of format_inr: NaN, infinities
+    and amounts too large for int64 (about 9.2e16 rupees with two decimals).
+    """
+    sign = "-" if value < 0 else ""
+    if not np.isfinite(value):
+        return sign + symbol + ("nan" if np.isnan(value) else "inf")
+    rupees, fraction = divmod(int(round(abs(value) * 10 ** decimals)), 10 ** decimals)
+    head, groups = str(rupees)[:-3], [str(rupees)[-3:]]
+    while head:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    return sign + symbol + ",".join(groups) + (f".{fraction:0{decimals}d}" if decimals else "")
+
+def format_inr(values, decimals=2, symbol="₹ "):
+    """
+    Format amounts as Indian rupees with lakh/crore digit grouping (e.g. ₹ 1,31,70,799.89).
+
+    A whole column is formatted in one batch: the digit groups are split with NumPy and
+    the amounts are bucketed by their number of groups, each bucket using one format
+    string. The system locale is not used. NaN and infinite amounts are written as
+    "₹ nan" and "₹ inf", and amounts beyond the int64 range are formatted one by one.
+
+    Args:
+        values (float or array-like): Amount or column of amounts
+        decimals (int): Digits after the decimal point
+        symbol (str): Currency symbol prefix
+
+    Returns:
+        str or list: Formatted amount, or list of formatted amounts for a column
+    """
+    is_scalar = np.ndim(values) == 0
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    scale = 10 ** decimals
+    special = ~(np.abs(values) * scale < 2.0 ** 63)  # NaN, infinite or beyond the int64 range
+    units = np.rint(np.where(special, 0, np.abs(values)) * scale).astype(np.int64)
+    rupees, fraction = np.divmod(units, scale)
+    negative = (values < 0) & (units > 0)
+    digits = np.searchsorted(10 ** np.arange(19, dtype=np.int64), rupees, side="right")
+    groups = np.maximum((digits - 2) // 2, 0)  # Two-digit groups above the last three digits
+
+    formatted = np.empty(len(values), dtype=object)
+    fraction_format = f".%0{decimals}d" if decimals else ""
+    for group_count in np.unique(groups).tolist():
+        index = np.nonzero(groups == group_count)[0]
+        selected = rupees[index]
+        parts = [selected // (1000 * 100 ** (group_count - 1))] if group_count else []
+        parts += [selected // (1000 * 100 ** j) % 100 for j in range(group_count - 2, -1, -1)]
+        parts.append(selected % 1000 if group_count else selected)
+        number_format = "%s" + symbol + ",".join(["%d"] + ["%02d"] * (group_count - 1) + ["%03d"] if group_count else ["%d"])
+        row_format = number_format + fraction_format
+        columns = [np.where(negative[index], "-", "").tolist()] + [part.tolist() for part in parts]
+        if decimals:
+            columns.append(fraction[index].tolist())
+        formatted[index] = [row_format % row for row in zip(*columns)]
+    for i in np.nonzero(special)[0].tolist():
+        formatted[i] = _format_inr_value(float(values[i]), decimals, symbol)
+    return formatted[0] if is_scalar else formatted.tolist()
+
+def format_mortality_table(mortality_table):
+    """
+    Format the currency values of the mortality comparison table for display.
+    The death age column is left unformatted.
+    """
+    if not mortality_table:
+        return []
+    values = np.asarray([row[1:] for row in mortality_table], dtype=float)
+    formatted_columns = [format_inr(np.round(values[:, column])) for column in range(values.shape[1])]
+    return [[row[0]] + list(cells) for row, cells in zip(mortality_table, zip(*formatted_columns))]
+
+def generate_csv_file(headers, table_data, output_file):
+    """
+    Generate a CSV file from the given headers and table data.
+    
+    Parameters:
+    - headers: List of column headers.
+    - table_data: List of rows, where each row is a list of column values.
+    - output_file: Path to the output CSV file.
+    """
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(headers)  # Write headers
+        writer.writerows(table_data)  # Write rows
+    print(f"CSV file saved to {output_file}")
+
+def generate_markdown_table(headers, table_data, output_file):
+    """
+    Generate a Markdown table from the given headers and table data and save it to a file.
+    
+    Parameters:
+    - headers: List of column headers.
+    - table_data: List of rows, where each row is a list of column values.
+    - output_file: Path to the output Markdown file.
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        # Write headers
+        f.write("| " + " | ".join(headers) + " |\n")
+        f.write("|" + " --- |" * len(headers) + "\n")
+        
+        # Write rows
+        for row in table_data:
+            f.write("| " + " | ".join(str(col) for col in row) + " |\n")
+    print(f"Markdown table saved to {output_file}")
+
+def generate_markdown_file(headers, table_data, salary_progression, inputs, summary, output_file):
+    """
+    Generate a Markdown file containing inputs, salary progression, a comparison table, and a summary.
+    
+    Parameters:
+    - headers: List of column headers for the comparison table.
+    - table_data: List of rows for the comparison table.
+    - salary_progression: List of salary progression rows.
+    - inputs: Dictionary of inputs and their values.
+    - summary: List of tuples summarizing which system is better at different death ages.
+    - output_file: Path to the output Markdown file.
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        # Write inputs section
+        f.write("# Monthly-Based Corpus Comparison (UPS vs NPS with RoP Annuity)\n\n")
+        f.write("## Inputs\n\n")
+        for key, value in inputs.items():
+            f.write(f"- **{key}**: {value}\n")
+        f.write("\n---\n\n")
+
+        # Write salary progression section
+        f.write("## Salary Progression\n\n")
+        f.write("| Year | Month | Pay Level | Basic Pay (₹) | Monthly Salary (₹) | NPS Corpus (₹) |\n")
+        f.write("|------|-------|-----------|----------------|---------------------|-----------------|\n")
+        for row in salary_progression:
+            f.write(f"| {row['year']} | {row['month']} | Level {row['pay_level']} | ₹ {row['basic_pay']:.2f} | ₹ {row['monthly_salary']:.2f} | ₹ {row['nps_corpus']:.2f} |\n")
+        f.write("\n---\n\n")
+
+        # Write comparison table section
+        f.write("## NPS vs UPS Comparison Across Different Death Ages\n\n")
+        f.write("| " + " | ".join(headers) + " |\n")
+        f.write("|" + " --- |" * len(headers) + "\n")
+        for row in table_data:
+            f.write("| " + " | ".join(str(col) for col in row) + " |\n")
+        f.write("\n---\n\n")
+
+        # Write summary section
+        f.write("## Summary: Which System Is Better at Different Death Ages\n\n")
+        if summary:
+            for age, system, ups_value, nps_value in summary:
+                f.write(f"- From age **{age}**: **{system}** is better\n")
+                f.write(f"  - UPS Value: ₹ {ups_value:,.2f}\n")
+                f.write(f"  - NPS Value: ₹ {nps_value:,.2f}\n")
+                f.write(f"  - Difference: ₹ {abs(ups_value - nps_value):,.2f}\n\n")
+        else:
+            f.write("No data available for comparison.\n")
+        f.write("\n---\n\n")
+    print(f"Markdown file saved to {output_file}")
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Non-interactive runs and persistent result cache
+# ------------------------------------------------------------------------------------------------------------------------------
+def resolve_profile(profile=None):
+    """
+    Merge a (partial) profile with DEFAULT_PROFILE and normalise its values.
+    The fitment factor is calculated using Ackroyd's formula when not given.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding the defaults
+
+    Returns:
+        dict: Complete profile
+    """
+    resolved = dict(DEFAULT_PROFILE)
+    resolved.update(profile or {})
+    unknown = set(resolved) - set(DEFAULT_PROFILE)
+    if unknown:
+        raise ValueError(f"Unknown profile keys: {', '.join(sorted(unknown))}")
+
+    # Normalise types so that equal profiles always hash to the same key
+    for key, default in DEFAULT_PROFILE.items():
+        if default is not None:
+            resolved[key] = type(default)(resolved[key])
+    if resolved["fitment_factor"] is None:
+        years_elapsed = 10  # Fixed to 10 years, as in calculate_fitment_factor
+        resolved["fitment_factor"] = (1 + resolved["inflation_rate"]) ** years_elapsed + resolved["cost_of_living_adjustment"]
+    resolved["fitment_factor"] = float(resolved["fitment_factor"])
+    resolved["withdrawal_percentage"] = min(max(resolved["withdrawal_percentage"], 0), 0.6)
+    return resolved
+
+def apply_profile(profile):
+    """
+    Set the module-level assumptions used by the calculation functions from a profile.
+
+    Args:
+        profile (dict): Complete profile (see resolve_profile)
+
+    Returns:
+        date: Retirement date of the officer
+    """
+    global birth_year, birth_month, normal_retirement_age, retirement_age, inflation_rate
+    global withdrawal_percentage, pay_commission_interval, pension_fund_nav_rate, fitment_factor
+
+    select_pay_matrix(profile["service"])
+    birth_year = profile["birth_year"]
+    birth_month = profile["birth_month"]
+    normal_retirement_age = profile["normal_retirement_age"]
+    retirement_age = profile["retirement_age"]
+    inflation_rate = profile["inflation_rate"]
+    withdrawal_percentage = profile["withdrawal_percentage"]
+    pay_commission_interval = profile["pay_commission_interval"]
+    pension_fund_nav_rate = profile["pension_fund_nav_rate"]
+    fitment_factor = profile["fitment_factor"]
+    return date(birth_year + retirement_age, birth_month, 1)
+
+def current_assumptions():
+    """
+    Module-level valuation assumptions set by apply_profile, keyed like a profile
+    (the default of the vectorized valuation functions when no profile is passed).
+    """
+    return {
+        "inflation_rate": inflation_rate,
+        "withdrawal_percentage": withdrawal_percentage,
+        "pay_commission_interval": pay_commission_interval,
+        "fitment_factor": fitment_factor,
+    }
+
+class ComparisonPipeline:
+    """
+    Staged comparison pipeline that recomputes only the stages a change affects.
+
+    Each stage declares the upstream stages it consumes and the profile keys it reads.
+    A stage is rerun only when one of its own profile keys or an upstream stage changed,
+    so a what-if change of, e.g., annuity_rate reuses the salary ledger and both corpora:
+
+        pipeline = ComparisonPipeline({"birth_year": 1990})
+        table = pipeline.run()
+        table = pipeline.update(annuity_rate=0.07)  # recomputes valuation and formatting only
+    """
+
+    # (stage name, upstream stages, profile keys read by the stage)
+    STAGES = (
+        ("pay_scale_schedule", (), (
+            "service", "fitment_factor", "pay_commission_interval", "year_of_joining", "month_of_joining",
+            "birth_year", "birth_month", "retirement_age")),
+        ("salary_ledger", ("pay_scale_schedule",), (
+            "service", "year_of_joining", "month_of_joining", "seniority_year", "seniority_month",
+            "birth_year", "birth_month", "retirement_age")),
+        ("nps_corpus", ("salary_ledger",), (
+            "equity_return", "corporate_bond_return", "gsec_return", "life_cycle_fund")),
+        ("ups_corpus", ("nps_corpus",), ("pension_fund_nav_rate",)),
+        ("valuation", ("ups_corpus",), (
+            "birth_year", "birth_month", "normal_retirement_age", "retirement_age", "inflation_rate",
+            "fitment_factor", "pay_commission_interval", "withdrawal_percentage", "annuity_rate",
+            "spouse_age_difference", "joint_life")),
+        ("formatting", ("valuation",), ()),
+    )
+    POLICY_STAGES = ("ups_corpus", "valuation")  # Stages that also read the UPS policy
+
+    def __init__(self, profile=None):
+        """
+        Args:
+            profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        """
+        self.inputs = dict(profile or {})
+        self.recomputed = []  # Stages recomputed by the last run
+        self._results = {}  # Stage name -> (stage key, stage output)
+
+    def update(self, until="formatting", **changes):
+        """
+        Change some inputs and rerun the pipeline up to the given stage.
+        """
+        self.inputs.update(changes)
+        return self.run(until)
+
+    def run(self, until="formatting"):
+        """
+        Run the pipeline up to the given stage, reusing every stage whose inputs are unchanged.
+
+        Args:
+            until (str): Name of the last stage to run
+
+        Returns:
+            Output of the last stage (the formatted table for "formatting")
+        """
+        if until not in (name for name, _, _ in self.STAGES):
+            raise ValueError(f"Unknown pipeline stage: {until}")
+        profile = resolve_profile(self.inputs)
+        apply_profile(profile)
+        self.recomputed = []
+        keys = {}
+        policy_key = ups_policy_key()
+        for name, upstream, params in self.STAGES:
+            keys[name] = (tuple(profile[param] for param in params), tuple(keys[stage] for stage in upstream),
+                          policy_key if name in self.POLICY_STAGES else None)
+            cached = self._results.get(name)
+            if cached is None or cached[0] != keys[name]:
+                stage_function = getattr(self, "_stage_" + name)
+                output = stage_function(profile, *(self._results[stage][1] for stage in upstream))
+                self._results[name] = (keys[name], output)
+                self.recomputed.append(name)
+            if name == until:
+                return self._results[name][1]
+
+    def _stage_pay_scale_schedule(self, profile):
+        retirement_date = date(profile["birth_year"] + profile["retirement_age"], profile["birth_month"], 1)
+        return build_pay_scale_schedule(
+            date(profile["year_of_joining"], profile["month_of_joining"], 1),
+            retirement_date,
+            profile["fitment_factor"],
+            range(SEVENTH_PAY_COMMISSION_YEAR, 2100, profile["pay_commission_interval"])
+        )
+
+    def _stage_salary_ledger(self, profile, pay_scale_schedule):
+        retirement_date = date(profile["birth_year"] + profile["retirement_age"], profile["birth_month"], 1)
+        return generate_salary_progression(
+            profile["year_of_joining"],
+            profile["month_of_joining"],
+            profile["seniority_year"],
+            profile["seniority_month"],
+            retirement_date,
+            profile["fitment_factor"],
+            list(pay_scale_schedule),
+            pay_scale_schedule
+        )
+
+    def _stage_nps_corpus(self, profile, salary_ledger):
+        global overall_table
+        overall_table = [dict(entry) for entry in salary_ledger]
+        initialize_nps_corpus(
+            profile["equity_return"],
+            profile["corporate_bond_return"],
+            profile["gsec_return"],
+            life_cycle_fund=profile["life_cycle_fund"]
+        )
+        return overall_table
+
+    def _stage_ups_corpus(self, profile, nps_table):
+        global overall_table
+        overall_table = [dict(entry) for entry in nps_table]
+        corpus_values = calculate_corpus_values(ups_policy["switch_date"])
+        return overall_table, corpus_values
+
+    def _stage_valuation(self, profile, ups_corpus):
+        global overall_table
+        overall_table, corpus_values = ups_corpus
+        return generate_mortality_comparison_table(
+            profile["retirement_age"],
+            profile["fitment_factor"],
+            profile["pay_commission_interval"],
+            profile["annuity_rate"],
+            profile["spouse_age_difference"],
+            profile["joint_life"],
+            corpus_values
+        )
+
+    def _stage_formatting(self, profile, mortality_table):
+        return format_mortality_table(mortality_table)
+
+def run_comparison(profile=None):
+    """
+    Run the full comparison for a profile without prompting for input.
+
+    This is the per-death-year engine used by main(), which also prints the salary ledger
+    it builds. run_cohort values the same tables with the vectorized engine (value_ledger_grid);
+    this one is kept as the readable reference the vectorized engine is tested against,
+    and the two agree to within 1e-14 relative.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+
+    Returns:
+        list: Mortality comparison table (see generate_mortality_comparison_table)
+    """
+    return ComparisonPipeline(profile).run(until="valuation")
+
+def profile_cache_key(profile):
+    """
+    Compute the content-addressed cache key of a profile.
+    The key covers the complete profile, the service's base pay scales, the active UPS
+    policy and MODEL_VERSION, so a model change never serves stale results.
+
+    Args:
+        profile (dict): Officer profile and assumptions (partial profiles are resolved)
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    profile = resolve_profile(profile)
+    canonical = json.dumps(
+        {
+            "model_version": MODEL_VERSION,
+            "profile": profile,
+            "pay_scales": PAY_MATRICES[profile["service"]],
+            "ups_policy": ups_policy_key(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def encode_table(table_data):
+    """
+    Pack a numeric table into a compact binary blob (row/column header + float64 values).
+    """
+    values = np.asarray(table_data, dtype=np.float64).reshape(len(table_data), -1)
+    return struct.pack("<II", *values.shape) + values.tobytes()
+
+def restore_death_ages(death_ages):
+    """
+    Death age column as a list: integers for yearly tables, floats (months as fractions)
+    for monthly tables, which contain non-integral ages.
+    """
+    death_ages = np.asarray(death_ages)
+    if np.all(death_ages == np.round(death_ages)):
+        return death_ages.astype(int).tolist()
+    return death_ages.tolist()
+
+def decode_table(blob):
+    """
+    Unpack a blob written by encode_table back into a list of rows.
+    The first column (death age) is restored by restore_death_ages.
+    """
+    rows, columns = struct.unpack_from("<II", blob)
+    values = np.frombuffer(blob, dtype=np.float64, offset=8).reshape(rows, columns)
+    return [[death_age] + row for death_age, row in zip(restore_death_ages(values[:, 0]), values[:, 1:].tolist())]
+
+class ResultCache:
+    """
+    Persistent, size-bounded LRU cache of comparison tables stored in a SQLite file.
+
+    Every process opens its own connection; SQLite serialises the writers and the
+    write-ahead log lets readers proceed concurrently, so one cache file can be shared
+    by several worker processes. Recent hits are also kept in memory for the
+    fastest possible repeated lookups.
+
+    A hit refreshes the entry's last access time only when the stored time is older
+    than access_interval, so repeated reads of a hot entry do not write to the file.
+    Eviction order is therefore exact to within access_interval seconds.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, memory_items=256, access_interval=60.0):
+        """
+        Args:
+            path (str): Path of the SQLite database file
+            max_bytes (int): Maximum total size of the stored tables
+            memory_items (int): Number of tables kept in the in-process LRU
+            access_interval (float): Minimum seconds between two last access updates of an entry
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.access_interval = access_interval
+        self._memory = OrderedDict()
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    def _remember(self, key, table_data):
+        self._memory[key] = table_data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the cached table for a key, or None if it is not cached.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        row = self._connection.execute("SELECT value, last_access FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] >= self.access_interval:
+            self._connection.execute("UPDATE results SET last_access = ? WHERE key = ? AND last_access < ?",
+                                     (now, key, now - self.access_interval))
+        table_data = decode_table(row[0])
+        self._remember(key, table_data)
+        return table_data
+
+    def put(self, key, table_data):
+        """
+        Store a table and evict the least recently used entries beyond max_bytes.
+        """
+        blob = encode_table(table_data)
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total_size > self.max_bytes:
+                evicted = []
+                for old_key, size in connection.execute(
+                        "SELECT key, size FROM results WHERE key != ? ORDER BY last_access", (key,)):
+                    if total_size <= self.max_bytes:
+                        break
+                    evicted.append((old_key,))
+                    total_size -= size
+                connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+                for (old_key,) in evicted:
+                    self._memory.pop(old_key, None)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._remember(key, table_data)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def cached_run_comparison(profile=None, cache=None):
+    """
+    Run the comparison for a profile, serving repeated profiles from a ResultCache.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        cache (ResultCache): Cache to read from and write to (None disables caching)
+
+    Returns:
+        list: Mortality comparison table
+    """
+    if cache is None:
+        return run_comparison(profile)
+    key = profile_cache_key(profile)
+    table_data = cache.get(key)
+    if table_data is None:
+        table_data = run_comparison(profile)
+        cache.put(key, table_data)
+    return table_data
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Checkpointed cohort runs
+# ------------------------------------------------------------------------------------------------------------------------------
+class ProgressReporter:
+    """
+    Report the progress of a long run (done/total, rate, ETA) on a stream and/or a status file.
+    """
+    def __init__(self, total, done=0, stream=sys.stderr, status_file=None, interval=1.0):
+        self.total = total
+        self.done = done
+        self.stream = stream
+        self.status_file = status_file
+        self.interval = interval
+        self._start_time = time.monotonic()
+        self._start_done = done
+        self._last_report = 0.0
+        self._reported_done = None
+
+    def status(self):
+        """
+        Return the current progress as a dict (done, total, rate per second, ETA in seconds).
+        """
+        elapsed = time.monotonic() - self._start_time
+        rate = (self.done - self._start_done) / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else None
+        return {"done": self.done, "total": self.total, "rate": rate, "eta_seconds": eta}
+
+    def resume(self, done):
+        """
+        Continue from items completed before this run (e.g. restored from a checkpoint),
+        measuring the rate only over the items completed from now on.
+        """
+        self.done = done
+        self._start_done = done
+        self._start_time = time.monotonic()
+
+    def update(self, count=1, force=False):
+        """
+        Record completed items and report if the reporting interval has passed.
+        """
+        self.done += count
+        now = time.monotonic()
+        if self.done == self._reported_done:
+            return
+        if not force and now - self._last_report < self.interval and self.done < self.total:
+            return
+        self._last_report = now
+        self._reported_done = self.done
+        status = self.status()
+        if self.stream is not None:
+            eta = "--:--:--" if status["eta_seconds"] is None else time.strftime("%H:%M:%S", time.gmtime(status["eta_seconds"]))
+            percent = 100 * self.done / self.total if self.total else 100.0
+            print(f"\r{self.done}/{self.total} ({percent:.1f}%) {status['rate']:.1f}/s ETA {eta}",
+                  end="\n" if self.done >= self.total else "", file=self.stream, flush=True)
+        if self.status_file is not None:
+            write_file_atomic(self.status_file, json.dumps(status).encode("utf-8"))
+
+def write_file_atomic(path, data):
+    """
+    Write a file so that readers (and a restart after a crash) see either the old or the new contents.
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+def cohort_fingerprint(profiles):
+    """
+    Identify a cohort run by the cache keys of its profiles (which include MODEL_VERSION).
+    """
+    digest = hashlib.sha256()
+    for profile in profiles:
+        digest.update(profile_cache_key(profile).encode("ascii"))
+    return digest.hexdigest()
+
+def run_cohort_checkpointed(profiles, checkpoint_dir, chunk_size=256, processes=None, progress=None, monthly=False):
+    """
+    Run a cohort in chunks that are committed to disk as they complete.
+
+    Each chunk is written atomically to its own file and then recorded in manifest.json.
+    After a crash or preemption, calling again with the same profiles and directory skips
+    the committed chunks. A directory holding a different cohort, chunk size, death timing
+    or model version is rejected rather than mixed.
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+        checkpoint_dir (str): Directory for the manifest and chunk files
+        chunk_size (int): Officers per committed chunk
+        processes (int): Worker processes per chunk (None runs serially with run_cohort)
+        progress (ProgressReporter): Progress reporter (default: report on stderr)
+        monthly (bool): Value a death in every month instead of every year (see value_death_months)
+
+    Returns:
+        list: Mortality comparison table of each officer, in input order
+    """
+    profiles = list(profiles)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, "manifest.json")
+    fingerprint = cohort_fingerprint(profiles)
+    chunk_count = -(-len(profiles) // chunk_size)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        if (manifest["fingerprint"], manifest["chunk_size"], manifest.get("monthly", False)) != (
+                fingerprint, chunk_size, monthly):
+            raise ValueError(f"{checkpoint_dir} holds checkpoints of a different cohort run")
+    else:
+        manifest = {"fingerprint": fingerprint, "model_version": MODEL_VERSION, "total": len(profiles),
+                    "chunk_size": chunk_size, "monthly": monthly, "completed": {}}
+        write_file_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    completed = manifest["completed"]
+    if progress is None:
+        progress = ProgressReporter(len(profiles))
+    progress.resume(sum(entry["rows"] for entry in completed.values()))
+
+    for chunk in range(chunk_count):
+        if str(chunk) in completed:
+            continue
+        chunk_profiles = profiles[chunk * chunk_size:(chunk + 1) * chunk_size]
+        if processes is None:
+            tables = run_cohort(chunk_profiles, monthly)
+        else:
+            tables = run_cohort_parallel(chunk_profiles, processes, monthly=monthly)
+        blobs = [encode_table(table_data) for table_data in tables]
+        file_name = f"chunk-{chunk:06d}.bin"
+        write_file_atomic(os.path.join(checkpoint_dir, file_name),
+                          b"".join(struct.pack("<Q", len(blob)) + blob for blob in blobs))
+        completed[str(chunk)] = {"file": file_name, "rows": len(tables)}
+        write_file_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+        progress.update(len(tables))
+    progress.update(0, force=True)
+    return load_checkpointed_results(checkpoint_dir)
+
+def load_checkpointed_results(checkpoint_dir):
+    """
+    Read the tables of the completed chunks of a checkpointed cohort run, in input order.
+    """
+    with open(os.path.join(checkpoint_dir, "manifest.json")) as file:
+        manifest = json.load(file)
+    results = []
+    for chunk in sorted(manifest["completed"], key=int):
+        with open(os.path.join(checkpoint_dir, manifest["completed"][chunk]["file"]), "rb") as file:
+            data = file.read()
+        position = 0
+        while position < len(data):
+            (size,) = struct.unpack_from("<Q", data, position)
+            results.append(decode_table(data[position + 8:position + 8 + size]))
+            position += 8 + size
+    return results
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Columnar result store
+# ------------------------------------------------------------------------------------------------------------------------------
+RESULT_STORE_VERSION = 1
+RESULT_STORE_COLUMNS = ("death_age",) + MORTALITY_TABLE_FIELDS
+RESULT_STORE_DTYPES = ("<f8",) * len(RESULT_STORE_COLUMNS)  # Monthly tables have fractional death ages
+
+def _pack_chunk(values, level):
+    """
+    Compress a column chunk. The bytes are shuffled (all first bytes, then all second
+    bytes, ...) before zlib: neighbouring values share their high bytes, which then
+    compress into long runs.
+    """
+    values = np.ascontiguousarray(values)
+    return zlib.compress(values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes(), level)
+
+def _unpack_chunk(blob, dtype, count):
+    """
+    Decompress a column chunk written by _pack_chunk.
+    """
+    dtype = np.dtype(dtype)
+    shuffled = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(dtype.itemsize, count)
+    return np.ascontiguousarray(shuffled.T).view(dtype).reshape(count)
+
+class ResultStoreWriter:
+    """
+    Write the comparison tables of many officers into a columnar result store directory.
+
+    Tables are buffered and written every chunk_officers officers: each column of the
+    chunk is compressed on its own and appended to that column's file. close() writes
+    the per-officer row offsets, the chunk index and the metadata (index.json, last), so
+    an interrupted store is never mistaken for a complete one.
+    """
+
+    def __init__(self, path, chunk_officers=64, level=6):
+        """
+        Args:
+            path (str): Store directory (created if missing)
+            chunk_officers (int): Officers per compressed chunk (the unit a lookup decompresses)
+            level (int): zlib compression level
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_officers = chunk_officers
+        self.level = level
+        self.officer_ids = []
+        self._known_ids = set()
+        self._row_offsets = [0]
+        self._chunks = []  # Per chunk and column: (byte offset, byte length)
+        self._buffer = []
+        self._files = [open(os.path.join(path, name + ".bin"), "wb") for name in RESULT_STORE_COLUMNS]
+
+    def add(self, officer_id, table_data):
+        """
+        Append one officer's mortality comparison table.
+        """
+        officer_id = str(officer_id)
+        if officer_id in self._known_ids:
+            raise ValueError(f"Duplicate officer id: {officer_id}")
+        values = np.asarray(table_data, dtype=np.float64).reshape(len(table_data), -1)
+        if values.shape[1] != len(RESULT_STORE_COLUMNS):
+            raise ValueError(f"Expected {len(RESULT_STORE_COLUMNS)} columns, got {values.shape[1]}")
+        self._known_ids.add(officer_id)
+        self.officer_ids.append(officer_id)
+        self._row_offsets.append(self._row_offsets[-1] + len(values))
+        self._buffer.append(values)
+        if len(self._buffer) == self.chunk_officers:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        ranges = []
+        for column, (file, dtype) in enumerate(zip(self._files, RESULT_STORE_DTYPES)):
+            blob = _pack_chunk(values[:, column].astype(dtype), self.level)
+            ranges.append((file.tell(), len(blob)))
+            file.write(blob)
+        self._chunks.append(ranges)
+        self._buffer = []
+
+    def close(self):
+        """
+        Write the remaining chunk and the index; the store is readable afterwards.
+        """
+        self._flush()
+        for file in self._files:
+            file.close()
+        np.save(os.path.join(self.path, "row_offsets.npy"), np.array(self._row_offsets, dtype=np.int64))
+        np.save(os.path.join(self.path, "chunks.npy"),
+                np.array(self._chunks, dtype=np.int64).reshape(-1, len(RESULT_STORE_COLUMNS), 2))
+        metadata = {
+            "format": RESULT_STORE_VERSION,
+            "model_version": MODEL_VERSION,
+            "ups_policy": ups_policy_key(),
+            "columns": list(RESULT_STORE_COLUMNS),
+            "dtypes": list(RESULT_STORE_DTYPES),
+            "chunk_officers": self.chunk_officers,
+            "officer_ids": self.officer_ids,
+        }
+        write_file_atomic(os.path.join(self.path, "index.json"), json.dumps(metadata).encode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            for file in self._files:
+                file.close()
+
+class ResultStore:
+    """
+    Reader of a columnar result store written by ResultStoreWriter.
+
+    Column files and the row offsets are memory-mapped, and a read decompresses only
+    the chunks it needs. The officer index is a dict, so table(officer_id) is O(1):
+    it decompresses one chunk of each column, whatever the size of the store (and
+    none for further officers of the most recently read chunk).
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Store directory
+        """
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as file:
+            metadata = json.load(file)
+        if metadata["format"] != RESULT_STORE_VERSION:
+            raise ValueError(f"Unsupported result store format {metadata['format']}")
+        self.path = path
+        self.model_version = metadata["model_version"]
+        self.ups_policy = metadata["ups_policy"]
+        self.columns = metadata["columns"]
+        self.dtypes = dict(zip(self.columns, metadata["dtypes"]))
+        self.chunk_officers = metadata["chunk_officers"]
+        self.officer_ids = metadata["officer_ids"]
+        self._positions = {officer_id: position for position, officer_id in enumerate(self.officer_ids)}
+        self.row_offsets = np.load(os.path.join(path, "row_offsets.npy"), mmap_mode="r")
+        self._chunks = np.load(os.path.join(path, "chunks.npy"))
+        self._maps = {}
+        self._recent = (None, {})  # (chunk, column name -> values) of the most recent table lookup
+
+    def __len__(self):
+        return len(self.officer_ids)
+
+    def __contains__(self, officer_id):
+        return str(officer_id) in self._positions
+
+    def _column_map(self, name):
+        if name not in self._maps:
+            if name not in self.dtypes:
+                raise KeyError(f"Unknown column: {name}")
+            with open(os.path.join(self.path, name + ".bin"), "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                self._maps[name] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return self._maps[name]
+
+    def _chunk_rows(self, chunk):
+        first = int(self.row_offsets[chunk * self.chunk_officers])
+        last = int(self.row_offsets[min((chunk + 1) * self.chunk_officers, len(self.officer_ids))])
+        return first, last
+
+    def _read_chunk(self, name, chunk):
+        offset, length = self._chunks[chunk, self.columns.index(name)]
+        first, last = self._chunk_rows(chunk)
+        return _unpack_chunk(self._column_map(name)[offset:offset + length], self.dtypes[name], last - first)
+
+    def table(self, officer_id):
+        """
+        One officer's mortality comparison table (the layout of MORTALITY_TABLE_HEADERS).
+        """
+        try:
+            position = self._positions[str(officer_id)]
+        except KeyError:
+            raise KeyError(f"Unknown officer id: {officer_id}") from None
+        chunk = position // self.chunk_officers
+        if self._recent[0] != chunk:
+            self._recent = (chunk, {name: self._read_chunk(name, chunk) for name in self.columns})
+        chunk_values = self._recent[1]
+        chunk_first, _ = self._chunk_rows(chunk)
+        first = int(self.row_offsets[position]) - chunk_first
+        last = int(self.row_offsets[position + 1]) - chunk_first
+        death_ages = restore_death_ages(chunk_values["death_age"][first:last])
+        values = np.column_stack([chunk_values[name][first:last] for name in self.columns[1:]])
+        return [[death_age] + row for death_age, row in zip(death_ages, values.tolist())]
+
+    def iter_column(self, name):
+        """
+        Scan a column chunk by chunk.
+
+        Yields:
+            tuple: (position of the chunk's first officer, column values of the chunk's rows)
+        """
+        for chunk in range(len(self._chunks)):
+            yield chunk * self.chunk_officers, self._read_chunk(name, chunk)
+
+    def column(self, name):
+        """
+        A column over all officers' rows; split it per officer with row_offsets.
+        """
+        chunks = [values for _, values in self.iter_column(name)]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=self.dtypes[name])
+
+    def column_at_age(self, name, death_age):
+        """
+        A column's value at one death age for every officer (NaN where the table has no such
+        row; the last such row where the death age repeats).
+        """
+        result = np.full(len(self.officer_ids), np.nan)
+        for (first_officer, ages), (_, values) in zip(self.iter_column("death_age"), self.iter_column(name)):
+            last_officer = min(first_officer + self.chunk_officers, len(self.officer_ids))
+            rows_per_officer = np.diff(self.row_offsets[first_officer:last_officer + 1])
+            officer = np.repeat(np.arange(first_officer, last_officer), rows_per_officer)
+            match = ages == death_age
+            result[officer[match]] = values[match]
+        return result
+
+    def close(self):
+        for column_map in self._maps.values():
+            if column_map:
+                column_map.close()
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run_cohort_to_store(profiles, path, officer_ids=None, chunk_officers=64, monthly=False):
+    """
+    Run the comparison for a cohort (sharing salary trajectories, as run_cohort) and
+    write every officer's table into a columnar result store.
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+        path (str): Store directory
+        officer_ids (list): Identifier of each officer (default: the position in profiles)
+        chunk_officers (int): Officers per compressed chunk
+        monthly (bool): Value a death in every month instead of every year (see value_death_months)
+
+    Returns:
+        ResultStore: Reader of the written store
+    """
+    resolved, trajectories = plan_cohort(profiles)
+    officer_ids = [str(i) for i in (range(len(resolved)) if officer_ids is None else officer_ids)]
+    if len(officer_ids) != len(resolved):
+        raise ValueError("officer_ids must have one identifier per profile")
+    with ResultStoreWriter(path, chunk_officers) as writer:
+        for trajectory, start_date, indices in trajectories:
+            for i in indices:
+                writer.add(officer_ids[i], value_cohort_officer(trajectory, start_date, resolved[i], monthly))
+    return ResultStore(path)
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Distributed job queue
+# ------------------------------------------------------------------------------------------------------------------------------
+class JobQueue:
+    """
+    Queue of (profile, UPS policy) comparison jobs in a SQLite file on a shared filesystem.
+
+    A coordinator enqueues the jobs in chunks. Workers on any number of hosts claim a chunk
+    atomically (BEGIN IMMEDIATE), hold it under a lease that they renew while running, and
+    mark it done once its result partition is written (see run_worker). The chunk of a
+    crashed worker is claimed again when its lease expires; after max_attempts claims it is
+    marked failed instead.
+
+    The database stays in SQLite's default rollback-journal mode: the write-ahead log needs
+    shared memory and does not work across hosts. Leases use wall-clock time, so the
+    workers' clocks must roughly agree.
+    """
+
+    STATES = ("pending", "running", "done", "failed")
+
+    def __init__(self, path, lease_seconds=600, max_attempts=None):
+        """
+        Args:
+            path (str): Path of the SQLite database file
+            lease_seconds (float): How long a claim or renewal holds a chunk
+            max_attempts (int): Claims of a chunk before it is marked failed (recorded by enqueue;
+                                default: the queue's recorded value, or 3)
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk INTEGER PRIMARY KEY, jobs TEXT NOT NULL, state TEXT NOT NULL DEFAULT 'pending', "
+            "worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, partition TEXT, error TEXT)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS chunks_state ON chunks (state, chunk)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.max_attempts = max_attempts or int(self.meta().get("max_attempts", 3))
+
+    def _transaction(self, function, *args):
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = function(connection, *args)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return result
+
+    def meta(self):
+        """
+        Return the queue metadata (model version, results directory, job count, max attempts).
+        """
+        return dict(self._connection.execute("SELECT key, value FROM meta").fetchall())
+
+    def enqueue(self, profiles, results_dir, policies=(None,), chunk_size=256, monthly=False):
+        """
+        Enqueue a job for every profile under every UPS policy.
+
+        Job ids number the (policy, profile) combinations policy-major, continuing after the
+        jobs of earlier enqueue calls. Every job of a chunk shares the chunk's policy, so the
+        officers of a chunk can share salary trajectories (see run_cohort).
+
+        Args:
+            profiles (list): Officer profiles overriding DEFAULT_PROFILE (JSON-serializable)
+            results_dir (str): Directory of the result partitions, reachable from every worker
+            policies (list): UPS policies overriding DEFAULT_UPS_POLICY (None: the default policy)
+            chunk_size (int): Jobs per chunk
+            monthly (bool): Value a death in every month instead of every year (see value_death_months)
+
+        Returns:
+            range: Ids of the enqueued jobs
+        """
+        profiles = list(profiles)
+        policy_keys = [ups_policy_key(resolve_policy(policy)) for policy in policies]
+
+        def enqueue_chunks(connection):
+            meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+            if meta.get("model_version", MODEL_VERSION) != MODEL_VERSION:
+                raise ValueError(f"{self.path} holds jobs of model version {meta['model_version']}")
+            if meta.get("results_dir", results_dir) != results_dir:
+                raise ValueError(f"{self.path} writes its results to {meta['results_dir']}")
+            first_job = int(meta.get("jobs", 0))
+            job = first_job
+            rows = []
+            next_chunk = connection.execute("SELECT COALESCE(MAX(chunk) + 1, 0) FROM chunks").fetchone()[0]
+            for policy_key in policy_keys:
+                for start in range(0, len(profiles), chunk_size):
+                    chunk_profiles = profiles[start:start + chunk_size]
+                    jobs = {"policy": json.loads(policy_key), "first_job": job, "monthly": monthly,
+                            "profiles": chunk_profiles}
+                    rows.append((next_chunk + len(rows), json.dumps(jobs)))
+                    job += len(chunk_profiles)
+            connection.executemany("INSERT INTO chunks (chunk, jobs) VALUES (?, ?)", rows)
+            connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("model_version", MODEL_VERSION), ("results_dir", results_dir), ("jobs", str(job)),
+                ("max_attempts", str(self.max_attempts))])
+            return range(first_job, job)
+
+        return self._transaction(enqueue_chunks)
+
+    def claim(self, worker_id):
+        """
+        Claim the first pending chunk, or a running chunk whose lease expired.
+
+        Returns:
+            tuple: (chunk number, jobs dict with "policy", "first_job", "monthly" and "profiles"), or None
+                   when no chunk is available
+        """
+        def claim_chunk(connection):
+            now = time.time()
+            while True:
+                row = connection.execute(
+                    "SELECT chunk, jobs, attempts FROM chunks WHERE state = 'pending' "
+                    "OR (state = 'running' AND lease_expires < ?) ORDER BY chunk LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    return None
+                chunk, jobs, attempts = row
+                if attempts >= self.max_attempts:
+                    connection.execute(
+                        "UPDATE chunks SET state = 'failed', worker = NULL, error = COALESCE(error, ?) WHERE chunk = ?",
+                        (f"Lease expired after {attempts} attempts", chunk))
+                    continue
+                connection.execute(
+                    "UPDATE chunks SET state = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE chunk = ?", (worker_id, now + self.lease_seconds, chunk))
+                return chunk, json.loads(jobs)
+
+        return self._transaction(claim_chunk)
+
+    def _update_owned(self, chunk, worker_id, assignments, values):
+        # Update a running chunk only while the worker still holds its lease
+        cursor = self._connection.execute(
+            f"UPDATE chunks SET {assignments} WHERE chunk = ? AND state = 'running' AND worker = ?",
+            (*values, chunk, worker_id))
+        return cursor.rowcount == 1
+
+    def renew(self, chunk, worker_id):
+        """
+        Extend the lease of a claimed chunk. Returns False if the worker no longer holds it.
+        """
+        return self._update_owned(chunk, worker_id, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, chunk, worker_id, partition):
+        """
+        Mark a claimed chunk done with the name of its result partition.
+        Returns False if the worker no longer holds the chunk.
+        """
+        return self._update_owned(chunk, worker_id, "state = 'done', partition = ?, lease_expires = NULL", (partition,))
+
+    def fail(self, chunk, worker_id, error):
+        """
+        Release a claimed chunk after an error: it is retried until max_attempts, then marked failed.
+        """
+        return self._update_owned(
+            chunk, worker_id, "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = ?", (self.max_attempts, error))
+
+    def status(self):
+        """
+        Return the number of chunks in each state.
+        """
+        counts = dict(self._connection.execute("SELECT state, COUNT(*) FROM chunks GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in self.STATES}
+
+    def partitions(self):
+        """
+        Return (first job id, partition path) of every done chunk, in chunk order.
+        """
+        results_dir = self.meta().get("results_dir", "")
+        return [(json.loads(jobs)["first_job"], os.path.join(results_dir, partition)) for jobs, partition in
+                self._connection.execute("SELECT jobs, partition FROM chunks WHERE state = 'done' ORDER BY chunk")]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run_queue_chunk(jobs, partition_path, queue=None, chunk=None, worker_id=None):
+    """
+    Run the comparison for the jobs of one chunk and write them into a result store partition.
+
+    The partition is written to a temporary directory and renamed into place, so a partition
+    that exists is always complete. Results are deterministic: if another worker already
+    published the partition, it is kept.
+
+    Args:
+        jobs (dict): Jobs of the chunk (see JobQueue.claim)
+        partition_path (str): Final directory of the partition
+        queue (JobQueue): Queue whose lease is renewed after each seniority batch (optional)
+        chunk (int): Chunk number, for renewing the lease
+        worker_id (str): Worker holding the lease
+    """
+    active_policy = ups_policy
+    set_ups_policy(jobs["policy"])
+    try:
+        resolved, trajectories = plan_cohort(jobs["profiles"])
+        tables = [None] * len(resolved)
+        for trajectory, start_date, indices in trajectories:
+            for i in indices:
+                tables[i] = value_cohort_officer(trajectory, start_date, resolved[i], jobs.get("monthly", False))
+            if queue is not None and not queue.renew(chunk, worker_id):
+                raise RuntimeError(f"Lost the lease on chunk {chunk}")
+    finally:
+        set_ups_policy(active_policy)
+
+    temporary_path = f"{partition_path}.{worker_id or os.getpid()}.tmp"
+    with ResultStoreWriter(temporary_path) as writer:
+        for job, table_data in enumerate(tables, start=jobs["first_job"]):
+            writer.add(job, table_data)
+    try:
+        os.rename(temporary_path, partition_path)
+    except OSError:
+        if not os.path.exists(os.path.join(partition_path, "index.json")):
+            raise
+        for name in os.listdir(temporary_path):  # Published by another worker in the meantime
+            os.remove(os.path.join(temporary_path, name))
+        os.rmdir(temporary_path)
+
+def run_worker(queue_path, worker_id=None, lease_seconds=600, poll_interval=5.0, wait=False, max_chunks=None):
+    """
+    Claim and run chunks of a JobQueue until it is drained.
+
+    Args:
+        queue_path (str): Path of the queue database
+        worker_id (str): Name of the worker (default: host name and process id)
+        lease_seconds (float): Lease of a claimed chunk; it is renewed after every seniority batch
+        poll_interval (float): Seconds between polls while other workers hold the remaining chunks
+        wait (bool): Keep polling for new chunks when the queue is empty instead of exiting
+        max_chunks (int): Stop after this many chunks (None: no limit)
+
+    Returns:
+        int: Number of chunks this worker completed
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    completed = 0
+    with JobQueue(queue_path, lease_seconds) as queue:
+        meta = queue.meta()
+        if meta.get("model_version", MODEL_VERSION) != MODEL_VERSION:
+            raise ValueError(f"{queue_path} holds jobs of model version {meta['model_version']}, not {MODEL_VERSION}")
+        results_dir = meta.get("results_dir")
+        if results_dir:
+            os.makedirs(results_dir, exist_ok=True)
+        while max_chunks is None or completed < max_chunks:
+            claimed = queue.claim(worker_id)
+            if claimed is None:
+                status = queue.status()
+                if not wait and status["pending"] == 0 and status["running"] == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+            chunk, jobs = claimed
+            partition = f"part-{chunk:06d}"
+            try:
+                run_queue_chunk(jobs, os.path.join(results_dir, partition), queue, chunk, worker_id)
+            except Exception as error:
+                queue.fail(chunk, worker_id, f"{type(error).__name__}: {error}")
+                continue
+            if queue.complete(chunk, worker_id, partition):
+                completed += 1
+    return completed
+
+def load_queue_results(queue_path):
+    """
+    Read the tables of every completed job of a JobQueue.
+
+    Returns:
+        dict: Job id -> mortality comparison table
+    """
+    with JobQueue(queue_path) as queue:
+        partitions = queue.partitions()
+    results = {}
+    for _, partition_path in partitions:
+        with ResultStore(partition_path) as store:
+            for job in store.officer_ids:
+                results[int(job)] = store.table(job)
+    return results
+
+def worker_main(argv=None):
+    """
+    Command line entry point of a queue worker:
+
+        python NPS_UPS_Comparison.py worker QUEUE.sqlite [--lease SECONDS] [--wait]
+    """
+    parser = argparse.ArgumentParser(prog="NPS_UPS_Comparison.py worker", description="Run chunks of a comparison job queue.")
+    parser.add_argument("queue", help="Path of the SQLite job queue")
+    parser.add_argument("--worker-id", help="Name of the worker (default: host name and process id)")
+    parser.add_argument("--lease", type=float, default=600, help="Lease of a claimed chunk in seconds")
+    parser.add_argument("--poll", type=float, default=5.0, help="Seconds between polls of a busy queue")
+    parser.add_argument("--wait", action="store_true", help="Keep waiting for new chunks when the queue is empty")
+    parser.add_argument("--max-chunks", type=int, help="Stop after this many chunks")
+    args = parser.parse_args(argv)
+    completed = run_worker(args.queue, args.worker_id, args.lease, args.poll, args.wait, args.max_chunks)
+    print(f"Completed {completed} chunks", file=sys.stderr)
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Historical NAV backtest
+# ------------------------------------------------------------------------------------------------------------------------------
+NAV_SCHEMES = ("E", "C", "G")  # NPS equity, corporate bond and government securities schemes
+
+def read_nav_csv(path):
+    """
+    Read a NAV history CSV (date, NAV per row; daily or monthly) into month-end NAVs.
+
+    Args:
+        path (str): CSV file with the date in the first column (YYYY-MM-DD or DD-MM-YYYY)
+                    and the NAV in the second; a header row is skipped
+
+    Returns:
+        dict: Month index (year * 12 + month - 1) -> NAV on the last date of that month
+    """
+    month_end_navs = {}
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            if len(row) < 2:
+                continue
+            try:
+                nav = float(row[1])
+            except ValueError:
+                continue  # Header or blank NAV
+            for date_format in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"):
+                try:
+                    nav_date = datetime.strptime(row[0].strip(), date_format).date()
+                    break
+                except ValueError:
+                    pass
+            else:
+                raise ValueError(f"Unrecognised date {row[0]!r} in {path}")
+            month = nav_date.year * 12 + nav_date.month - 1
+            if month not in month_end_navs or nav_date >= month_end_navs[month][0]:
+                month_end_navs[month] = (nav_date, nav)
+    return {month: nav for month, (_, nav) in month_end_navs.items()}
+
+def load_nav_returns(scheme_csvs, cache_path=None):
+    """
+    Load monthly E/C/G returns as a memory-mapped array.
+
+    The CSVs are parsed once into a binary .npy file of (month index, E, C, G returns) rows
+    over the months common to all schemes; later calls map that file without parsing,
+    until one of the CSVs is modified.
+
+    Args:
+        scheme_csvs (dict): Scheme ("E", "C", "G") -> NAV history CSV path
+        cache_path (str): Binary array file (default: nav_returns.npy next to the E scheme CSV)
+
+    Returns:
+        np.memmap: Read-only (months x 4) array of month index and E, C, G monthly returns
+    """
+    if cache_path is None:
+        cache_path = os.path.join(os.path.dirname(os.path.abspath(scheme_csvs["E"])), "nav_returns.npy")
+    csv_modified = max(os.path.getmtime(scheme_csvs[scheme]) for scheme in NAV_SCHEMES)
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < csv_modified:
+        navs = [read_nav_csv(scheme_csvs[scheme]) for scheme in NAV_SCHEMES]
+        months = sorted(set.intersection(*(set(scheme_navs) for scheme_navs in navs)))
+        if len(months) < 2 or months[-1] - months[0] != len(months) - 1:
+            raise ValueError("NAV histories must share at least two consecutive months without gaps")
+        nav_table = np.array([[scheme_navs[month] for scheme_navs in navs] for month in months])
+        returns = np.empty((len(months) - 1, 4))
+        returns[:, 0] = months[1:]
+        returns[:, 1:] = nav_table[1:] / nav_table[:-1] - 1
+        temporary_path = f"{cache_path}.tmp.npy"
+        np.save(temporary_path, returns)
+        os.replace(temporary_path, cache_path)
+    return np.load(cache_path, mmap_mode="r")
+
+def backtest_nps_corpus(profile=None, nav_returns=None, wrap=False):
+    """
+    Replay the officer's NPS contributions over historical scheme returns, once per start month.
+
+    Start month s applies the historical return of month s + k to the k-th month of
+    service, for every start month at once. By default only start months with a full
+    historical window are used. With wrap=True the history is replayed cyclically, so
+    every historical month can be a start month (and a history shorter than the career
+    can be used), at the cost of joining the end of the history to its beginning.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        nav_returns (np.ndarray): Array from load_nav_returns
+        wrap (bool): Wrap around the end of the history (otherwise only full windows are used)
+
+    Returns:
+        dict: "start_months" (dates), "retirement_corpus" and "monthly_pension" per start month,
+              "percentiles" (5/25/50/75/95 of the retirement corpus), "assumed_corpus"
+              (the corpus at the profile's constant returns), "history_months" and a "note"
+              when fewer start months than historical months are available (None otherwise)
+    """
+    profile = resolve_profile(profile)
+    _, trajectories = plan_cohort([profile])
+    columns = accumulate_ledger_corpora(trajectories[0][0], profile)
+    salary = columns["monthly_salary"]
+    service_months = len(salary)
+
+    history = len(nav_returns)
+    start_count = history if wrap else history - service_months + 1
+    if start_count <= 0:
+        raise ValueError(f"NAV history of {history} months is shorter than the career of {service_months} months "
+                         "(wrap=True replays it cyclically)")
+    note = None
+    if start_count < history:
+        note = (f"Only {start_count} of {history} historical months start a full {service_months}-month window "
+                "(wrap=True uses every month)")
+    month_index = (np.arange(start_count)[:, None] + np.arange(service_months)) % history
+
+    equity_allocation = life_cycle_allocation(service_months, profile["life_cycle_fund"])
+    remaining_allocation = 1.0 - equity_allocation
+    monthly_return = (
+        equity_allocation * nav_returns[month_index, 1] +
+        remaining_allocation * 0.6 * nav_returns[month_index, 2] +
+        remaining_allocation * 0.4 * nav_returns[month_index, 3]
+    )
+    govt_rate = np.where(columns["year"] >= 2019, 0.14, 0.12)
+    corpus = accumulate_corpus(np.broadcast_to(salary * (0.1 + govt_rate), monthly_return.shape), 1 + monthly_return)
+    retirement_corpus = corpus[:, -1]
+
+    start_months = [date(int(month) // 12, int(month) % 12 + 1, 1) for month in nav_returns[:start_count, 0]]
+    return {
+        "start_months": start_months,
+        "retirement_corpus": retirement_corpus,
+        "monthly_pension": retirement_corpus * (1 - profile["withdrawal_percentage"]) * profile["annuity_rate"] / 12,
+        "percentiles": dict(zip((5, 25, 50, 75, 95), np.percentile(retirement_corpus, [5, 25, 50, 75, 95]).tolist())),
+        "assumed_corpus": float(columns["nps_corpus"][-1]),
+        "history_months": history,
+        "note": note,
+    }
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Stochastic inflation and fitment simulation
+# ------------------------------------------------------------------------------------------------------------------------------
+def sample_inflation_paths(mean_rate, years, paths, volatility=0.015, persistence=0.5, rng=None):
+    """
+    Sample annual inflation paths as an AR(1) process around the mean rate.
+
+    Args:
+        mean_rate (float): Long-run annual inflation rate
+        years (int): Number of years per path
+        paths (int): Number of paths
+        volatility (float): Standard deviation of the yearly inflation shock
+        persistence (float): Share of last year's deviation from the mean carried into this year
+        rng (np.random.Generator): Random generator
+
+    Returns:
+        np.ndarray: (paths x years) annual inflation rates
+    """
+    rng = rng or np.random.default_rng()
+    shocks = rng.standard_normal((paths, years)) * volatility
+    deviation = np.zeros(paths)
+    inflation = np.empty((paths, years))
+    for year in range(years):
+        deviation = persistence * deviation + shocks[:, year]
+        inflation[:, year] = mean_rate + deviation
+    return inflation
+
+def pay_commission_tables(basic_pay, years_in_scale, fitment_factors):
+    """
+    Basic pay of every level after each pay commission, for many fitment factor paths
+    (the batched form of update_pay_scales_for_pay_commission).
+
+    Args:
+        basic_pay (np.ndarray): Base basic pay of each level
+        years_in_scale (np.ndarray): Years spent in each level
+        fitment_factors (np.ndarray): (paths x pay commissions) fitment factors
+
+    Returns:
+        np.ndarray: (paths x pay commissions + 1 x levels) basic pay
+    """
+    paths, count = fitment_factors.shape
+    table = np.empty((paths, count + 1, len(basic_pay)))
+    table[:, 0] = basic_pay
+    for era in range(1, count + 1):
+        for i in range(len(basic_pay)):
+            previous_level_basic_pay = table[:, era, i - 1] if i > 0 else table[:, era - 1, i]
+            table[:, era, i] = np.maximum(table[:, era - 1, i] * fitment_factors[:, era - 1],
+                                          previous_level_basic_pay * (1.03 ** (years_in_scale[i] + 2)))
+    return table
+
+def summarize_distribution(values, percentiles=(5, 25, 50, 75, 95)):
+    """
+    Mean, standard deviation and percentiles of simulated values along the path axis (axis 0).
+    """
+    values = np.asarray(values, dtype=float)
+    summary = {"mean": values.mean(axis=0), "std": values.std(axis=0)}
+    for percentile, value in zip(percentiles, np.percentile(values, percentiles, axis=0)):
+        summary[f"p{percentile}"] = value
+    return summary
+
+def simulate_ups(profile=None, paths=10000, death_ages=(75, 85, 95), inflation_volatility=0.015,
+                 inflation_persistence=0.5, fitment_volatility=0.05, seed=None, policy=None):
     """
-    Generate a CSV file from the given headers and table data.
-    
-    Parameters:
-    - headers: List of column headers.
-    - table_data: List of rows, where each row is a list of column values.
-    - output_file: Path to the output CSV file.
+    Simulate UPS outcomes under random inflation paths and pay commission fitment factors.
+
+    Each path samples annual inflation (sample_inflation_paths). Each pay commission's
+    fitment factor is Ackroyd's formula on that path's inflation over the previous ten
+    years, plus an independent shock. Both are propagated through the salary ledger,
+    the benchmark and individual corpora, the UPS payout at retirement, the pension
+    revisions after retirement and the inflation discounting. All paths are computed
+    as one batch. With zero volatilities every path equals the deterministic valuation.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        paths (int): Number of simulated paths
+        death_ages (iterable): Death ages to value (death year = birth year + age; not before the retirement age)
+        inflation_volatility (float): Standard deviation of the yearly inflation shock
+        inflation_persistence (float): AR(1) persistence of inflation
+        fitment_volatility (float): Standard deviation of the fitment factor shock
+        seed (int): Random seed
+        policy (dict): UPS policy overriding DEFAULT_UPS_POLICY (default: the active policy)
+
+    Returns:
+        dict: "death_ages"; (paths x death ages) "ups_value", "ups_nominal" and "ups_monthly_pension";
+              per path "initial_pension", "ups_lump_sum" and the in-service "fitment_factors";
+              "summary" of ups_value (see summarize_distribution)
     """
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)  # Write headers
-        writer.writerows(table_data)  # Write rows
-    print(f"CSV file saved to {output_file}")
+    profile = resolve_profile(profile)
+    policy = ups_policy if policy is None else resolve_policy(policy)
+    rng = np.random.default_rng(seed)
+    _, trajectories = plan_cohort([profile])
+    columns = trajectories[0][0]
+    months = columns["year"] * 12 + columns["month"] - 1
+    service_months = len(months) - 1
 
-def generate_markdown_table(headers, table_data, output_file):
+    birth_year_, birth_month_ = profile["birth_year"], profile["birth_month"]
+    joining_year = profile["year_of_joining"]
+    retirement_year = birth_year_ + profile["retirement_age"]
+    pension_base_year = birth_year_ + profile["normal_retirement_age"]
+    death_years = birth_year_ + np.asarray(list(death_ages), dtype=int)
+    if death_years.min(initial=retirement_year) < retirement_year:
+        raise ValueError("Death ages cannot be before the retirement age")
+
+    # Inflation by calendar year; years before joining are taken at the mean rate
+    mean_rate = profile["inflation_rate"]
+    first_year = joining_year - 10
+    last_year = max(death_years.max(initial=retirement_year), retirement_year + profile["spouse_age_difference"]) + 1
+    inflation = np.full((paths, last_year - first_year + 1), mean_rate)
+    inflation[:, joining_year - first_year:] = sample_inflation_paths(
+        mean_rate, last_year - joining_year + 1, paths, inflation_volatility, inflation_persistence, rng)
+    cumulative_inflation = np.concatenate((np.ones((paths, 1)), np.cumprod(1 + inflation, axis=1)), axis=1)
+
+    def fitment_at(years):
+        # Ackroyd's formula on the realised inflation of the ten years before each revision
+        years = np.asarray(years, dtype=int) - first_year
+        realised = cumulative_inflation[:, years] / cumulative_inflation[:, years - 10]
+        shocks = rng.standard_normal((paths, len(years))) * fitment_volatility
+        return profile["fitment_factor"] + realised - (1 + mean_rate) ** 10 + shocks
+
+    # Salary ledger of every path: pay scales revised with each path's fitment factors
+    joining_date = date(joining_year, profile["month_of_joining"], 1)
+    retirement_date = date(retirement_year, birth_month_, 1)
+    pay_commission_years = [year for year in range(SEVENTH_PAY_COMMISSION_YEAR, 2100, profile["pay_commission_interval"])
+                            if joining_date <= date(year, APRIL, 1) <= retirement_date]
+    fitment_factors = fitment_at(pay_commission_years)
+    pay_scales = service_pay_scales(profile["service"])
+    basic_pay_tables = pay_commission_tables(
+        np.array([scale["basic_pay"] for scale in pay_scales], dtype=float),
+        np.array([scale["years_in_scale"] for scale in pay_scales], dtype=float),
+        fitment_factors
+    )
+    era = np.searchsorted(np.array([year * 12 + APRIL - 1 for year in pay_commission_years], dtype=int), months, side="right")
+    position = np.searchsorted([scale["level"] for scale in pay_scales], columns["pay_level"])
+    basic_pay = basic_pay_tables[:, era, position] * 1.03 ** columns["increments"]
+    salary = basic_pay + (0.53 * basic_pay)  # Add Dearness Allowance (DA)
+
+    # Benchmark and individual corpus at retirement (linear in the contributions)
+    nav_growth = 1 + profile["pension_fund_nav_rate"] / 12
+    switch_date = policy["switch_date"]
+    benchmark_corpus = (salary * policy["benchmark_contribution_rate"]) @ nav_growth ** np.arange(len(months), 0, -1)
+    switch_position = np.searchsorted(months, switch_date.year * 12 + switch_date.month - 1, side="right")
+    nps_growth = nps_monthly_growth(len(months), profile)[:switch_position]
+    nps_contributions = salary[:, :switch_position] * (0.1 + np.where(columns["year"][:switch_position] >= 2019, 0.14, 0.12))
+    nps_at_switch = nps_contributions @ np.cumprod(nps_growth[::-1])[::-1]
+    individual_corpus = (nps_at_switch * nav_growth ** (len(months) - switch_position)
+                         + (salary[:, switch_position:] * policy["individual_contribution_rate"])
+                         @ nav_growth ** np.arange(len(months) - switch_position, 0, -1))
+    window = min(12, len(months))
+    initial_pension, lump_sum = ups_payout_at_retirement(
+        salary[:, -window:].mean(axis=1), benchmark_corpus, individual_corpus,
+        service_months, profile["withdrawal_percentage"], policy)
+
+    # Pension revisions after the pension base year: path fitment at pay commissions, 2% DR otherwise
+    horizon = max(int(death_years.max(initial=pension_base_year)) - pension_base_year, 0)
+    offsets = np.arange(horizon + 1)
+    revision = (offsets > 0) & (offsets % profile["pay_commission_interval"] == 0)
+    yearly_factors = np.where(revision, 1.0, 1.02)
+    yearly_factors = np.broadcast_to(np.where(offsets > 0, yearly_factors, 1.0), (paths, horizon + 1)).copy()
+    yearly_factors[:, revision] = fitment_at(pension_base_year + offsets[revision])
+    multipliers = np.cumprod(yearly_factors, axis=1)
+
+    # Discount factors by years since retirement from each path's inflation
+    retirement_inflation = inflation[:, retirement_year - first_year:]
+    discount = np.concatenate((np.ones((paths, 1)),
+                               np.cumprod((1 + retirement_inflation / 12) ** -12.0, axis=1)), axis=1)
+    first_year_factor = (1 + retirement_inflation[:, 0] / 12) ** -(12 - birth_month_)
+    pension_lag = pension_base_year - retirement_year
+
+    paid_offset = np.clip(death_years - pension_base_year, 0, None)
+    has_pension = death_years >= pension_base_year
+    discounted_multipliers = np.cumsum(multipliers * discount[:, pension_lag:pension_lag + horizon + 1], axis=1)
+    officer_value = 12 * initial_pension[:, None] * (
+        discounted_multipliers[:, paid_offset]
+        + (pension_lag == 0) * ((first_year_factor - 1) * multipliers[:, 0])[:, None]
+    )
+    officer_nominal = 12 * initial_pension[:, None] * np.cumsum(multipliers, axis=1)[:, paid_offset]
+    officer_value = np.where(has_pension, officer_value, 0)
+    officer_nominal = np.where(has_pension, officer_nominal, 0)
+
+    # Spouse's family pension (60% by default) with yearly DR, discounted from the officer's death
+    spouse_end_year = retirement_year + profile["spouse_age_difference"]
+    survives = death_years < spouse_end_year
+    spouse_years = np.where(survives, spouse_end_year - death_years, 0)
+    death_offset = death_years - retirement_year
+    spouse_offsets = np.arange(discount.shape[1])
+    growth_discount = np.cumsum(1.02 ** spouse_offsets * discount, axis=1)
+    previous = np.where(death_offset > 0, growth_discount[:, np.maximum(death_offset - 1, 0)], 0)
+    spouse_factor = ((growth_discount[:, death_offset + spouse_years] - previous)
+                     / (1.02 ** death_offset * discount[:, death_offset]))
+    monthly_pension = initial_pension[:, None] * multipliers[:, paid_offset]
+    family_pension = monthly_pension * policy["family_pension_share"]
+    spouse_value = np.where(survives, 12 * family_pension * spouse_factor, 0)
+    spouse_nominal = np.where(survives, 12 * family_pension * np.cumsum(1.02 ** spouse_offsets)[spouse_years], 0)
+
+    ups_value = officer_value + spouse_value + lump_sum[:, None]
+    return {
+        "death_ages": death_years - birth_year_,
+        "ups_value": ups_value,
+        "ups_nominal": officer_nominal + spouse_nominal + lump_sum[:, None],
+        "ups_monthly_pension": monthly_pension,
+        "initial_pension": initial_pension,
+        "ups_lump_sum": lump_sum,
+        "fitment_factors": fitment_factors,
+        "summary": summarize_distribution(ups_value),
+    }
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Stochastic mortality
+# ------------------------------------------------------------------------------------------------------------------------------
+MAX_LIFE_TABLE_AGE = 110
+
+def gompertz_makeham_life_table(a, b, c, max_age=MAX_LIFE_TABLE_AGE):
     """
-    Generate a Markdown table from the given headers and table data and save it to a file.
-    
-    Parameters:
-    - headers: List of column headers.
-    - table_data: List of rows, where each row is a list of column values.
-    - output_file: Path to the output Markdown file.
+    One-year death probabilities q(x) for ages 0..max_age from the force of mortality a + b * exp(c * x).
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # Write headers
-        f.write("| " + " | ".join(headers) + " |\n")
-        f.write("|" + " --- |" * len(headers) + "\n")
-        
-        # Write rows
-        for row in table_data:
-            f.write("| " + " | ".join(str(col) for col in row) + " |\n")
-    print(f"Markdown table saved to {output_file}")
+    ages = np.arange(max_age + 1)
+    death_probability = 1 - np.exp(-(a + b * np.exp(c * ages)))
+    death_probability[-1] = 1.0
+    return death_probability
 
-def generate_markdown_file(headers, table_data, salary_progression, inputs, summary, output_file):
+# Default life tables: Gompertz-Makeham curves with a life expectancy at 60 of about 17.5 years
+# (male) and 19.5 years (female). Load an actual life table with load_life_table when available.
+DEFAULT_LIFE_TABLES = {
+    "male": gompertz_makeham_life_table(0.0005, 4.6e-5, 0.095),
+    "female": gompertz_makeham_life_table(0.0005, 3.6e-5, 0.095),
+}
+
+def load_life_table(path):
     """
-    Generate a Markdown file containing inputs, salary progression, a comparison table, and a summary.
-    
-    Parameters:
-    - headers: List of column headers for the comparison table.
-    - table_data: List of rows for the comparison table.
-    - salary_progression: List of salary progression rows.
-    - inputs: Dictionary of inputs and their values.
-    - summary: List of tuples summarizing which system is better at different death ages.
-    - output_file: Path to the output Markdown file.
+    Read a life table CSV of (age, q(x)) rows; missing ages are filled from the previous age
+    and everyone dies by MAX_LIFE_TABLE_AGE.
+
+    Returns:
+        np.ndarray: One-year death probability by age (0..MAX_LIFE_TABLE_AGE)
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # Write inputs section
-        f.write("# Monthly-Based Corpus Comparison (UPS vs NPS with RoP Annuity)\n\n")
-        f.write("## Inputs\n\n")
-        for key, value in inputs.items():
-            f.write(f"- **{key}**: {value}\n")
-        f.write("\n---\n\n")
+    death_probability = np.full(MAX_LIFE_TABLE_AGE + 1, np.nan)
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            try:
+                age, probability = int(row[0]), float(row[1])
+            except (ValueError, IndexError):
+                continue  # Header or blank row
+            if 0 <= age <= MAX_LIFE_TABLE_AGE:
+                death_probability[age] = probability
+    for age in range(1, MAX_LIFE_TABLE_AGE + 1):
+        if np.isnan(death_probability[age]):
+            death_probability[age] = death_probability[age - 1]
+    death_probability[-1] = 1.0
+    return np.nan_to_num(death_probability)
 
-        # Write salary progression section
-        f.write("## Salary Progression\n\n")
-        f.write("| Year | Month | Pay Level | Basic Pay (₹) | Monthly Salary (₹) | NPS Corpus (₹) |\n")
-        f.write("|------|-------|-----------|----------------|---------------------|-----------------|\n")
-        for row in salary_progression:
-            f.write(f"| {row['year']} | {row['month']} | Level {row['pay_level']} | ₹ {row['basic_pay']:.2f} | ₹ {row['monthly_salary']:.2f} | ₹ {row['nps_corpus']:.2f} |\n")
-        f.write("\n---\n\n")
+def death_age_distribution(life_table, from_age):
+    """
+    Distribution of the integer death age of a person alive at from_age.
 
-        # Write comparison table section
-        f.write("## NPS vs UPS Comparison Across Different Death Ages\n\n")
-        f.write("| " + " | ".join(headers) + " |\n")
-        f.write("|" + " --- |" * len(headers) + "\n")
-        for row in table_data:
-            f.write("| " + " | ".join(str(col) for col in row) + " |\n")
-        f.write("\n---\n\n")
+    Returns:
+        tuple of np.ndarray: (death ages, probabilities)
+    """
+    from_age = min(max(int(from_age), 0), len(life_table) - 1)
+    conditional = life_table[from_age:]
+    survival = np.concatenate(([1.0], np.cumprod(1 - conditional)[:-1]))
+    probabilities = survival * conditional
+    return np.arange(from_age, len(life_table)), probabilities / probabilities.sum()
 
-        # Write summary section
-        f.write("## Summary: Which System Is Better at Different Death Ages\n\n")
-        if summary:
-            for age, system, ups_value, nps_value in summary:
-                f.write(f"- From age **{age}**: **{system}** is better\n")
-                f.write(f"  - UPS Value: ₹ {ups_value:,.2f}\n")
-                f.write(f"  - NPS Value: ₹ {nps_value:,.2f}\n")
-                f.write(f"  - Difference: ₹ {abs(ups_value - nps_value):,.2f}\n\n")
-        else:
-            f.write("No data available for comparison.\n")
-        f.write("\n---\n\n")
-    print(f"Markdown file saved to {output_file}")
+def build_survival_value_grid(profile=None, last_spouse_death_year=None):
+    """
+    Value UPS and NPS for every (officer death year x spouse death year) combination.
+
+    The deterministic valuation takes spouse survival as spouse_age_difference: the years
+    after retirement for deaths after retirement, and the years after the officer's death
+    for deaths in service. Each cell is valued with the spouse_age_difference that puts
+    the spouse's death in that cell's year. The ledger and corpora are computed once.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        last_spouse_death_year (int): Last spouse death year to tabulate
+                                      (default: the officer's birth year + MAX_LIFE_TABLE_AGE)
+
+    Returns:
+        dict: "death_years" and "spouse_death_years" axes and (officer x spouse) "ups_value"
+              and "nps_value" matrices; the first spouse death year means no surviving spouse
+    """
+    profile = resolve_profile(profile)
+    _, trajectories = plan_cohort([profile])
+    columns = accumulate_ledger_corpora(trajectories[0][0], profile)
+    retirement_year = profile["birth_year"] + profile["retirement_age"]
+    grids = {}
+
+    def grid_for(spouse_age_difference):
+        if spouse_age_difference not in grids:
+            grids[spouse_age_difference] = value_ledger_grid(
+                columns, {**profile, "spouse_age_difference": int(spouse_age_difference)}, [profile["retirement_age"]])
+        return grids[spouse_age_difference]
+
+    death_years = grid_for(profile["spouse_age_difference"])["death_years"]
+    if last_spouse_death_year is None:
+        last_spouse_death_year = profile["birth_year"] + MAX_LIFE_TABLE_AGE
+    spouse_death_years = np.arange(death_years[0] - 1, max(last_spouse_death_year, death_years[0]) + 1)
+    ups_value = np.empty((len(death_years), len(spouse_death_years)))
+    nps_value = np.empty_like(ups_value)
+    in_service = np.nonzero(death_years < retirement_year)[0]
+    for column, spouse_death_year in enumerate(spouse_death_years.tolist()):
+        # Deaths after retirement: the spouse lives until the retirement year + spouse_age_difference
+        grid = grid_for(max(spouse_death_year - retirement_year, death_years[0] - retirement_year))
+        ups_value[:, column] = grid["ups_value"][0]
+        nps_value[:, column] = grid["nps_value"][0]
+        # Deaths in service: the family pension runs for spouse_age_difference years after the death
+        for row in in_service.tolist():
+            grid = grid_for(max(spouse_death_year - int(death_years[row]), -1))
+            ups_value[row, column] = grid["ups_value"][0, row]
+            nps_value[row, column] = grid["nps_value"][0, row]
+    return {"death_years": death_years, "spouse_death_years": spouse_death_years,
+            "ups_value": ups_value, "nps_value": nps_value}
+
+def sample_ups_vs_nps(profiles, draws=1_000_000, spouse_age_gap=3, officer_sex="male", spouse_sex="female",
+                      life_tables=None, seed=None):
+    """
+    Estimate the probability that UPS beats NPS over sampled officer and spouse lifetimes.
+
+    Lifetimes are drawn independently from the life tables, for an officer alive at the
+    first death age of the valuation grid and a spouse alive at the same time. Each draw
+    is valued by a lookup in the officer's build_survival_value_grid; officer deaths
+    after the grid's last year take the last year's values.
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+        draws (int): Sampled (officer, spouse) lifetime pairs per officer
+        spouse_age_gap (int): Years the spouse is younger than the officer (negative if older)
+        officer_sex (str): Life table of the officer
+        spouse_sex (str): Life table of the spouse
+        life_tables (dict): Sex -> death probability by age (default: DEFAULT_LIFE_TABLES)
+        seed (int): Random seed
+
+    Returns:
+        list: Per officer dict with "p_ups_better", "mean_difference" (UPS - NPS inflation-adjusted value),
+              "p5_difference", "p95_difference" and "expected_shortfall_5" (mean of the worst 5% of differences)
+    """
+    life_tables = life_tables or DEFAULT_LIFE_TABLES
+    rng = np.random.default_rng(seed)
+    results = []
+    for profile in profiles:
+        profile = resolve_profile(profile)
+        birth_year_ = profile["birth_year"]
+        spouse_birth_year = birth_year_ + spouse_age_gap
+        grid = build_survival_value_grid(profile, spouse_birth_year + MAX_LIFE_TABLE_AGE)
+        death_years, spouse_death_years = grid["death_years"], grid["spouse_death_years"]
+        from_age = int(death_years[0]) - birth_year_
+
+        # Probability of each grid row (officer) and column (spouse)
+        ages, probabilities = death_age_distribution(life_tables[officer_sex], from_age)
+        row = np.clip(birth_year_ + ages - death_years[0], 0, len(death_years) - 1)
+        row_probabilities = np.bincount(row, weights=probabilities, minlength=len(death_years))
+        ages, probabilities = death_age_distribution(life_tables[spouse_sex], from_age - spouse_age_gap)
+        column = np.clip(spouse_birth_year + ages - spouse_death_years[0], 0, len(spouse_death_years) - 1)
+        column_probabilities = np.bincount(column, weights=probabilities, minlength=len(spouse_death_years))
+
+        # Draw counts per cell: officer deaths per row, then spouse deaths per column within each row
+        # (the same distribution as drawing every lifetime pair and counting, at O(cells) cost)
+        row_counts = rng.multinomial(draws, row_probabilities / row_probabilities.sum())
+        counts = rng.multinomial(row_counts, column_probabilities / column_probabilities.sum()).ravel()
+
+        # Statistics of the UPS - NPS difference from the per-cell counts
+        difference = (grid["ups_value"] - grid["nps_value"]).ravel()
+        order = np.argsort(difference)
+        sorted_difference, cumulative_counts = difference[order], np.cumsum(counts[order])
+        p5, p95 = sorted_difference[np.searchsorted(cumulative_counts, [0.05 * draws, 0.95 * draws])]
+        tail_draws = max(draws // 20, 1)
+        tail_counts = np.minimum(cumulative_counts, tail_draws) - np.minimum(cumulative_counts - counts[order], tail_draws)
+        results.append({
+            "p_ups_better": float(counts[difference > 0].sum() / draws),
+            "mean_difference": float(counts @ difference / draws),
+            "p5_difference": float(p5),
+            "p95_difference": float(p95),
+            "expected_shortfall_5": float(tail_counts @ sorted_difference / tail_draws),
+        })
+    return results
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Withdrawal and life cycle fund optimizer
+# ------------------------------------------------------------------------------------------------------------------------------
+LIFE_CYCLE_FUNDS = ("LC25", "LC50", "LC75")
+
+def optimize_choices(profile=None, withdrawal_percentages=None, life_cycle_funds=LIFE_CYCLE_FUNDS,
+                     annuity_rates=None, scheme=None, life_table=None, tolerance=0.01, policy=None):
+    """
+    Find the withdrawal percentage and life cycle fund that maximize the expected
+    inflation-adjusted value of an officer who reaches retirement.
+
+    The whole decision grid is valued in one batch: the NPS and individual corpora of all
+    funds are accumulated together, the UPS payout and NPS annuity are broadcast over every
+    (withdrawal, fund, annuity rate) cell, and each cell is averaged over the death ages
+    after retirement weighted by the life table. Annuity rates are scenarios, not choices,
+    so the best choice is reported per annuity rate.
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        withdrawal_percentages (iterable): Withdrawal percentages to compare (default: 0% to 60% in 1% steps)
+        life_cycle_funds (iterable): Life cycle funds to compare
+        annuity_rates (iterable): Annuity rate scenarios (default: the profile's annuity rate)
+        scheme (str): "UPS" or "NPS" to optimize within one scheme (default: the better of the two per cell)
+        life_table (np.ndarray): One-year death probability by age (default: DEFAULT_LIFE_TABLES["male"])
+        tolerance (float): Relative value loss within which a choice counts as equally good
+        policy (dict): UPS policy overriding DEFAULT_UPS_POLICY (default: the active policy)
+
+    Returns:
+        dict: "withdrawal_percentages", "life_cycle_funds" and "annuity_rates" axes, (withdrawal x fund)
+              "ups_value", (withdrawal x fund x annuity rate) "nps_value" and "regret" (loss against the
+              best choice of the annuity rate), and per annuity rate "best" choices and "sensitivity"
+    """
+    if scheme not in (None, "UPS", "NPS"):
+        raise ValueError(f"Unknown scheme '{scheme}'; expected 'UPS' or 'NPS'")
+    profile = resolve_profile(profile)
+    policy = ups_policy if policy is None else resolve_policy(policy)
+    if withdrawal_percentages is None:
+        withdrawal_percentages = np.linspace(0, 0.6, 61)
+    withdrawal = np.clip(np.asarray(list(withdrawal_percentages), dtype=float), 0, 0.6)
+    funds = list(life_cycle_funds)
+    annuity_rates = np.asarray([profile["annuity_rate"]] if annuity_rates is None else list(annuity_rates), dtype=float)
+    life_table = DEFAULT_LIFE_TABLES["male"] if life_table is None else life_table
+
+    # Ledger and benchmark corpus (fund independent), then the NPS corpus of every fund
+    _, trajectories = plan_cohort([profile])
+    trajectory, start_date, _ = trajectories[0]
+    columns = officer_ledger_columns(trajectory, start_date, profile, policy)
+    salary = columns["monthly_salary"]
+    months = len(salary)
+    govt_rate = np.where(columns["year"] >= 2019, 0.14, 0.12)
+    growth = np.stack([nps_monthly_growth(months, {**profile, "life_cycle_fund": fund}) for fund in funds])
+    nps_corpus = accumulate_corpus(np.broadcast_to(salary * (0.1 + govt_rate), growth.shape), growth)
+
+    # Individual corpus: each fund's NPS corpus until the switch, then the policy's contributions at the NAV rate
+    switch_date = policy["switch_date"]
+    switch_position = np.searchsorted(columns["year"] * 12 + columns["month"] - 1,
+                                      switch_date.year * 12 + switch_date.month - 1, side="right")
+    if switch_position >= months:
+        individual_corpus = nps_corpus[:, -1]
+    else:
+        initial = nps_corpus[:, switch_position - 1] if switch_position > 0 else np.zeros(len(funds))
+        post_switch = np.broadcast_to(salary[switch_position:] * policy["individual_contribution_rate"],
+                                      (len(funds), months - switch_position))
+        individual_corpus = accumulate_corpus(post_switch, 1 + profile["pension_fund_nav_rate"] / 12, initial)[:, -1]
+
+    # Death ages after retirement and their probabilities
+    birth_year_, birth_month_ = profile["birth_year"], profile["birth_month"]
+    retirement_year = birth_year_ + profile["retirement_age"]
+    ages, probabilities = death_age_distribution(life_table, profile["retirement_age"])
+    death_years = birth_year_ + ages
+
+    # UPS over (withdrawal x fund x death), NPS over (withdrawal x fund x annuity rate x death)
+    service_months = months - 1
+    adjusted_pension, ups_lump_sum = ups_payout_at_retirement(
+        salary[-12:].mean(), columns["benchmark_corpus"][-1], individual_corpus[None, :],
+        service_months, withdrawal[:, None], policy)
+    ups_value = value_ups_pension(
+        adjusted_pension[..., None], ups_lump_sum[..., None], retirement_year, birth_month_,
+        birth_year_ + profile["normal_retirement_age"], death_years, profile["spouse_age_difference"],
+        policy, profile)[0]
+    nps_value = value_nps_annuity(
+        nps_corpus[None, :, -1, None, None], retirement_year, birth_month_, death_years,
+        annuity_rates[None, None, :, None], profile["spouse_age_difference"], profile["joint_life"],
+        withdrawal=withdrawal[:, None, None, None], profile=profile)[2]
+    expected_ups = ups_value @ probabilities
+    expected_nps = nps_value @ probabilities
+
+    if scheme == "UPS":
+        objective = np.broadcast_to(expected_ups[..., None], expected_nps.shape)
+    elif scheme == "NPS":
+        objective = expected_nps
+    else:
+        objective = np.maximum(expected_ups[..., None], expected_nps)
+    best_value = objective.max(axis=(0, 1))
+    regret = best_value - objective
+
+    best, sensitivity = [], []
+    for a, annuity_rate in enumerate(annuity_rates.tolist()):
+        w, f = np.unravel_index(np.argmax(objective[:, :, a]), objective.shape[:2])
+        chosen_scheme = scheme or ("UPS" if expected_ups[w, f] >= expected_nps[w, f, a] else "NPS")
+        best.append({
+            "annuity_rate": annuity_rate,
+            "withdrawal_percentage": float(withdrawal[w]),
+            "life_cycle_fund": funds[f],
+            "scheme": chosen_scheme,
+            "value": float(best_value[a]),
+        })
+        # How far the choice can move before losing more than the tolerance
+        relative_regret = regret[:, :, a] / max(abs(best_value[a]), 1e-12)
+        near_best = withdrawal[relative_regret[:, f] <= tolerance]
+        sensitivity.append({
+            "withdrawal_range": (float(near_best.min()), float(near_best.max())),
+            "fund_regret": {fund: float(relative_regret[:, i].min()) for i, fund in enumerate(funds)},
+            "scheme_regret": float(abs(expected_ups[w, f] - expected_nps[w, f, a]) / max(abs(best_value[a]), 1e-12)),
+            "near_best_choices": int(np.count_nonzero(relative_regret <= tolerance)),
+        })
+    return {
+        "withdrawal_percentages": withdrawal,
+        "life_cycle_funds": funds,
+        "annuity_rates": annuity_rates,
+        "ups_value": expected_ups,
+        "nps_value": expected_nps,
+        "regret": regret,
+        "best": best,
+        "sensitivity": sensitivity,
+    }
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Sensitivity analysis
+# ------------------------------------------------------------------------------------------------------------------------------
+SENSITIVITY_PARAMETERS = ("equity_return", "inflation_rate", "fitment_factor", "annuity_rate",
+                          "pension_fund_nav_rate", "spouse_age_difference")
+
+def break_even_age(death_ages, ups_value, nps_value, from_age):
+    """
+    Death age from which UPS is worth more than NPS: the first crossing of the value
+    difference at or after from_age, linearly interpolated between death ages.
+    Value arrays may have leading axes (e.g. one row per scenario).
+
+    Returns:
+        np.ndarray: Break-even death age (from_age's first death age if UPS is ahead from the start,
+                    NaN if UPS never catches up)
+    """
+    death_ages = np.asarray(death_ages, dtype=float)
+    difference = np.asarray(ups_value, dtype=float) - np.asarray(nps_value, dtype=float)
+    eligible = death_ages >= from_age
+    ahead = (difference >= 0) & eligible
+    first = np.argmax(ahead, axis=-1)
+    start = np.argmax(eligible)
+    previous = np.maximum(first - 1, 0)
+    before = np.take_along_axis(difference, previous[..., None], axis=-1)[..., 0]
+    after = np.take_along_axis(difference, first[..., None], axis=-1)[..., 0]
+    crossing = death_ages[previous] + before / np.where(before != after, before - after, 1) * (death_ages[first] - death_ages[previous])
+    return np.where(~ahead.any(axis=-1), np.nan, np.where(first == start, death_ages[first], crossing))
+
+def sensitivity_analysis(profile=None, parameters=SENSITIVITY_PARAMETERS, relative_bump=0.05, death_age=85):
+    """
+    Rank the assumptions by how much they move the NPS-vs-UPS verdict of one officer.
+
+    Each parameter is bumped down and up by relative_bump of its value (one year for
+    spouse_age_difference), holding the others at the base profile (the fitment factor
+    stays fixed when inflation is bumped). All 2 x parameters + 1 scenarios run as one
+    cohort, so scenarios that keep the salary trajectory share it. Elasticities are
+    central differences: (relative change of the output) / (relative change of the parameter).
+
+    Args:
+        profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+        parameters (iterable): Profile keys to bump
+        relative_bump (float): Relative size of the bumps
+        death_age (int): Death age at which the UPS and NPS values are compared
+
+    Returns:
+        dict: "base" values, per parameter "sensitivity" rows (bumped values, the outputs at both bumps
+              and elasticities of "ups_value", "nps_value" and "break_even_age"), and "tornado":
+              the parameters ordered by the swing of the UPS - NPS difference
+    """
+    base = resolve_profile(profile)
+    parameters = list(parameters)
+    scenarios = [base]
+    bumps = []
+    for name in parameters:
+        if name not in DEFAULT_PROFILE or isinstance(base[name], (bool, str)):
+            raise ValueError(f"Cannot bump profile key '{name}'")
+        step = 1 if isinstance(base[name], int) else abs(base[name]) * relative_bump
+        bumps.append((base[name] - step, base[name] + step))
+        scenarios.extend({**base, name: value} for value in bumps[-1])
+
+    tables = np.array(run_cohort(scenarios), dtype=float)
+    death_ages = tables[0, :, 0]
+    if death_age not in death_ages:
+        raise ValueError(f"Death age {death_age} is outside the comparison table")
+    column = int(np.searchsorted(death_ages, death_age))
+    ups_value, nps_value = tables[:, column, 5], tables[:, column, 6]
+    outputs = {
+        "ups_value": ups_value,
+        "nps_value": nps_value,
+        "break_even_age": break_even_age(death_ages, tables[:, :, 5], tables[:, :, 6], base["retirement_age"]),
+    }
+
+    sensitivity = []
+    for i, (name, (low, high)) in enumerate(zip(parameters, bumps)):
+        low_row, high_row = 1 + 2 * i, 2 + 2 * i
+        relative_step = (high - low) / base[name] if base[name] else np.nan
+        row = {"parameter": name, "base": base[name], "low": low, "high": high, "elasticity": {}}
+        for output, values in outputs.items():
+            row[output] = (float(values[low_row]), float(values[high_row]))
+            row["elasticity"][output] = float((values[high_row] - values[low_row]) / values[0] / relative_step)
+        row["difference"] = (float(ups_value[low_row] - nps_value[low_row]), float(ups_value[high_row] - nps_value[high_row]))
+        row["swing"] = abs(row["difference"][1] - row["difference"][0])
+        sensitivity.append(row)
+    return {
+        "base": {output: float(values[0]) for output, values in outputs.items()},
+        "sensitivity": sensitivity,
+        "tornado": [row["parameter"] for row in sorted(sensitivity, key=lambda row: -row["swing"])],
+    }
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Cohort fiscal liability projection
+# ------------------------------------------------------------------------------------------------------------------------------
+class FiscalLiabilityAccumulator:
+    """
+    Calendar-year totals of government outflow, by category, summed over officers.
+
+    Memory is one row per category over the projection years, however many officers
+    are added. Cash flows outside [first_year, last_year] are dropped.
+    """
+    CATEGORIES = ("pension", "family_pension", "gratuity", "lump_sum")
+
+    def __init__(self, first_year, last_year):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.totals = np.zeros((len(self.CATEGORIES), last_year - first_year + 1))
+        self.officers = 0
+
+    def add(self, category, start_year, amounts):
+        """
+        Add a yearly cash flow vector starting in start_year to a category.
+        """
+        amounts = np.atleast_1d(np.asarray(amounts, dtype=float))
+        first = max(start_year, self.first_year)
+        last = min(start_year + len(amounts) - 1, self.last_year)
+        if first <= last:
+            self.totals[self.CATEGORIES.index(category), first - self.first_year:last - self.first_year + 1] += (
+                amounts[first - start_year:last - start_year + 1])
+
+    def table(self):
+        """
+        Return rows of [year, pension, family pension, gratuity, lump sum, total outflow].
+        """
+        years = np.arange(self.first_year, self.last_year + 1)
+        return np.column_stack((years, self.totals.T, self.totals.sum(axis=0))).tolist()
+
+def add_officer_cash_flows(accumulator, columns, profile, death_year, policy=None):
+    """
+    Add one officer's yearly UPS outflows to an accumulator, on the model's conventions
+    (the nominal streams of calculate_post_retirement_benefits, calculate_vrs_benefits
+    and calculate_pre_retirement_benefits).
+
+    Args:
+        accumulator (FiscalLiabilityAccumulator): Accumulator to add to
+        columns (dict): Ledger columns with corpora from joining to retirement (see accumulate_ledger_corpora)
+        profile (dict): Complete profile (see resolve_profile)
+        death_year (int): Year of the officer's death
+        policy (dict): Complete UPS policy the corpora were accumulated under (default: the active policy)
+    """
+    policy = policy or ups_policy
+    salary = columns["monthly_salary"]
+    first_year, first_month = int(columns["year"][0]), int(columns["month"][0])
+    retirement_year = profile["birth_year"] + profile["retirement_age"]
+    pension_base_year = profile["birth_year"] + profile["normal_retirement_age"]
+    spouse_age_difference = profile["spouse_age_difference"]
+
+    if death_year < retirement_year:
+        # Death in service: death gratuity and excess corpus, then family pension with 2% DR
+        _, _, family_pension_monthly, lump_sum = (float(values[0]) for values in value_pre_retirement_deaths(
+            columns, [death_year], spouse_age_difference, profile["inflation_rate"], policy))
+        death_position = np.searchsorted(columns["year"], death_year, side="right")
+        service_months = (death_year - first_year) * 12 + 12 - first_month
+        gratuity = float(gratuity_amount(salary[max(death_position - 12, 0):death_position].mean(), service_months)) \
+            if death_position > 0 else 0.0
+        accumulator.add("gratuity", death_year, gratuity if lump_sum else 0.0)
+        accumulator.add("lump_sum", death_year, lump_sum - gratuity if lump_sum else 0.0)
+        accumulator.add("family_pension", death_year,
+                        12 * family_pension_monthly * 1.02 ** np.arange(max(spouse_age_difference + 1, 0)))
+        return
+
+    # Retirement: gratuity, excess corpus and withdrawal, then pension from the base year
+    service_months = len(salary) - 1
+    avg_last_12_months_salary = salary[-12:].mean()
+    initial_pension, lump_sum = ups_payout_at_retirement(
+        avg_last_12_months_salary, columns["benchmark_corpus"][-1], columns["individual_corpus"][-1],
+        service_months, profile["withdrawal_percentage"], policy)
+    gratuity = float(gratuity_amount(avg_last_12_months_salary, service_months))
+    accumulator.add("gratuity", retirement_year, gratuity)
+    accumulator.add("lump_sum", retirement_year, float(lump_sum) - gratuity)
+
+    spouse_end_year = retirement_year + spouse_age_difference
+    spouse_years = spouse_end_year - death_year if death_year < spouse_end_year else -1
+    multipliers = pension_multiplier_table(max(death_year - pension_base_year, 0),
+                                           profile["pay_commission_interval"], profile["fitment_factor"])
+    if death_year >= pension_base_year:
+        accumulator.add("pension", pension_base_year, 12 * initial_pension * multipliers)
+    # Family pension (60% by default) from the officer's death year while the spouse survives
+    family_pension_monthly = initial_pension * multipliers[-1] * policy["family_pension_share"]
+    accumulator.add("family_pension", death_year, 12 * family_pension_monthly * 1.02 ** np.arange(spouse_years + 1))
+
+def project_fiscal_liability(profiles, death_ages=85, first_year=UPS_SWITCH_DATE.year, last_year=2125, chunk_size=1000,
+                             policy=None):
+    """
+    Project the year-by-year UPS outflow of a cohort (pensions, family pensions, gratuity and lump sums).
+
+    Profiles are consumed lazily in chunks; each chunk's seniority batches share their
+    salary trajectories (see plan_cohort), and every officer's dated cash flows are
+    added into one calendar-year accumulator, so memory does not grow with the cohort.
+
+    Args:
+        profiles (iterable): Officer profiles overriding DEFAULT_PROFILE (may be a generator)
+        death_ages (int or iterable): Death age of every officer, or one per officer
+                                      (death year = birth year + age)
+        first_year (int): First calendar year of the projection
+        last_year (int): Last calendar year of the projection
+        chunk_size (int): Officers planned together
+        policy (dict): UPS policy overriding DEFAULT_UPS_POLICY (default: the active policy)
+
+    Returns:
+        FiscalLiabilityAccumulator: Yearly totals (see FiscalLiabilityAccumulator.table)
+    """
+    policy = ups_policy if policy is None else resolve_policy(policy)
+    accumulator = FiscalLiabilityAccumulator(first_year, last_year)
+    death_age_iterator = itertools.repeat(death_ages) if np.isscalar(death_ages) else iter(death_ages)
+    profile_iterator = iter(profiles)
+    while True:
+        chunk = list(itertools.islice(profile_iterator, chunk_size))
+        if not chunk:
+            break
+        chunk_death_ages = [int(death_age) for death_age in itertools.islice(death_age_iterator, len(chunk))]
+        resolved, trajectories = plan_cohort(chunk)
+        for trajectory, start_date, indices in trajectories:
+            for i in indices:
+                profile = resolved[i]
+                columns = officer_ledger_columns(trajectory, start_date, profile, policy)
+                add_officer_cash_flows(accumulator, columns, profile, profile["birth_year"] + chunk_death_ages[i], policy)
+                accumulator.officers += 1
+    return accumulator
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# UPS policy sweep
+# ------------------------------------------------------------------------------------------------------------------------------
+def stack_policies(policies):
+    """
+    Resolve UPS policies and stack their numeric rules into (policies x 1) arrays, the form
+    accepted by the policy argument of the vectorized valuation functions.
+
+    Returns:
+        tuple: (resolved policies, rule name -> np.ndarray, switch month index (year * 12 + month - 1) per policy)
+    """
+    resolved = [resolve_policy(policy) for policy in policies]
+    rules = {key: np.array([policy[key] for policy in resolved], dtype=float)[:, None]
+             for key in DEFAULT_UPS_POLICY if key != "switch_date"}
+    switch_months = np.array([policy["switch_date"].year * 12 + policy["switch_date"].month - 1 for policy in resolved])
+    return resolved, rules, switch_months
+
+def sweep_ups_policies(profiles, policies, death_ages=(75, 85, 95)):
+    """
+    Value UPS under many policy variants for every officer of a cohort.
+
+    Salary ledgers and NPS corpora do not depend on the policy and are computed once per
+    officer, on trajectories shared by each seniority batch. The benchmark and individual
+    corpora are linear in their contribution rates, so one running corpus of unit
+    contributions per officer serves every policy: the benchmark corpus is the rate times
+    the unit corpus, and after a switch at month s the individual corpus is the NPS corpus
+    at s grown at the NAV rate plus the rate times the unit corpus accumulated since s.
+    The payout and valuation then broadcast over (policy x death age).
+
+    Args:
+        profiles (list): Officer profiles overriding DEFAULT_PROFILE
+        policies (list): UPS policies overriding DEFAULT_UPS_POLICY
+        death_ages (iterable): Death ages to value (death year = birth year + age)
+
+    Returns:
+        dict: "policies" (resolved) and "death_ages", (policy x officer x death age) "ups_value",
+              (officer x death age) "nps_value" and (policy x death age) "ups_better_share"
+              (the share of officers for whom UPS is worth more than NPS)
+    """
+    resolved_policies, rules, switch_months = stack_policies(policies)
+    death_ages = np.asarray(list(death_ages), dtype=int)
+    resolved, trajectories = plan_cohort(profiles)
+    ups_value = np.empty((len(resolved_policies), len(resolved), len(death_ages)))
+    nps_value = np.empty((len(resolved), len(death_ages)))
+
+    for trajectory, start_date, indices in trajectories:
+        for index in indices:
+            profile = resolved[index]
+            columns = officer_ledger_columns(trajectory, start_date, profile)
+            grid = value_ledger_grid(columns, profile, [profile["retirement_age"]])
+            death_years = profile["birth_year"] + death_ages
+            if not np.isin(death_years, grid["death_years"]).all():
+                raise ValueError(f"Death ages {death_ages.tolist()} fall outside the valuation grid of officer {index}")
+            nps_value[index] = grid["nps_value"][0, np.searchsorted(grid["death_years"], death_years)]
+
+            # Benchmark and individual corpus of every policy from the unit-contribution corpus
+            salary = columns["monthly_salary"]
+            nps_corpus = columns["nps_corpus"]
+            nav_growth = 1 + profile["pension_fund_nav_rate"] / 12
+            unit_corpus = accumulate_corpus(salary, nav_growth)
+            before_switch = np.searchsorted(columns["year"] * 12 + columns["month"] - 1, switch_months, side="right")[:, None] - 1
+            nps_at_switch = np.where(before_switch >= 0, nps_corpus[np.maximum(before_switch, 0)], 0)
+            unit_at_switch = np.where(before_switch >= 0, unit_corpus[np.maximum(before_switch, 0)], 0)
+            months = np.arange(len(salary))
+            growth_since_switch = nav_growth ** (months - before_switch)
+            benchmark_corpus = rules["benchmark_contribution_rate"] * unit_corpus
+            individual_corpus = np.where(
+                months <= before_switch, nps_corpus,
+                nps_at_switch * growth_since_switch
+                + rules["individual_contribution_rate"] * (unit_corpus - unit_at_switch * growth_since_switch))
+
+            # Payout at retirement and values over (policy x death age)
+            retirement_year = profile["birth_year"] + profile["retirement_age"]
+            initial_pension, lump_sum = ups_payout_at_retirement(
+                salary[-12:].mean(), benchmark_corpus[:, -1:], individual_corpus[:, -1:],
+                len(salary) - 1, profile["withdrawal_percentage"], rules)
+            post_retirement = value_ups_pension(
+                initial_pension, lump_sum, retirement_year, profile["birth_month"],
+                profile["birth_year"] + profile["normal_retirement_age"], death_years,
+                profile["spouse_age_difference"], rules, profile)[0]
+            pre_retirement = value_pre_retirement_deaths(
+                {**columns, "benchmark_corpus": benchmark_corpus, "individual_corpus": individual_corpus},
+                death_years, profile["spouse_age_difference"], profile["inflation_rate"], rules)[0]
+            ups_value[:, index] = np.where(death_years < retirement_year, pre_retirement, post_retirement)
+
+    return {
+        "policies": resolved_policies,
+        "death_ages": death_ages,
+        "ups_value": ups_value,
+        "nps_value": nps_value,
+        "ups_better_share": (ups_value > nps_value).mean(axis=1),
+    }
+
+# ------------------------------------------------------------------------------------------------------------------------------
+# Interpolation surrogate
+# ------------------------------------------------------------------------------------------------------------------------------
+class ComparisonSurrogate:
+    """
+    Precomputed mortality tables over a parameter grid, answered by interpolation.
+
+    build() evaluates the full model at every point of a grid of profile parameters and
+    writes the tables to a memory-mappable .npy file (float32, one table per grid point on
+    a common death age axis) with a JSON sidecar for the axes and metadata. query()
+    interpolates multilinearly between the surrounding grid points. Profiles outside the
+    grid, or differing from the base profile in a parameter that is not an axis, are
+    computed exactly. The reported error bound is the largest relative error against the
+    exact engine over random validation points drawn when the surrogate was built.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the .npy file written by build (the sidecar is path + ".json")
+        """
+        with open(path + ".json") as file:
+            metadata = json.load(file)
+        if metadata["model_version"] != MODEL_VERSION:
+            raise ValueError(f"{path} was built for model version {metadata['model_version']}; rebuild it")
+        if metadata.get("ups_policy", ups_policy_key(DEFAULT_UPS_POLICY)) != ups_policy_key():
+            raise ValueError(f"{path} was built for a different UPS policy; rebuild it")
+        self.values = np.load(path, mmap_mode="r")
+        self.axes = {name: np.asarray(values, dtype=float) for name, values in metadata["axes"].items()}
+        self.base_profile = metadata["base_profile"]
+        self.first_death_age = metadata["first_death_age"]
+        self.error_bound = metadata["error_bound"]
+
+    @classmethod
+    def build(cls, path, axes, base_profile=None, validation_points=50, seed=0):
+        """
+        Evaluate the model over the grid and write the surrogate files.
+
+        Args:
+            path (str): Path of the .npy file to write
+            axes (dict): Profile key -> grid values (e.g. {"birth_year": range(1985, 2001),
+                         "equity_return": [0.08, 0.10, 0.12, 0.14]})
+            base_profile (dict): Profile overrides for the parameters that are not axes
+            validation_points (int): Random in-grid profiles checked against the exact engine
+            seed (int): Random seed of the validation points
+
+        Returns:
+            ComparisonSurrogate: The surrogate, mapped from the written file
+        """
+        base_profile = dict(base_profile or {})
+        resolve_profile(base_profile)  # Validate the keys; derived defaults stay derived per grid point
+        axes = {name: sorted(float(value) for value in values) for name, values in axes.items()}
+        unknown = set(axes) - set(DEFAULT_PROFILE)
+        if unknown:
+            raise ValueError(f"Unknown profile keys: {', '.join(sorted(unknown))}")
+        names = list(axes)
+        points = list(itertools.product(*(axes[name] for name in names)))
+        tables = run_cohort([{**base_profile, **{name: type(DEFAULT_PROFILE[name] or 0.0)(value)
+                                                  for name, value in zip(names, point)}} for point in points])
+
+        first_death_age = min(table_data[0][0] for table_data in tables)
+        last_death_age = max(table_data[-1][0] for table_data in tables)
+        values = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float32,
+            shape=tuple(len(axes[name]) for name in names) + (last_death_age - first_death_age + 1, 8))
+        values[...] = np.nan
+        for index, table_data in zip(itertools.product(*(range(len(axes[name])) for name in names)), tables):
+            rows = np.asarray(table_data, dtype=float)
+            values[index][rows[:, 0].astype(int) - first_death_age] = rows[:, 1:]
+        values.flush()
+        del values
+
+        metadata = {"model_version": MODEL_VERSION, "ups_policy": ups_policy_key(), "axes": axes,
+                    "base_profile": base_profile, "first_death_age": first_death_age, "error_bound": None}
+        write_file_atomic(path + ".json", json.dumps(metadata, indent=2).encode("utf-8"))
+        surrogate = cls(path)
+
+        # Error bound: largest relative error at random points between the grid points
+        rng = np.random.default_rng(seed)
+        validation_profiles = []
+        for _ in range(validation_points):
+            profile = dict(base_profile)
+            for name in names:
+                low, high = axes[name][0], axes[name][-1]
+                if isinstance(DEFAULT_PROFILE[name], int):
+                    profile[name] = int(rng.integers(int(low), int(high) + 1))
+                else:
+                    profile[name] = float(rng.uniform(low, high))
+            validation_profiles.append(profile)
+        error_bound = np.zeros(8)
+        for profile, exact in zip(validation_profiles, run_cohort(validation_profiles)):
+            approximate = surrogate.query(profile)["table"]
+            approximate = {row[0]: row[1:] for row in approximate}
+            for row in exact:
+                if row[0] in approximate:
+                    error = np.abs(np.subtract(approximate[row[0]], row[1:])) / np.maximum(np.abs(row[1:]), 1.0)
+                    error_bound = np.maximum(error_bound, error)
+        metadata["error_bound"] = error_bound.tolist()
+        write_file_atomic(path + ".json", json.dumps(metadata, indent=2).encode("utf-8"))
+        surrogate.error_bound = metadata["error_bound"]
+        return surrogate
+
+    def query(self, profile=None):
+        """
+        Answer a profile from the grid, or exactly when it is outside the grid.
+
+        Args:
+            profile (dict): Officer profile and assumptions overriding DEFAULT_PROFILE
+
+        Returns:
+            dict: "table" (mortality comparison table rows), "exact" (True if computed by the
+                  full model) and "error_bound" (relative error bound of each value column)
+        """
+        profile = dict(self.base_profile, **(profile or {}))
+        if any(profile[name] != self.base_profile.get(name, DEFAULT_PROFILE.get(name))
+               for name in profile if name not in self.axes):
+            return self._exact(profile)
+        corners = [((), 1.0)]
+        for name, values in self.axes.items():
+            x = profile.get(name, DEFAULT_PROFILE[name])
+            if x is None or not values[0] <= x <= values[-1]:
+                return self._exact(profile)
+            if len(values) == 1:
+                brackets = [(0, 1.0)]
+            else:
+                j = min(int(np.searchsorted(values, x, side="right")) - 1, len(values) - 2)
+                t = (x - values[j]) / (values[j + 1] - values[j])
+                brackets = [(j, 1.0 - t), (j + 1, t)]
+            corners = [(index + (k,), weight * w) for index, weight in corners for k, w in brackets if w > 0]
+
+        table_values = sum(weight * self.values[index].astype(float) for index, weight in corners)
+        valid = ~np.isnan(table_values).any(axis=1)
+        rows = np.nonzero(valid)[0]
+        if len(rows) == 0 or not valid[rows[0]:rows[-1] + 1].all():
+            return self._exact(profile)  # Death ages not tabulated at every surrounding grid point
+        table_data = [[int(self.first_death_age + row)] + table_values[row].tolist() for row in rows]
+        return {"table": table_data, "exact": False, "error_bound": self.error_bound}
+
+    def _exact(self, profile):
+        return {"table": run_comparison(profile), "exact": True, "error_bound": [0.0] * 8}
 
 def main():
     global withdrawal_percentage  # Declare global variable
@@ -906,6 +5126,10 @@ def main():
     # Seniority year might be different from joining year
     seniority_year = int(input("Enter seniority year (default: 2022): ") or 2022)
     seniority_month = int(input("Enter seniority month (1-12, default: 1): ") or 1)
+
+    # Service determines the pay matrix (levels and years in each scale)
+    service = input(f"Enter service ({'/'.join(PAY_MATRICES)}, default: {DEFAULT_SERVICE}): ").strip() or DEFAULT_SERVICE
+    select_pay_matrix(service)
     
     # Ask about actual retirement age (could be less for VRS)
     retirement_age_input = input(f"Enter actual retirement age (default: {normal_retirement_age}, less than {normal_retirement_age} for VRS): ")
@@ -963,8 +5187,7 @@ def main():
     
     # Pay commission details
     pay_commission_interval = int(input("Enter pay commission interval in years (default: 10): ") or 10)
-    seventh_pay_commission_year = 2016  # 7th Pay Commission year
-    pay_commission_years = [year for year in range(seventh_pay_commission_year, 2100, pay_commission_interval)]
+    pay_commission_years = [year for year in range(SEVENTH_PAY_COMMISSION_YEAR, 2100, pay_commission_interval)]
     
     # Ask the user to choose a life cycle fund
     print("\nChoose a Life Cycle Fund for NPS:")
@@ -982,72 +5205,22 @@ def main():
     
     # Ask for spouse's age difference
     spouse_age_difference = int(input("Enter the age difference between spouse's death and employee's death (negative values allowed, default: 10): ") or 10)
-
-    # Set locale for currency formatting
-    try:
-        locale.setlocale(locale.LC_ALL, 'en_IN.UTF-8')
-    except:
-        try:
-            locale.setlocale(locale.LC_ALL, 'en_IN')
-        except:
-            locale.setlocale(locale.LC_ALL, '')  # Use system default if Indian locale not available
+    joint_life_choice = input("Should the NPS annuity continue to the spouse after the officer's death (joint life)? (y/n, default: y): ") or "y"
+    joint_life = joint_life_choice.strip().lower() != "n"
 
     # Ensure UTF-8 encoding for output
-    import sys
     sys.stdout.reconfigure(encoding='utf-8')
 
     # Generate monthly salary progression
-    global overall_table
-    overall_table = []
-    
-    # Calculate seniority-based service months (for pay scale determination)
-    seniority_start_date = date(seniority_year, seniority_month, 1)
-    
-    # Starting date
-    current_date = date(year_of_joining, month_of_joining, 1)
-    
-    # Track July increments
-    last_increment_date = None
-    increment_count = 0
-    
-    # Process month by month until retirement
-    while current_date <= retirement_date:  # Include the retirement month
-        # Calculate seniority-based service months
-        seniority_months = (current_date.year - seniority_start_date.year) * 12 + (current_date.month - seniority_start_date.month)
-        
-        # Update pay scales if it's April of a pay commission year (Pay Commission updates from April)
-        if current_date.month == APRIL and current_date.year in pay_commission_years:
-            update_pay_scales_for_pay_commission(fitment_factor)
-            
-        # Apply increment if it's July and we haven't had an increment this July
-        if current_date.month == JULY and (last_increment_date is None or current_date.year > last_increment_date.year):
-            increment_count += 1
-            last_increment_date = current_date
-        
-        # Get current pay scale and months in this scale based on seniority
-        current_scale, months_in_scale = get_pay_scale_for_service_months(seniority_months)
-        
-        # Calculate monthly salary using increment count for the 3% annual raises
-        monthly_salary, basic_pay = calculate_monthly_salary(current_scale["level"], months_in_scale, increment_count)
-        
-        overall_table.append({
-            "year": current_date.year,
-            "month": current_date.month,
-            "monthly_salary": monthly_salary,
-            "basic_pay": basic_pay,
-            "pay_level": current_scale["level"],
-            "months_in_scale": months_in_scale,
-            "increments": increment_count,
-            "nps_corpus": 0,  # Initialize, will be updated by calculate_nps_corpus
-            "individual_corpus": 0,  # Initialize, will be updated by calculate_nps_corpus
-            "benchmark_corpus": 0  # Initialize, will be updated by calculate_nps_corpus
-        })
-        
-        # Move to the next month
-        if current_date.month == 12:
-            current_date = date(current_date.year + 1, 1, 1)
-        else:
-            current_date = date(current_date.year, current_date.month + 1, 1)
+    generate_salary_progression(
+        year_of_joining,
+        month_of_joining,
+        seniority_year,
+        seniority_month,
+        retirement_date,
+        fitment_factor,
+        pay_commission_years
+    )
 
     # Calculate NPS corpus and update the overall_table with monthly NPS corpus values
     initialize_nps_corpus(
@@ -1098,9 +5271,13 @@ def main():
             
         prev_level = entry["pay_level"]
     
-    for entry in displayed_entries:
+    basic_pays, monthly_salaries, nps_corpora = (
+        format_inr([entry[field] for entry in displayed_entries])
+        for field in ("basic_pay", "monthly_salary", "nps_corpus")
+    )
+    for entry, basic_pay, monthly_salary, nps_corpus in zip(displayed_entries, basic_pays, monthly_salaries, nps_corpora):
         month_name = date(2000, entry["month"], 1).strftime('%b')
-        print(f"{entry['year']} | {month_name:5} | Level {entry['pay_level']} | {locale.currency(entry['basic_pay'], grouping=True)} | {locale.currency(entry['monthly_salary'], grouping=True)} | {locale.currency(entry['nps_corpus'], grouping=True)}")
+        print(f"{entry['year']} | {month_name:5} | Level {entry['pay_level']} | {basic_pay} | {monthly_salary} | {nps_corpus}")
     print("\n--- End of Salary Progression ---")
     # Generate mortality comparison table with updated parameters
     print("\n--- NPS vs UPS Comparison Across Different Death Ages ---")
@@ -1112,37 +5289,12 @@ def main():
         pay_commission_interval,
         annuity_rate,
         spouse_age_difference,
+        joint_life,
     )
     
     # Format table headers and data for display
-    headers = [
-        "Death Age",
-        "UPS Monthly Pension",
-        "NPS Monthly Pension",
-        "UPS Lump Sum",
-        "NPS Lump Sum",
-        "UPS Total Corpus (Inflation-Adjusted)",
-        "NPS Total Value (Inflation-Adjusted)",
-        "UPS Total Corpus (Nominal)",
-        "NPS Total Value (Nominal)"
-    ]
-
-    # Format currency values in the table
-    formatted_table = []
-    for row in mortality_table:
-        formatted_row = [
-            row[0],  # Death Age (no formatting)
-            locale.currency(round(row[1]), grouping=True),  # UPS Monthly Pension
-            locale.currency(round(row[2]), grouping=True),  # NPS Monthly Pension
-            locale.currency(round(row[3]), grouping=True),  # UPS Lump Sum
-            locale.currency(round(row[4]), grouping=True),  # NPS Lump Sum
-            locale.currency(round(row[5]), grouping=True),  # UPS Total Corpus (Inflation-Adjusted)
-            locale.currency(round(row[6]), grouping=True),  # NPS Total Value (Inflation-Adjusted)
-            locale.currency(round(row[7]), grouping=True),   # UPS Total Corpus (Nominal)
-            locale.currency(round(row[8]), grouping=True)  # NPS Total Value (Nominal)
-
-        ]
-        formatted_table.append(formatted_row)
+    headers = MORTALITY_TABLE_HEADERS
+    formatted_table = format_mortality_table(mortality_table)
     
     # Display the table in the terminal using tabulate
     print("\n--- NPS vs UPS Comparison Table ---")
@@ -1153,6 +5305,7 @@ def main():
     generate_csv_file(headers, mortality_table, csv_output_file)
     # Collect inputs for the Markdown file
     inputs = {
+        "Service": service,
         "Birth Year": birth_year,
         "Birth Month": birth_month,
         "Year of Joining": year_of_joining,
@@ -1172,7 +5325,8 @@ def main():
         "Annuity Rate": annuity_rate,
         "Pay Commission Interval": pay_commission_interval,
         "Life Cycle Fund": life_cycle_fund,
-        "Spouse Age Difference": spouse_age_difference
+        "Spouse Age Difference": spouse_age_difference,
+        "NPS Joint Life Annuity": "Yes" if joint_life else "No"
     }
 
     # Prepare salary progression for the Markdown file
@@ -1223,10 +5377,10 @@ def main():
             else:
                 print(f"From age {age}: {system} is better")
                 
-            print(f"  UPS value at age {age}: {locale.currency(ups_value, grouping=True)}")
-            print(f"  NPS value at age {age}: {locale.currency(nps_value, grouping=True)}")
+            print(f"  UPS value at age {age}: {format_inr(ups_value)}")
+            print(f"  NPS value at age {age}: {format_inr(nps_value)}")
             diff = abs(ups_value - nps_value)
-            print(f"  Difference: {locale.currency(diff, grouping=True)}")
+            print(f"  Difference: {format_inr(diff)}")
             print("")
     else:
         print("No data available for comparison")
@@ -1236,4 +5390,7 @@ def main():
     generate_markdown_file(headers, formatted_table, salary_progression, inputs, better_system_changes, output_file)
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["worker"]:
+        worker_main(sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,109 @@
+"""
+Equivalence of the computation backends: the "numpy" closed forms and the "numba"
+JIT-compiled kernels must reproduce the "python" reference loops.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+RTOL = 1e-9
+
+PROFILES = {
+    "default": {},
+    "vrs_52": {"retirement_age": 52},
+    "vrs_55": {"retirement_age": 55},
+    "late_joiner": {"birth_year": 1985, "year_of_joining": 2024, "month_of_joining": 9,
+                    "seniority_year": 2024, "seniority_month": 1},
+    # Joins in the April of a pay commission (2026, 2036, ...)
+    "pay_commission_boundary": {"birth_year": 2001, "birth_month": 3, "year_of_joining": 2026,
+                                "month_of_joining": 4, "seniority_year": 2026, "seniority_month": 4},
+}
+
+BACKENDS = [
+    "numpy",
+    pytest.param("numba", marks=pytest.mark.skipif(nps_ups.numba is None, reason="numba is not installed")),
+]
+
+
+@pytest.fixture
+def use_backend():
+    active_backend = nps_ups.backend
+
+    def use(name):
+        nps_ups.set_backend(name)
+
+    yield use
+    nps_ups.set_backend(active_backend)
+
+
+def run_with(use_backend, name, function, *args, **kwargs):
+    use_backend(name)
+    return function(*args, **kwargs)
+
+
+def assert_tables_match(tables, reference):
+    for table_data, expected in zip(tables, reference):
+        table_data, expected = np.array(table_data, dtype=float), np.array(expected, dtype=float)
+        assert table_data.shape == expected.shape
+        np.testing.assert_allclose(table_data, expected, rtol=RTOL, atol=1e-6)
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+@pytest.mark.parametrize("profile", PROFILES.values(), ids=PROFILES.keys())
+def test_cohort_tables_match_reference(use_backend, name, profile):
+    reference = run_with(use_backend, "python", nps_ups.run_cohort, [profile])
+    assert_tables_match(run_with(use_backend, name, nps_ups.run_cohort, [profile]), reference)
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+@pytest.mark.parametrize("profile", PROFILES.values(), ids=PROFILES.keys())
+def test_monthly_tables_match_reference(use_backend, name, profile):
+    reference = run_with(use_backend, "python", nps_ups.run_cohort, [profile], monthly=True)
+    assert_tables_match(run_with(use_backend, name, nps_ups.run_cohort, [profile], monthly=True), reference)
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_cohort_with_shared_trajectories_matches_reference(use_backend, name):
+    profiles = list(PROFILES.values())
+    reference = run_with(use_backend, "python", nps_ups.run_cohort, profiles)
+    assert_tables_match(run_with(use_backend, name, nps_ups.run_cohort, profiles), reference)
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_corpus_accumulation_matches_reference(use_backend, name):
+    rng = np.random.default_rng(0)
+    contributions = rng.uniform(0, 1e5, (3, 400))
+    growth = 1 + rng.uniform(0, 0.01, (3, 400))
+    initial = rng.uniform(0, 1e6, 3)
+    reference = run_with(use_backend, "python", nps_ups.accumulate_corpus, contributions, growth, initial)
+    np.testing.assert_allclose(run_with(use_backend, name, nps_ups.accumulate_corpus, contributions, growth, initial),
+                               reference, rtol=RTOL)
+
+
+@pytest.mark.skipif(nps_ups.numba is None, reason="numba is not installed")
+def test_numba_kernels_match_reference():
+    reference, compiled = nps_ups.KERNELS["python"], nps_ups.KERNELS["numba"]
+    pay_scales = nps_ups.PAY_MATRICES[nps_ups.DEFAULT_SERVICE]
+    basic_pay = np.array([scale["basic_pay"] for scale in pay_scales], dtype=float)
+    years_in_scale = np.array([scale["years_in_scale"] for scale in pay_scales], dtype=float)
+    np.testing.assert_allclose(compiled["pay_commission"](basic_pay, years_in_scale, 1.8, 6),
+                               reference["pay_commission"](basic_pay, years_in_scale, 1.8, 6), rtol=RTOL)
+
+    salary = np.random.default_rng(0).uniform(1e5, 3e5, 400)
+    nps_corpus = np.cumsum(salary * 0.24)
+    for switch_position in (0, 150, 400):
+        arguments = (salary, nps_corpus, switch_position, 1 + 0.08 / 12, 0.2, 0.2)
+        np.testing.assert_allclose(compiled["corpus_split"](*arguments), reference["corpus_split"](*arguments), rtol=RTOL)
+
+
+def test_verify_backends_restores_the_active_backend(use_backend):
+    use_backend("numpy")
+    differences = nps_ups.verify_backends([PROFILES["default"], PROFILES["vrs_55"]], rtol=RTOL)
+    assert nps_ups.backend == "numpy"
+    assert set(differences) == {"numpy"} | ({"numba"} if nps_ups.numba is not None else set())
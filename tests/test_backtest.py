@@ -0,0 +1,45 @@
+"""
+Historical NAV backtest: full windows by default, cyclic replay only on request.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+PROFILE = {"birth_year": 1996, "retirement_age": 50}
+
+
+def nav_returns(months):
+    returns = np.empty((months, 4))
+    returns[:, 0] = 2000 * 12 + np.arange(months)
+    returns[:, 1:] = 0.01 * (1 + np.sin(np.arange(months)))[:, None] * [1.0, 0.6, 0.4]
+    return returns
+
+
+def career_months(profile):
+    _, trajectories = nps_ups.plan_cohort([profile])
+    return len(trajectories[0][0]["monthly_salary"])
+
+
+def test_backtest_uses_only_full_windows_by_default():
+    history = career_months(PROFILE) + 5
+    backtest = nps_ups.backtest_nps_corpus(PROFILE, nav_returns(history))
+    assert len(backtest["start_months"]) == len(backtest["retirement_corpus"]) == 6
+    assert backtest["history_months"] == history
+    assert backtest["note"].startswith(f"Only 6 of {history} historical months")
+
+    wrapped = nps_ups.backtest_nps_corpus(PROFILE, nav_returns(history), wrap=True)
+    assert len(wrapped["start_months"]) == history and wrapped["note"] is None
+    np.testing.assert_array_equal(wrapped["retirement_corpus"][:6], backtest["retirement_corpus"])
+
+
+def test_backtest_wraps_a_short_history_only_on_request():
+    short_history = nav_returns(career_months(PROFILE) - 1)
+    with pytest.raises(ValueError, match="wrap=True"):
+        nps_ups.backtest_nps_corpus(PROFILE, short_history)
+    assert len(nps_ups.backtest_nps_corpus(PROFILE, short_history, wrap=True)["start_months"]) == len(short_history)
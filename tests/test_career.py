@@ -0,0 +1,29 @@
+"""
+Event-driven career ledger.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+
+def ledger_month(columns, year, month):
+    return np.nonzero((columns["year"] == year) & (columns["month"] == month))[0][0]
+
+
+def test_months_in_scale_follow_the_deputation_level():
+    events = [{"type": "deputation", "year": 2030, "month": 1, "months": 36, "level": 16}]
+    columns = nps_ups.CareerLedger({}, events).columns
+    own = nps_ups.CareerLedger({}).columns
+
+    before, start, end = (ledger_month(columns, year, month) for year, month in ((2029, 12), (2030, 1), (2033, 1)))
+    assert columns["months_in_scale"][before] == own["months_in_scale"][before]
+    np.testing.assert_array_equal(columns["pay_level"][start:end], 16)
+    np.testing.assert_array_equal(columns["months_in_scale"][start:end], np.arange(end - start))
+    # Back on the officer's own level and months in it after the deputation
+    np.testing.assert_array_equal(columns["pay_level"][end:], own["pay_level"][end:])
+    np.testing.assert_array_equal(columns["months_in_scale"][end:], own["months_in_scale"][end:])
@@ -0,0 +1,25 @@
+"""
+Indian rupee formatting with lakh/crore digit grouping.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+
+def test_amounts_are_grouped_in_lakhs_and_crores():
+    assert nps_ups.format_inr([0, 999.994, -1234.5, 13170799.888, 123456789012.5]) == [
+        "₹ 0.00", "₹ 999.99", "-₹ 1,234.50", "₹ 1,31,70,799.89", "₹ 1,23,45,67,89,012.50"]
+    assert nps_ups.format_inr(1234567, decimals=0) == "₹ 12,34,567"
+
+
+def test_non_finite_and_huge_amounts_do_not_overflow():
+    assert nps_ups.format_inr([np.nan, np.inf, -np.inf]) == ["₹ nan", "₹ inf", "-₹ inf"]
+    huge = [9.1e16, 9.3e16, -1e17, 1.5e20]  # Beyond int64 in paise from about 9.2e16
+    assert nps_ups.format_inr(huge) == [
+        "₹ 91,00,00,00,00,00,00,000.00", "₹ 93,00,00,00,00,00,00,000.00",
+        "-₹ 1,00,00,00,00,00,00,00,000.00", "₹ 15,00,00,00,00,00,00,00,00,000.00"]
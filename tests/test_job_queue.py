@@ -0,0 +1,89 @@
+"""
+JobQueue with several local worker processes: every job is run exactly as run_cohort
+would, and the chunk of a crashed worker is claimed again once its lease expires.
+"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+MODULE_PATH = os.path.abspath(nps_ups.__file__)
+
+PROFILES = [{"birth_year": birth_year, "birth_month": birth_month, "seniority_year": 2022 - birth_year % 3}
+            for birth_year in range(1990, 1996) for birth_month in (2, 9)]
+POLICIES = [None, {"assured_payout_share": 0.6, "switch_date": "2026-04-01"}]
+
+
+def start_workers(queue_path, count, lease_seconds):
+    return [subprocess.Popen([sys.executable, MODULE_PATH, "worker", queue_path, "--lease", str(lease_seconds),
+                              "--poll", "0.2", "--worker-id", f"worker-{i}"]) for i in range(count)]
+
+
+def test_local_workers_run_every_job_and_reclaim_an_abandoned_chunk(tmp_path):
+    queue_path = str(tmp_path / "queue.sqlite")
+    lease_seconds = 3
+    with nps_ups.JobQueue(queue_path, lease_seconds) as queue:
+        jobs = queue.enqueue(PROFILES, str(tmp_path / "results"), POLICIES, chunk_size=4)
+        abandoned_chunk, _ = queue.claim("crashed-worker")  # Never renewed or completed
+
+        workers = start_workers(queue_path, 3, lease_seconds)
+        for worker in workers:
+            assert worker.wait(timeout=300) == 0
+
+        assert queue.status() == {"pending": 0, "running": 0, "done": len(jobs) // 4, "failed": 0}
+        worker_id, attempts = queue._connection.execute(
+            "SELECT worker, attempts FROM chunks WHERE chunk = ?", (abandoned_chunk,)).fetchone()
+        assert worker_id != "crashed-worker" and attempts == 2
+
+    results = nps_ups.load_queue_results(queue_path)
+    assert sorted(results) == list(jobs)
+    active_policy = nps_ups.ups_policy
+    try:
+        for p, policy in enumerate(POLICIES):
+            nps_ups.set_ups_policy(policy)
+            for i, expected in enumerate(nps_ups.run_cohort(PROFILES)):
+                np.testing.assert_allclose(np.array(results[p * len(PROFILES) + i], dtype=float),
+                                           np.array(expected, dtype=float), rtol=1e-12)
+    finally:
+        nps_ups.set_ups_policy(active_policy)
+
+
+def test_expired_leases_move_the_chunk_and_fail_it_after_max_attempts(tmp_path):
+    queue_path = str(tmp_path / "queue.sqlite")
+    with nps_ups.JobQueue(queue_path, lease_seconds=0.2, max_attempts=2) as queue:
+        queue.enqueue(PROFILES[:2], str(tmp_path / "results"))
+        chunk, jobs = queue.claim("first")
+        assert jobs["first_job"] == 0 and len(jobs["profiles"]) == 2
+        assert queue.claim("second") is None  # The lease of "first" still holds
+
+        time.sleep(0.3)
+        assert queue.claim("second")[0] == chunk
+        assert not queue.renew(chunk, "first")
+        assert not queue.complete(chunk, "first", "part-000000")
+
+        time.sleep(0.3)
+        assert queue.claim("third") is None  # Two expired claims: the chunk is failed
+        assert queue.status()["failed"] == 1
+
+    # A worker opening the queue applies the coordinator's max_attempts
+    with nps_ups.JobQueue(queue_path) as queue:
+        assert queue.max_attempts == 2
+
+
+def test_worker_retries_a_failed_chunk(tmp_path):
+    queue_path = str(tmp_path / "queue.sqlite")
+    with nps_ups.JobQueue(queue_path, max_attempts=3) as queue:
+        queue.enqueue(PROFILES[:2], str(tmp_path / "results"))
+        chunk, _ = queue.claim("first")
+        assert queue.fail(chunk, "first", "RuntimeError: interrupted")
+        assert queue.status()["pending"] == 1
+
+    assert nps_ups.run_worker(queue_path, "second", poll_interval=0.1) == 1
+    results = nps_ups.load_queue_results(queue_path)
+    assert [results[0], results[1]] == nps_ups.run_cohort(PROFILES[:2])
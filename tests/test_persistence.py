@@ -0,0 +1,79 @@
+"""
+Result persistence: the SQLite result cache, cohort checkpoints and the columnar result store.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+TABLE = [[36, 1.5, 2.5, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0], [37, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]]
+
+
+def last_access(cache, key):
+    return cache._connection.execute("SELECT last_access FROM results WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_cache_hits_refresh_the_access_time_once_per_interval(tmp_path):
+    with nps_ups.ResultCache(str(tmp_path / "results.sqlite"), memory_items=0, access_interval=60) as cache:
+        cache.put("hot", TABLE)
+        stored = last_access(cache, "hot")
+        for _ in range(3):
+            assert cache.get("hot") == TABLE
+        assert last_access(cache, "hot") == stored
+
+        cache._connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (stored - 120, "hot"))
+        assert cache.get("hot") == TABLE
+        assert last_access(cache, "hot") >= stored
+
+
+def test_resumed_progress_measures_the_rate_from_the_restored_count():
+    progress = nps_ups.ProgressReporter(100, stream=None)
+    progress.resume(40)
+    assert progress.status()["done"] == 40
+    assert progress.status()["rate"] == 0.0
+    progress.update(10)
+    status = progress.status()
+    assert status["done"] == 50 and 0 < status["rate"]
+    assert status["eta_seconds"] == (100 - 50) / status["rate"]
+
+
+MONTHLY_PROFILES = [{"birth_year": 1994, "birth_month": 5}, {"birth_year": 1995, "retirement_age": 55}]
+
+
+def assert_monthly_tables_equal(tables, expected):
+    for table_data, expected_table in zip(tables, expected):
+        death_ages = [row[0] for row in table_data]
+        assert death_ages == [row[0] for row in expected_table]
+        assert any(death_age != int(death_age) for death_age in death_ages)  # Fractional ages survive
+        np.testing.assert_array_equal(np.array(table_data, dtype=float), np.array(expected_table, dtype=float))
+
+
+def test_monthly_tables_round_trip_through_the_result_cache(tmp_path):
+    expected = nps_ups.run_cohort(MONTHLY_PROFILES, monthly=True)
+    with nps_ups.ResultCache(str(tmp_path / "results.sqlite"), memory_items=0) as cache:
+        for i, table_data in enumerate(expected):
+            cache.put(str(i), table_data)
+        assert_monthly_tables_equal([cache.get(str(i)) for i in range(len(expected))], expected)
+
+
+def test_monthly_tables_round_trip_through_checkpoints(tmp_path):
+    expected = nps_ups.run_cohort(MONTHLY_PROFILES, monthly=True)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    progress = nps_ups.ProgressReporter(len(MONTHLY_PROFILES), stream=None)
+    tables = nps_ups.run_cohort_checkpointed(MONTHLY_PROFILES, checkpoint_dir, chunk_size=1, progress=progress,
+                                             monthly=True)
+    assert_monthly_tables_equal(tables, expected)
+    assert_monthly_tables_equal(nps_ups.load_checkpointed_results(checkpoint_dir), expected)
+    with pytest.raises(ValueError):
+        nps_ups.run_cohort_checkpointed(MONTHLY_PROFILES, checkpoint_dir, chunk_size=1, progress=progress)
+
+
+def test_monthly_tables_round_trip_through_the_result_store(tmp_path):
+    expected = nps_ups.run_cohort(MONTHLY_PROFILES, monthly=True)
+    store = nps_ups.run_cohort_to_store(MONTHLY_PROFILES, str(tmp_path / "store"), monthly=True)
+    assert_monthly_tables_equal([store.table(str(i)) for i in range(len(expected))], expected)
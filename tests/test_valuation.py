@@ -0,0 +1,202 @@
+"""
+Equivalence of the vectorized valuation with the per-death-year calculations it replaces.
+"""
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NPS_UPS_Comparison as nps_ups  # noqa: E402
+
+RTOL = 1e-12
+ENGINE_RTOL = 5e-14  # Vectorized engine vs the per-death-year engine of run_comparison
+
+PROFILES = {
+    "default": {},
+    "vrs_52": {"retirement_age": 52},
+    "withdrawal_single_life": {"withdrawal_percentage": 0.4, "birth_month": 11, "joint_life": False},
+    "spouse_older": {"spouse_age_difference": -3, "annuity_rate": 0.07},
+}
+
+
+def assert_tables_close(table_data, expected, rtol):
+    table_data, expected = np.array(table_data, dtype=float), np.array(expected, dtype=float)
+    assert table_data.shape == expected.shape
+    np.testing.assert_allclose(table_data, expected, rtol=rtol, atol=1e-6)
+
+
+def nps_reference(profile, ledger, death_year):
+    """
+    NPS payout of one death year, paid and discounted year by year.
+    """
+    retirement_year = profile["birth_year"] + profile["retirement_age"]
+    retirement_month = profile["birth_month"]
+    monthly_rate = profile["inflation_rate"] / 12
+    corpus_until = [(entry["year"] * 12 + entry["month"] - 1, entry["nps_corpus"]) for entry in ledger]
+
+    def corpus_at(month_index):
+        return ([corpus for index, corpus in corpus_until if index <= month_index] or [0])[-1]
+
+    death_index = death_year * 12 + nps_ups.DEATH_MONTH - 1
+    if death_index < retirement_year * 12 + retirement_month - 1:
+        corpus = corpus_at(death_index)  # Paid to the nominee
+        return 0, corpus, corpus, corpus
+
+    corpus = corpus_at(retirement_year * 12 + retirement_month - 1)
+    lump_sum = corpus * profile["withdrawal_percentage"]
+    annuity_corpus = corpus - lump_sum
+    annual_pension = annuity_corpus * profile["annuity_rate"]
+
+    def discount(year):
+        months = 12 - retirement_month if year == retirement_year else (year - retirement_year) * 12
+        return (1 + monthly_rate) ** -months
+
+    value, nominal = lump_sum, lump_sum
+    for year in range(retirement_year, death_year + 1):
+        value += annual_pension * discount(year)
+        nominal += annual_pension
+    last_year = death_year
+    spouse_end_year = retirement_year + profile["spouse_age_difference"]
+    if profile["joint_life"] and death_year < spouse_end_year:
+        for years_after_death in range(spouse_end_year - death_year + 1):
+            value += annual_pension * (1 + monthly_rate) ** (-12 * years_after_death)
+            nominal += annual_pension
+        last_year = spouse_end_year
+    value += annuity_corpus * discount(last_year)  # Return of purchase price
+    return annual_pension / 12, lump_sum, value, nominal + annuity_corpus
+
+
+@pytest.mark.parametrize("profile", PROFILES.values(), ids=PROFILES.keys())
+def test_nps_annuity_stream_matches_yearly_payments(profile):
+    pipeline = nps_ups.ComparisonPipeline(profile)
+    table_data = pipeline.run(until="valuation")
+    ledger, _ = pipeline.run(until="ups_corpus")
+    profile = nps_ups.resolve_profile(profile)
+    first_death_year = ledger[0]["year"] + 10
+    for row, death_year in zip(table_data, range(first_death_year, profile["birth_year"] + 100)):
+        # NPS pension, lump sum, inflation-adjusted and nominal value
+        np.testing.assert_allclose([row[2], row[4], row[6], row[8]], nps_reference(profile, ledger, death_year),
+                                   rtol=RTOL, atol=1e-6)
+
+
+def test_nps_annuity_stream_pays_the_corpus_at_death_in_service():
+    profile = nps_ups.resolve_profile(PROFILES["vrs_52"])
+    pipeline = nps_ups.ComparisonPipeline(profile)
+    ledger, _ = pipeline.run(until="ups_corpus")
+    retirement_date = date(profile["birth_year"] + profile["retirement_age"], profile["birth_month"], 1)
+    death_years = np.arange(ledger[0]["year"] - 2, retirement_date.year + 2)
+    monthly_pension, lump_sum, value, nominal = nps_ups.value_nps_annuity_streams(
+        death_years, retirement_date, profile["annuity_rate"], profile["spouse_age_difference"])
+    in_service = death_years < retirement_date.year
+    assert np.all(monthly_pension[in_service] == 0)
+    assert np.all(value[death_years < ledger[0]["year"]] == 0)  # No corpus before joining
+    np.testing.assert_array_equal(value[in_service], lump_sum[in_service])
+    np.testing.assert_array_equal(nominal[in_service], lump_sum[in_service])
+
+
+def test_cohort_engine_matches_run_comparison():
+    assert_tables_close(nps_ups.run_cohort([{}])[0], nps_ups.run_comparison({}), ENGINE_RTOL)
+
+
+def test_retirement_death_grid_matches_run_comparison_per_retirement_age():
+    profile = {"birth_year": 1990, "birth_month": 9}
+    retirement_ages = [50, 53, 57, 60]
+    grid = nps_ups.generate_retirement_death_grid(profile, retirement_ages)
+    for i, retirement_age in enumerate(retirement_ages):
+        assert_tables_close(nps_ups.grid_to_mortality_table(grid, i),
+                            nps_ups.run_comparison({**profile, "retirement_age": retirement_age}), ENGINE_RTOL)
+
+
+def test_officers_sharing_a_trajectory_match_run_comparison():
+    # One seniority batch: different birth dates, retirement ages and joining months
+    profiles = [{"birth_year": 1994, "birth_month": 2}, {"birth_year": 1995, "birth_month": 8, "retirement_age": 55},
+                {"birth_year": 1996, "month_of_joining": 9}, {"birth_year": 1993, "birth_month": 12, "retirement_age": 52}]
+    _, trajectories = nps_ups.plan_cohort(profiles)
+    assert len(trajectories) == 1
+    for table_data, profile in zip(nps_ups.run_cohort(profiles), profiles):
+        assert_tables_close(table_data, nps_ups.run_comparison(profile), ENGINE_RTOL)
+
+
+@pytest.mark.parametrize("profile", [{}, {"retirement_age": 55}, {"birth_month": 11, "withdrawal_percentage": 0.4},
+                                     {"spouse_age_difference": -3, "pay_commission_interval": 7}])
+def test_simulation_without_volatility_reproduces_the_grid(profile):
+    resolved = nps_ups.resolve_profile(profile)
+    death_ages = list(range(resolved["retirement_age"], 100))
+    simulation = nps_ups.simulate_ups(profile, paths=3, death_ages=death_ages,
+                                      inflation_volatility=0, fitment_volatility=0, seed=0)
+    grid = nps_ups.generate_retirement_death_grid(profile, [resolved["retirement_age"]])
+    columns = np.searchsorted(grid["death_years"], resolved["birth_year"] + np.array(death_ages))
+    for field in ("ups_value", "ups_nominal", "ups_monthly_pension"):
+        expected = np.broadcast_to(grid[field][0, columns], simulation[field].shape)
+        np.testing.assert_allclose(simulation[field], expected, rtol=RTOL)
+    np.testing.assert_allclose(simulation["initial_pension"], grid["ups_initial_pension"][0], rtol=RTOL)
+
+
+CORPUS_FIELDS = ("year", "month", "monthly_salary", "nps_corpus", "benchmark_corpus", "individual_corpus")
+
+
+def corpus_ledger(profile):
+    ledger, _ = nps_ups.ComparisonPipeline(profile).run(until="ups_corpus")
+    return nps_ups.ledger_columns(ledger, CORPUS_FIELDS)
+
+
+@pytest.mark.parametrize("ledger", [
+    # Joins in July: deaths in the first two Decembers see 6 and 7 salaries, the second is past the ledger
+    pytest.param(({"month_of_joining": 7, "year_of_joining": 2024}, 7), id="short"),
+    pytest.param(({"retirement_age": 52}, None), id="vrs_52"),
+])
+def test_pre_retirement_deaths_match_the_yearly_calculation(monkeypatch, ledger):
+    profile, months = ledger
+    columns = {field: values[:months] for field, values in corpus_ledger(profile).items()}
+    profile = nps_ups.resolve_profile(profile)
+    monkeypatch.setattr(nps_ups, "overall_table", nps_ups.ledger_table(columns))
+    monkeypatch.setattr(nps_ups, "inflation_rate", profile["inflation_rate"])
+
+    # From the year before joining (no value) to the year after the ledger ends
+    death_years = np.arange(columns["year"][0] - 1, columns["year"][-1] + 2)
+    retirement_date = date(int(columns["year"][-1]), int(columns["month"][-1]), 1)
+    values = nps_ups.value_pre_retirement_deaths(columns, death_years, profile["spouse_age_difference"],
+                                                 profile["inflation_rate"])
+    for i, death_year in enumerate(death_years.tolist()):
+        expected = nps_ups.calculate_pre_retirement_benefits(
+            death_year, retirement_date, profile["spouse_age_difference"], None)
+        np.testing.assert_allclose([float(column[i]) for column in values], expected, rtol=RTOL, atol=1e-6)
+    assert all(column[0] == 0 for column in values)  # Before joining
+
+
+def test_optimizer_uses_the_policy_it_is_given():
+    policy = {"switch_date": "2027-01-01", "individual_contribution_rate": 0.15, "minimum_payout": 20000,
+              "family_pension_share": 0.5}
+    profile = {"birth_year": 1990, "retirement_age": 55}
+    withdrawal_percentages = [0.0, 0.3, 0.6]
+    given = nps_ups.optimize_choices(profile, withdrawal_percentages, policy=policy)
+    default = nps_ups.optimize_choices(profile, withdrawal_percentages)
+    active_policy = nps_ups.ups_policy
+    nps_ups.set_ups_policy(policy)
+    try:
+        active = nps_ups.optimize_choices(profile, withdrawal_percentages)
+    finally:
+        nps_ups.set_ups_policy(active_policy)
+    np.testing.assert_array_equal(given["ups_value"], active["ups_value"])
+    assert not np.allclose(given["ups_value"], default["ups_value"])
+
+
+@pytest.mark.parametrize("profile", PROFILES.values(), ids=PROFILES.keys())
+def test_monthly_table_matches_the_yearly_table_at_december_deaths(profile):
+    yearly = np.array(nps_ups.run_cohort([profile])[0], dtype=float)
+    monthly = np.array(nps_ups.generate_monthly_mortality_table(profile), dtype=float)
+    december = monthly[nps_ups.DEATH_MONTH - 1::12]  # Death months start in January
+    assert december.shape == yearly.shape
+    resolved = nps_ups.resolve_profile(profile)
+    death_years = resolved["year_of_joining"] + 10 + np.arange(len(yearly))
+    np.testing.assert_allclose(december[:, 0], death_years - resolved["birth_year"] + (12 - resolved["birth_month"]) / 12,
+                               atol=0.005)
+    # Pensions and lump sums are the same; values differ after retirement (and for UPS in service)
+    # as the monthly table pays and discounts month by month
+    np.testing.assert_allclose(december[:, 1:5], yearly[:, 1:5], rtol=RTOL, atol=1e-6)
+    in_service = death_years < resolved["birth_year"] + resolved["retirement_age"]
+    np.testing.assert_allclose(december[in_service][:, [6, 8]], yearly[in_service][:, [6, 8]], rtol=RTOL, atol=1e-6)